@@ -19,6 +19,18 @@ if config.config_file_name is not None:
 # Устанавливаем metadata для автогенерации
 target_metadata = Base.metadata
 
+# Таблицы, которыми управляют сторонние библиотеки (не модели проекта)
+EXTERNAL_TABLES = {"apscheduler_jobs"}
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    if type_ == "table" and name in EXTERNAL_TABLES:
+        return False
+    if type_ in ("index", "column") and getattr(obj, "table", None) is not None:
+        return obj.table.name not in EXTERNAL_TABLES
+    return True
+
+
 # Устанавливаем SQLAlchemy URL из .env
 db_url = os.getenv("DATABASE_URL")
 if db_url:
@@ -30,6 +42,7 @@ def run_migrations_offline():
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -45,7 +58,9 @@ def run_migrations_online():
     )
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,41 @@
+"""apscheduler_jobs
+
+Revision ID: 35021223392a
+Revises: bfd9c5d1c62c
+Create Date: 2026-10-19 21:04:17.552910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '35021223392a'
+down_revision: Union[str, None] = 'bfd9c5d1c62c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Таблица SQLAlchemyJobStore (APScheduler 3.x), схема как в
+    # apscheduler/jobstores/sqlalchemy.py; в моделях проекта ее нет,
+    # autogenerate ее пропускает (include_object в alembic/env.py)
+    op.create_table(
+        'apscheduler_jobs',
+        sa.Column('id', sa.Unicode(length=191), nullable=False),
+        sa.Column('next_run_time', sa.Float(precision=25), nullable=True),
+        sa.Column('job_state', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        op.f('ix_apscheduler_jobs_next_run_time'), 'apscheduler_jobs', ['next_run_time'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_apscheduler_jobs_next_run_time'), table_name='apscheduler_jobs')
+    op.drop_table('apscheduler_jobs')
@@ -0,0 +1,40 @@
+"""parse_run_daily rollup and timestamp indexes
+
+Revision ID: 3f1c9a7d2b40
+Revises: 6e6a220d42ac
+Create Date: 2026-10-19 14:05:12.318402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b40'
+down_revision: Union[str, None] = '6e6a220d42ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('parse_run_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('ok', sa.Integer(), nullable=False),
+    sa.Column('err', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_index(op.f('ix_logs_timestamp'), 'logs', ['timestamp'], unique=False)
+    op.create_index(op.f('ix_parse_runs_timestamp'), 'parse_runs', ['timestamp'], unique=False)
+    op.create_index(op.f('ix_scheduler_status_updated_at'), 'scheduler_status', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_scheduler_status_updated_at'), table_name='scheduler_status')
+    op.drop_index(op.f('ix_parse_runs_timestamp'), table_name='parse_runs')
+    op.drop_index(op.f('ix_logs_timestamp'), table_name='logs')
+    op.drop_table('parse_run_daily')
@@ -0,0 +1,49 @@
+"""sync_jobs queue
+
+Revision ID: 8b2e5d0c7a13
+Revises: 3f1c9a7d2b40
+Create Date: 2026-10-19 15:21:40.552917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e5d0c7a13'
+down_revision: Union[str, None] = '3f1c9a7d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sync_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('requests', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('worker', sa.String(), nullable=True),
+    sa.Column('detail', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_jobs_created_at'), 'sync_jobs', ['created_at'], unique=False)
+    # не больше одной активной задачи: новые запросы сливаются в нее
+    op.create_index(
+        'uq_sync_jobs_active', 'sync_jobs', [sa.text('(true)')], unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_sync_jobs_active', table_name='sync_jobs')
+    op.drop_index(op.f('ix_sync_jobs_created_at'), table_name='sync_jobs')
+    op.drop_table('sync_jobs')
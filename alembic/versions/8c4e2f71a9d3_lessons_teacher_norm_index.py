@@ -0,0 +1,35 @@
+"""lessons teacher norm index
+
+Revision ID: 8c4e2f71a9d3
+Revises: 35021223392a
+Create Date: 2026-10-19 23:12:40.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4e2f71a9d3'
+down_revision: Union[str, None] = '35021223392a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # расписание преподавателя в боте ищется без учета регистра и ё/е;
+    # без индекса по выражению каждый запрос читает всю таблицу lessons
+    op.create_index(
+        'ix_lessons_teacher_norm_date',
+        'lessons',
+        [sa.text("translate(lower(teacher), 'ё', 'е')"), 'date'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_lessons_teacher_norm_date', table_name='lessons')
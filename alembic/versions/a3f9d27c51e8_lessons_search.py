@@ -0,0 +1,64 @@
+"""lessons search: teacher_norm, pg_trgm indexes
+
+Revision ID: a3f9d27c51e8
+Revises: 8c4e2f71a9d3
+Create Date: 2026-10-20 11:04:27.518342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f9d27c51e8'
+down_revision: Union[str, None] = '8c4e2f71a9d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# то же, что schedule_vvsu.text_norm.NORM_SQL / FOLD_SQL
+TEACHER_NORM = "btrim(regexp_replace(translate(lower(teacher), 'ё', 'е'), '[^a-zа-я]+', ' ', 'g'))"
+SUBJECT_FOLD = "translate(lower(subject), 'ё', 'е')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # нормализованное ФИО хранится, а не считается в каждом запросе;
+    # индекс по выражению из 8c4e2f71a9d3 заменяется индексом по колонке
+    op.drop_index('ix_lessons_teacher_norm_date', table_name='lessons')
+    op.add_column(
+        'lessons',
+        sa.Column('teacher_norm', sa.String(), sa.Computed(TEACHER_NORM, persisted=True), nullable=True),
+    )
+    op.create_index('ix_lessons_teacher_norm_date', 'lessons', ['teacher_norm', 'date'], unique=False)
+    op.create_index(
+        'ix_lessons_teacher_norm_trgm',
+        'lessons',
+        ['teacher_norm'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'teacher_norm': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_lessons_subject_trgm',
+        'lessons',
+        [sa.text(f"{SUBJECT_FOLD} gin_trgm_ops")],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_lessons_subject_trgm', table_name='lessons')
+    op.drop_index('ix_lessons_teacher_norm_trgm', table_name='lessons')
+    op.drop_index('ix_lessons_teacher_norm_date', table_name='lessons')
+    op.drop_column('lessons', 'teacher_norm')
+    op.create_index(
+        'ix_lessons_teacher_norm_date',
+        'lessons',
+        [sa.text("translate(lower(teacher), 'ё', 'е')"), 'date'],
+        unique=False,
+    )
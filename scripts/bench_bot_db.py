@@ -0,0 +1,188 @@
+"""
+Бенчмарк задержки ответов бота при одновременных пользователях.
+
+Каждый из --users пользователей отправляет --requests запросов
+"расписание преподавателя" (поиск по индексу и занятия преподавателя).
+Сравниваются три способа получить занятия:
+
+- cache  — ответ бота из кэша расписания в памяти (app/schedule_cache.py);
+- pool   — запрос к БД через пул asyncpg с подготовленными запросами
+  (app/db.py);
+- thread — запрос к БД через SQLAlchemy + psycopg2 в asyncio.to_thread
+  (тот же SQL, что и pool, чтобы сравнивались только способы доступа).
+
+Печатает p50/p95/p99 и пропускную способность по каждому способу.
+Подключение — из настроек бота (POSTGRES_*; POSTGRES_HOST может быть
+каталогом unix-сокета).
+
+    PYTHONPATH=src python scripts/bench_bot_db.py --users 50 --requests 20
+
+С --populate таблица lessons заполняется синтетическим расписанием
+(--lessons занятий у --teachers преподавателей). ВНИМАНИЕ: текущее
+содержимое lessons удаляется — запускайте только на отдельной базе.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+from schedule_vvsu.text_norm import norm
+from tg_bot.app import db, teachers_skill
+from tg_bot.app.schedule_cache import schedule_cache, teacher_index
+from tg_bot.app.settings import settings
+
+POOL_TIMETABLE_SQL = """
+SELECT date, to_char(start_time, 'HH24:MI'), to_char(end_time, 'HH24:MI'),
+       subject, coalesce(room, '')
+FROM lessons
+WHERE teacher_norm = $2 AND date >= $1
+ORDER BY date, start_time
+"""
+
+THREAD_TIMETABLE_SQL = text(
+    """
+    SELECT date, to_char(start_time, 'HH24:MI'), to_char(end_time, 'HH24:MI'),
+           subject, coalesce(room, '')
+    FROM lessons
+    WHERE teacher_norm = :teacher AND date >= :today
+    ORDER BY date, start_time
+    """
+)
+
+
+SYLLABLES = ("ба", "ве", "го", "ди", "жу", "за", "ки", "ло", "ма", "не", "по", "ру", "си", "ты", "фе")
+
+
+def synthetic_name(rnd: random.Random) -> str:
+    # только буквы: цифры при нормализации имен отбрасываются
+    surname = "".join(rnd.choice(SYLLABLES) for _ in range(3)).capitalize() + "ов"
+    return f"{surname} {rnd.choice('АБВГДЕИКЛМНОП')}.{rnd.choice('АБВГДЕИКЛМНОП')}."
+
+
+async def populate(lessons: int, teachers: int, rnd: random.Random):
+    names = set()
+    while len(names) < teachers:
+        names.add(synthetic_name(rnd))
+    names = sorted(names)
+    today = dt.date.today()
+    records = []
+    for i in range(lessons):
+        start = dt.time(8 + i % 10, 30)
+        records.append((
+            f"Дисциплина {i % 300}",
+            rnd.choice(names),
+            str(100 + i % 500),
+            "Лекция",
+            start,
+            dt.time(start.hour + 1, 50),
+            today + dt.timedelta(days=i % 120),
+        ))
+    pool = await db.get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute("DELETE FROM lessons")
+            await conn.copy_records_to_table(
+                "lessons",
+                records=records,
+                columns=["subject", "teacher", "room", "lesson_type", "start_time", "end_time", "date"],
+            )
+    print(f"lessons: {lessons} занятий, {teachers} преподавателей")
+
+
+async def pool_answer(query: str):
+    teacher, _ = teacher_index.search(query)
+    if teacher:
+        await db.fetch(POOL_TIMETABLE_SQL, dt.date.today(), norm(teacher))
+
+
+def thread_fetcher():
+    """Чтение через движок psycopg2 и запрос в потоке на каждый вызов."""
+    dsn = settings.DB_DSN.replace("postgresql://", "postgresql+psycopg2://", 1)
+    engine = create_engine(dsn, pool_pre_ping=True, future=True)
+
+    def query(teacher: str):
+        with engine.connect() as conn:
+            rows = conn.execute(
+                THREAD_TIMETABLE_SQL, {"today": dt.date.today(), "teacher": norm(teacher)}
+            )
+            return [tuple(r) for r in rows]
+
+    async def answer(q: str):
+        teacher, _ = teacher_index.search(q)
+        if teacher:
+            await asyncio.to_thread(query, teacher)
+
+    return answer, engine
+
+
+async def run_users(answer, users: int, requests: int, names: list[str], rnd: random.Random):
+    timings: list[float] = []
+
+    async def user():
+        for _ in range(requests):
+            started = time.perf_counter()
+            await answer(rnd.choice(names))
+            timings.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(users)))
+    return timings, time.perf_counter() - started
+
+
+def report(mode: str, timings: list[float], elapsed: float):
+    timings = sorted(timings)
+
+    def pct(p: float) -> float:
+        return timings[min(len(timings) - 1, int(len(timings) * p))]
+
+    print(
+        f"{mode:<7} p50 {statistics.median(timings):7.2f} мс  p95 {pct(0.95):7.2f} мс  "
+        f"p99 {pct(0.99):7.2f} мс  {len(timings) / elapsed:7.0f} запросов/с"
+    )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20, help="запросов на пользователя")
+    parser.add_argument("--populate", action="store_true", help="заполнить lessons синтетикой")
+    parser.add_argument("--lessons", type=int, default=20_000)
+    parser.add_argument("--teachers", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    if args.populate:
+        await populate(args.lessons, args.teachers, rnd)
+    await schedule_cache.refresh()
+    names = schedule_cache.teachers
+    if not names:
+        print("В lessons нет будущих занятий (запустите с --populate)", file=sys.stderr)
+        return 1
+    print(f"{args.users} пользователей × {args.requests} запросов, {len(names)} преподавателей")
+
+    thread_answer, engine = thread_fetcher()
+    modes = (
+        ("cache", teachers_skill.teacher_timetable),
+        ("pool", pool_answer),
+        ("thread", thread_answer),
+    )
+    try:
+        for mode, answer in modes:
+            await run_users(answer, 2, 5, names, rnd)  # прогрев соединений
+            report(mode, *await run_users(answer, args.users, args.requests, names, rnd))
+    finally:
+        engine.dispose()
+        await db.close_pool()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
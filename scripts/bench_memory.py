@@ -0,0 +1,183 @@
+"""
+Бенчмарк памяти синхронизации на синтетическом расписании.
+
+Генерирует HTML недель карусели ЛК на N занятий (по умолчанию 10 000) и
+прогоняет их через parser.extract_week_lessons под MemoryTracker
+(services/memory_profile.py) — теми же замерами, что и режим
+профилирования memory. Печатает пики по этапам и top-N мест выделения
+памяти; код выхода 1, если пик памяти Python-объектов или RSS превысил
+бюджет.
+
+    python scripts/bench_memory.py --lessons 10000 --budget-mb 120
+
+С --with-db дополнительно выполняются сохранение в БД и синхронизация
+с Google Calendar на подставном сервисе (этапы plan/apply/db_save).
+ВНИМАНИЕ: таблица lessons в DATABASE_URL перезаписывается — запускайте
+только на отдельной базе.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import date, timedelta
+from itertools import count
+
+from schedule_vvsu.parser import extract_week_lessons
+from schedule_vvsu.services import run_stats
+from schedule_vvsu.services.memory_profile import MemoryTracker
+
+WEEKDAYS = ("Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота")
+SLOTS = ("08:30-10:00", "10:10-11:40", "11:50-13:20", "13:30-15:00", "15:10-16:40", "16:50-18:20")
+LESSON_TYPES = ("Лекция", "Практическое занятие", "Лабораторная работа")
+
+
+def week_html(monday: date, lessons: int, seq) -> str:
+    """HTML одной недели в разметке ЛК: строка даты, затем строки занятий."""
+    rows = []
+    per_day = -(-lessons // len(WEEKDAYS))
+    for offset, weekday in enumerate(WEEKDAYS):
+        day_lessons = min(per_day, lessons)
+        if day_lessons <= 0:
+            break
+        lessons -= day_lessons
+        day = monday + timedelta(days=offset)
+        rows.append(f'<tr><td colspan="5"><b>{weekday} {day:%d.%m.%Y}</b></td></tr>')
+        for i in range(day_lessons):
+            n = next(seq)
+            webinar = f' вебинар: <a href="https://vvsu.ktalk.ru/room{n}">ссылка</a>' if n % 3 == 0 else ""
+            rows.append(
+                "<tr>"
+                f"<td>{SLOTS[i % len(SLOTS)]}</td>"
+                f'<td><a href="/time-table/dis?id={n % 400}">Дисциплина {n % 400}</a>{webinar}</td>'
+                f"<td>Преподаватель {n % 250} И.О.</td>"
+                f"<td>{LESSON_TYPES[n % len(LESSON_TYPES)]}</td>"
+                f"<td>{100 + n % 500}</td>"
+                "</tr>"
+            )
+    return (
+        '<div class="carousel-item"><table class="table"><thead><tr>'
+        "<th>Время</th><th>Дисциплина</th><th>Преподаватель</th><th>Тип</th><th>Аудитория</th>"
+        f'</tr></thead><tbody>{"".join(rows)}</tbody></table></div>'
+    )
+
+
+def synthetic_weeks(lessons: int, weeks: int) -> list[str]:
+    seq = count()
+    monday = date(2030, 9, 2)
+    per_week = -(-lessons // weeks)
+    pages = []
+    while lessons > 0:
+        pages.append(week_html(monday, min(per_week, lessons), seq))
+        lessons -= per_week
+        monday += timedelta(weeks=1)
+    return pages
+
+
+class _Request:
+    def __init__(self, result: dict):
+        self._result = result
+
+    def execute(self, num_retries: int = 0) -> dict:
+        return self._result
+
+
+class FakeEvents:
+    """Ответы Calendar API той же формы, что у настоящего сервиса."""
+
+    def __init__(self):
+        self._ids = count(1)
+
+    def list(self, **kwargs):
+        return _Request({"kind": "calendar#events", "items": []})
+
+    def insert(self, calendarId: str, body: dict):
+        return _Request(dict(body, id=f"ev{next(self._ids)}", status="confirmed"))
+
+    def update(self, calendarId: str, eventId: str, body: dict):
+        return _Request(dict(body, id=eventId))
+
+    def patch(self, calendarId: str, eventId: str, body: dict):
+        return _Request(dict(body, id=eventId))
+
+    def delete(self, calendarId: str, eventId: str):
+        return _Request({})
+
+
+class FakeCalendar:
+    def __init__(self):
+        self._events = FakeEvents()
+
+    def events(self):
+        return self._events
+
+
+def run(lessons: int, weeks: int, with_db: bool, top: int) -> MemoryTracker:
+    pages = synthetic_weeks(lessons, weeks)
+    tracker = MemoryTracker(top)
+    with run_stats.collect() as stats:
+        stats.memory = tracker
+        tracker.start()
+        try:
+            schedule = []
+            current_date = None
+            with stats.timed("extract"):
+                for html in pages:
+                    week_lessons, current_date = extract_week_lessons(html, current_date)
+                    schedule.extend(week_lessons)
+            if len(schedule) != lessons:
+                raise SystemExit(f"извлечено {len(schedule)} занятий вместо {lessons}")
+
+            if with_db:
+                from schedule_vvsu.database import init_db, save_lessons_to_db
+                from schedule_vvsu.google_calendar.sync import (
+                    load_previous_schedule,
+                    sync_schedule_to_calendar,
+                )
+
+                init_db()
+                save_lessons_to_db([])
+                with stats.timed("plan"):
+                    prev = load_previous_schedule()
+                with stats.timed("db_save"):
+                    save_lessons_to_db(schedule)
+                sync_schedule_to_calendar(FakeCalendar(), schedule, "bench", prev=prev)
+        finally:
+            tracker.stop()
+    return tracker
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lessons", type=int, default=10_000)
+    parser.add_argument("--weeks", type=int, default=40, help="на сколько недель разбить занятия")
+    parser.add_argument("--budget-mb", type=float, default=120, help="бюджет пика Python-объектов, MiB")
+    parser.add_argument("--rss-budget-mb", type=float, default=None, help="бюджет пикового RSS, MiB")
+    parser.add_argument("--with-db", action="store_true", help="сохранение в БД и синхронизация календаря")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--report", help="сохранить полный отчет в файл")
+    args = parser.parse_args()
+
+    tracker = run(args.lessons, args.weeks, args.with_db, args.top)
+    report = tracker.report()
+    print(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(report)
+
+    failures = []
+    py_peak_mb = tracker.py_peak_kb / 1024
+    if py_peak_mb > args.budget_mb:
+        failures.append(f"пик Python-объектов {py_peak_mb:.1f} MiB > {args.budget_mb} MiB")
+    if args.rss_budget_mb is not None and tracker.rss_peak_kb is not None:
+        rss_peak_mb = tracker.rss_peak_kb / 1024
+        if rss_peak_mb > args.rss_budget_mb:
+            failures.append(f"пиковый RSS {rss_peak_mb:.1f} MiB > {args.rss_budget_mb} MiB")
+    for failure in failures:
+        print(f"БЮДЖЕТ ПРЕВЫШЕН: {failure}", file=sys.stderr)
+    if not failures:
+        print(f"OK: {args.lessons} занятий, пик Python-объектов {py_peak_mb:.1f} MiB")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
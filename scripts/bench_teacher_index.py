@@ -0,0 +1,148 @@
+"""
+Бенчмарк поиска преподавателя в Telegram-боте.
+
+Строит TeacherIndex (src/tg_bot/app/teacher_index.py) на синтетическом
+списке из N преподавателей и замеряет время ответа на запросы разного
+вида: точная фамилия, ФИО, фамилия с инициалами, опечатки, мусор.
+Печатает p50/p95/max по каждому виду; код выхода 1, если p95 хоть
+одного вида больше бюджета.
+
+    PYTHONPATH=src python scripts/bench_teacher_index.py --teachers 5000 --budget-ms 9
+
+--baseline дополнительно замеряет прежний способ (WRatio по всем
+вариантам всех преподавателей на каждый запрос).
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from thefuzz import fuzz, process
+
+from tg_bot.app.teacher_index import TeacherIndex, norm
+
+SURNAMES = (
+    "Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов",
+    "Михайлов", "Новиков", "Федоров", "Морозов", "Волков", "Алексеев", "Лебедев",
+    "Семенов", "Егоров", "Павлов", "Козлов", "Степанов", "Николаев", "Орлов",
+    "Андреев", "Макаров", "Никитин", "Захаров", "Зайцев", "Соловьев", "Борисов",
+    "Яковлев", "Григорьев", "Романов", "Воробьев", "Сергеев", "Ковалев", "Белов",
+)
+SUFFIXES = ("", "ский", "енко", "ин", "цев", "ых", "ович")
+NAMES = (
+    "Александр", "Алексей", "Анна", "Дмитрий", "Елена", "Ирина", "Мария",
+    "Михаил", "Наталья", "Ольга", "Павел", "Сергей", "Татьяна", "Юлия",
+)
+PATRONYMICS = (
+    "Александрович", "Андреевна", "Викторович", "Владимировна", "Иванович",
+    "Игоревна", "Петрович", "Сергеевна", "Юрьевич", "Николаевна",
+)
+
+
+def synthetic_teachers(n: int, rnd: random.Random) -> list[str]:
+    teachers = set()
+    while len(teachers) < n:
+        surname = rnd.choice(SURNAMES)
+        suffix = rnd.choice(SUFFIXES)
+        if suffix:
+            surname = surname[:-2] + suffix
+        teachers.add(f"{surname} {rnd.choice(NAMES)} {rnd.choice(PATRONYMICS)}")
+    return sorted(teachers)
+
+
+def typo(s: str, rnd: random.Random) -> str:
+    i = rnd.randrange(1, len(s) - 1)
+    kind = rnd.randrange(3)
+    if kind == 0:
+        return s[:i] + s[i + 1:]
+    if kind == 1:
+        return s[:i] + s[i + 1] + s[i] + s[i + 2:]
+    return s[:i] + rnd.choice("аеиоуыяю") + s[i + 1:]
+
+
+def queries(teachers: list[str], count: int, rnd: random.Random) -> dict[str, list[str]]:
+    picked = [rnd.choice(teachers) for _ in range(count)]
+    return {
+        "фамилия": [t.split()[0] for t in picked],
+        "ФИО": [t.replace("е", "ё", 1) for t in picked],
+        "инициалы": [f"{t.split()[0]} {t.split()[1][0]}.{t.split()[2][0]}." for t in picked],
+        "опечатка": [typo(t.split()[0], rnd) for t in picked],
+        "мусор": ["".join(rnd.choice("абвгдежзклмн") for _ in range(8)) for _ in picked],
+    }
+
+
+def measure(fn, items: list[str]) -> list[float]:
+    timings = []
+    for q in items:
+        started = time.perf_counter()
+        fn(q)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def baseline(teachers: list[str]):
+    """Прежний поиск: все варианты каждого преподавателя на каждый запрос."""
+    candidates, back = [], {}
+    for t in teachers:
+        n = norm(t)
+        for v in {n, n.split()[0]}:
+            candidates.append(v)
+            back[v] = t
+
+    def search(query: str):
+        best = process.extractOne(norm(query), candidates, scorer=fuzz.WRatio)
+        return back[best[0]] if best and best[1] >= 70 else None
+
+    return search
+
+
+def report(title: str, timings: list[float]) -> float:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{title:<22} p50 {statistics.median(timings):7.2f} мс  "
+        f"p95 {p95:7.2f} мс  max {timings[-1]:7.2f} мс"
+    )
+    return p95
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--teachers", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=300, help="запросов каждого вида")
+    parser.add_argument("--budget-ms", type=float, default=9.0, help="бюджет p95 на запрос, мс")
+    parser.add_argument("--baseline", action="store_true", help="замерить и прежний поиск")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    teachers = synthetic_teachers(args.teachers, rnd)
+    index = TeacherIndex()
+    started = time.perf_counter()
+    index.build(teachers)
+    print(f"{len(teachers)} преподавателей, сборка индекса {(time.perf_counter() - started) * 1000:.0f} мс")
+
+    failures = []
+    hits = misses = 0
+    for kind, items in queries(teachers, args.queries, rnd).items():
+        p95 = report(f"индекс: {kind}", measure(index.search, items))
+        if p95 > args.budget_ms:
+            failures.append(f"{kind}: p95 {p95:.2f} мс > {args.budget_ms} мс")
+        if kind != "мусор":
+            found = [index.search(q) for q in items]
+            hits += sum(1 for teacher, hints in found if teacher or hints)
+            misses += sum(1 for teacher, hints in found if not teacher and not hints)
+        if args.baseline:
+            report(f"прежний: {kind}", measure(baseline(teachers), items[:50]))
+    print(f"найдено или подсказано: {hits}, не найдено: {misses}")
+
+    for failure in failures:
+        print(f"БЮДЖЕТ ПРЕВЫШЕН: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""
+Локальная заглушка Telegram Bot API для тестов бота.
+
+Отвечает на методы, которые вызывает aiogram: getMe, getUpdates (long
+polling с offset/timeout), setWebhook/deleteWebhook, sendMessage,
+editMessageText, answerCallbackQuery, sendPhoto, setMyCommands; на
+остальные — {"ok": true, "result": true}. Тексты длиннее 4096 символов
+и пустые отклоняются с 400, как в настоящем Telegram. Обновления от "пользователей"
+кладутся в очередь (push_update) и отдаются через getUpdates, а если бот
+установил вебхук — отправляются POST-запросом на его URL с секретом.
+Каждый ответ бота (сообщение, правка, ответ на кнопку) записывается и
+будит ожидающих wait_reply(chat_id) — так нагрузочный тест меряет время
+от обновления до ответа.
+
+Отдельно (бот запускается с TELEGRAM_API_URL=http://127.0.0.1:8099):
+
+    python scripts/fake_telegram.py --port 8099
+    curl -d text=/today 'http://127.0.0.1:8099/_send?user=42'
+    curl -d data=status 'http://127.0.0.1:8099/_send?user=42'
+    curl http://127.0.0.1:8099/_replies
+
+Из другого скрипта — см. scripts/loadtest_bot.py.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+log = logging.getLogger("fake_telegram")
+
+BOT_USER = {"id": 100000, "is_bot": True, "first_name": "Fake", "username": "fake_schedule_bot"}
+REPLY_METHODS = {"sendMessage", "editMessageText", "answerCallbackQuery", "sendPhoto"}
+# лимит Telegram на длину текста (считаем по строке целиком, с HTML-тегами)
+MESSAGE_LIMIT = 4096
+
+
+class TelegramRejected(Exception):
+    """Настоящий Telegram отклонил бы запрос бота (ответ 400)."""
+
+
+class FakeTelegram:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8099):
+        self.host, self.port = host, port
+        self.updates: List[dict] = []
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)
+        self.webhook: Optional[dict] = None
+        self.replies: deque = deque(maxlen=50)
+        self._callbacks: Dict[str, int] = {}
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._new_update = asyncio.Condition()
+        self._waiters: Dict[int, List[asyncio.Future]] = defaultdict(list)
+        self._runner: Optional[web.AppRunner] = None
+        self._http: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        app = web.Application(client_max_size=20 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        app.router.add_post("/_send", self._manual_send)
+        app.router.add_get("/_replies", self._manual_replies)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._http = aiohttp.ClientSession()
+        log.info(f"Fake Bot API: {self.url}")
+
+    async def stop(self):
+        if self._http is not None:
+            await self._http.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    # Обновления от пользователей
+
+    def message(self, user_id: int, text: str) -> dict:
+        entities = []
+        if text.startswith("/"):
+            entities.append({"type": "bot_command", "offset": 0, "length": len(text.split()[0])})
+        return {
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private", "first_name": f"user{user_id}"},
+                "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+                "text": text,
+                "entities": entities,
+            }
+        }
+
+    def button(self, user_id: int, data: str) -> dict:
+        callback_id = f"cb{next(self._message_ids)}"
+        self._callbacks[callback_id] = user_id
+        return {
+            "callback_query": {
+                "id": callback_id,
+                "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": {
+                    "message_id": next(self._message_ids),
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private", "first_name": f"user{user_id}"},
+                    "from": BOT_USER,
+                    "text": "меню",
+                },
+            }
+        }
+
+    async def push_update(self, update: dict):
+        update = dict(update, update_id=next(self._update_ids))
+        if self.webhook:
+            headers = {}
+            if self.webhook.get("secret_token"):
+                headers["X-Telegram-Bot-Api-Secret-Token"] = self.webhook["secret_token"]
+            async with self._http.post(self.webhook["url"], json=update, headers=headers) as resp:
+                if resp.status != 200:
+                    log.warning(f"Вебхук ответил {resp.status}")
+            return
+        async with self._new_update:
+            self.updates.append(update)
+            self._new_update.notify_all()
+
+    def expect_reply(self, chat_id: int) -> asyncio.Future:
+        """Future первого ответа бота в чат chat_id (результат — имя метода)."""
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters[chat_id].append(fut)
+        return fut
+
+    async def wait_reply(self, chat_id: int, timeout: float) -> str:
+        fut = self.expect_reply(chat_id)
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        finally:
+            if fut in self._waiters[chat_id]:
+                self._waiters[chat_id].remove(fut)
+
+    def _replied(self, chat_id: Optional[int], method: str, error: Optional[str] = None):
+        for fut in self._waiters.pop(chat_id, []):
+            if fut.done():
+                continue
+            if error:
+                fut.set_exception(TelegramRejected(f"{method}: {error}"))
+            else:
+                fut.set_result(method)
+
+    # Ручная проверка
+
+    async def _manual_send(self, request: web.Request) -> web.Response:
+        user_id = int(request.query.get("user", 42))
+        form = await request.post()
+        if "data" in form:
+            await self.push_update(self.button(user_id, form["data"]))
+        else:
+            await self.push_update(self.message(user_id, form.get("text", "/start")))
+        return web.json_response({"ok": True})
+
+    async def _manual_replies(self, request: web.Request) -> web.Response:
+        return web.json_response(list(self.replies))
+
+    # Bot API
+
+    async def _params(self, request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        params = {}
+        for key, value in (await request.post()).items():
+            params[key] = value if isinstance(value, str) else "<file>"
+        return params
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._params(request)
+        self.calls[method] += 1
+        error = self._check(method, params)
+        result = None if error else await getattr(self, f"_{method}", self._default)(params)
+        if method in REPLY_METHODS:
+            chat_id = params.get("chat_id")
+            if method == "answerCallbackQuery":
+                chat_id = self._callbacks.pop(params.get("callback_query_id"), None)
+            self.replies.append(
+                {"method": method, "chat_id": chat_id, "text": params.get("text"), "error": error}
+            )
+            self._replied(int(chat_id) if chat_id is not None else None, method, error)
+        if error:
+            self.rejected[f"{method}: {error}"] += 1
+            return web.json_response(
+                {"ok": False, "error_code": 400, "description": f"Bad Request: {error}"}, status=400
+            )
+        return web.json_response({"ok": True, "result": result})
+
+    @staticmethod
+    def _check(method: str, params: dict) -> Optional[str]:
+        """Ограничения настоящего Bot API, на которых бот может споткнуться."""
+        if method in ("sendMessage", "editMessageText"):
+            text = params.get("text") or ""
+            if not text.strip():
+                return "message text is empty"
+            if len(text) > MESSAGE_LIMIT:
+                return "message is too long"
+        return None
+
+    async def _default(self, params: dict):
+        return True
+
+    async def _getMe(self, params: dict):
+        return BOT_USER
+
+    async def _getUpdates(self, params: dict):
+        offset = int(params.get("offset") or 0)
+        timeout = float(params.get("timeout") or 0)
+        limit = int(params.get("limit") or 100)
+        async with self._new_update:
+            self.updates = [u for u in self.updates if u["update_id"] >= offset]
+            if not self.updates and timeout:
+                try:
+                    await asyncio.wait_for(self._new_update.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return self.updates[:limit]
+
+    async def _setWebhook(self, params: dict):
+        self.webhook = {"url": params["url"], "secret_token": params.get("secret_token")}
+        log.info(f"setWebhook {params['url']}")
+        return True
+
+    async def _deleteWebhook(self, params: dict):
+        self.webhook = None
+        return True
+
+    def _sent(self, params: dict, **extra) -> dict:
+        chat_id = int(params["chat_id"])
+        return {
+            "message_id": int(params.get("message_id") or next(self._message_ids)),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            **extra,
+        }
+
+    async def _sendMessage(self, params: dict):
+        return self._sent(params, text=params.get("text", ""))
+
+    async def _editMessageText(self, params: dict):
+        return self._sent(params, text=params.get("text", ""))
+
+    async def _sendPhoto(self, params: dict):
+        return self._sent(params, photo=[{"file_id": "f", "file_unique_id": "u", "width": 1, "height": 1}])
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    fake = FakeTelegram(args.host, args.port)
+    await fake.start()
+    try:
+        while True:
+            await asyncio.sleep(30)
+            log.info("вызовы: " + json.dumps(fake.calls, ensure_ascii=False))
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
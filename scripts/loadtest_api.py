@@ -0,0 +1,97 @@
+"""
+Нагрузочный тест read-эндпоинтов API.
+
+N параллельных клиентов в цикле опрашивают эндпоинты, в конце печатается
+RPS и p50/p95/p99 по каждому пути. Запускать против поднятого стека:
+
+    python scripts/loadtest_api.py --base-url http://localhost:8000 --clients 50
+
+Для сравнения "до/после" прогоните скрипт на двух ревизиях с одинаковыми
+параметрами и одинаковым наполнением БД.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+DEFAULT_PATHS = [
+    "/api/config/status",
+    "/api/logs/sql?after_id=0",
+    "/api/account",
+    "/api/scheduler/timeline?days=30",
+    "/api/scheduler/overview",
+]
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def run(base_url: str, paths: list[str], clients: int, duration: float) -> None:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(worker: int) -> None:
+        session = requests.Session()
+        i = worker
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            t0 = time.perf_counter()
+            try:
+                ok = session.get(base_url + path, timeout=30).ok
+            except requests.RequestException:
+                ok = False
+            elapsed = (time.perf_counter() - t0) * 1000
+            with lock:
+                if ok:
+                    latencies[path].append(elapsed)
+                else:
+                    errors[path] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    wall = time.perf_counter() - started
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"clients={clients} duration={wall:.1f}s requests={total} rps={total / wall:.1f}")
+    print(f"{'path':40} {'n':>6} {'err':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'mean':>8}")
+    for path in paths:
+        vals = latencies.get(path, [])
+        print(
+            f"{path:40} {len(vals):6d} {errors.get(path, 0):5d} "
+            f"{percentile(vals, 50):8.1f} {percentile(vals, 95):8.1f} "
+            f"{percentile(vals, 99):8.1f} {statistics.fmean(vals) if vals else 0:8.1f}"
+        )
+    all_vals = [v for vals in latencies.values() for v in vals]
+    print(f"{'ALL':40} {len(all_vals):6d} {sum(errors.values()):5d} "
+          f"{percentile(all_vals, 50):8.1f} {percentile(all_vals, 95):8.1f} "
+          f"{percentile(all_vals, 99):8.1f}  (ms)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="секунд")
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="эндпоинт (можно несколько раз)")
+    args = parser.parse_args()
+    run(args.base_url.rstrip("/"), args.paths or DEFAULT_PATHS, args.clients, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Нагрузочный тест Telegram-бота через заглушку Bot API.
+
+Поднимает scripts/fake_telegram.py, запускает бота в этом же процессе с
+TELEGRAM_API_URL на заглушку (polling или webhook) и моделирует --users
+пользователей: каждый в цикле отправляет сообщение или жмет кнопку и ждет
+первого ответа бота (sendMessage / editMessageText / answerCallbackQuery).
+Время от отправки обновления до ответа — задержка обработчика; в конце
+печатаются RPS и p50/p95/p99 по каждому обработчику. Ошибка — нет ответа
+за --timeout сек или ответ, который Telegram бы отклонил (например,
+сообщение длиннее 4096 символов; причины печатаются отдельно).
+
+Сценарии (--mix, вес через двоеточие):
+
+- teacher  — свободный текст с фамилией преподавателя (free_text_teacher);
+- teachers — /teachers (cmd_teachers);
+- today    — /today, week — /week (day_schedule);
+- status   — /status и кнопка "Статус" (cmd_status, cb_status; нужен API
+  по API_URL, пользователи — админы);
+- sync     — кнопка "Синхронизация" (cb_sync -> launch_sync). ВНИМАНИЕ:
+  ставит настоящую синхронизацию в очередь, поэтому только явно.
+
+    PYTHONPATH=src python scripts/loadtest_bot.py --users 50 --duration 30
+    PYTHONPATH=src python scripts/loadtest_bot.py --mode webhook --mix teacher:3,status:1
+
+Расписание бот читает из БД (POSTGRES_*), как в scripts/bench_bot_db.py.
+С --external бот не запускается: заглушка слушает --port, а уже запущенный
+бот должен ходить в нее (TELEGRAM_API_URL=http://127.0.0.1:<port>).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_telegram import FakeTelegram  # noqa: E402
+
+from tg_bot.app import bot as tg_bot  # noqa: E402
+from tg_bot.app.client import close as close_api  # noqa: E402
+from tg_bot.app.db import close_pool  # noqa: E402
+from tg_bot.app.schedule_cache import schedule_cache  # noqa: E402
+from tg_bot.app.settings import settings  # noqa: E402
+
+FAKE_TOKEN = "123456:FAKE-LOADTEST"
+DEFAULT_MIX = "teacher:6,teachers:1,today:2,week:1"
+FIRST_USER_ID = 1001
+
+
+def scenarios(fake: FakeTelegram, names: list[str]):
+    """Сценарий -> список (обработчик, построить обновление для user_id)."""
+    return {
+        "teacher": [("free_text_teacher", lambda u, rnd: fake.message(u, rnd.choice(names)))],
+        "teachers": [("cmd_teachers", lambda u, rnd: fake.message(u, "/teachers"))],
+        "today": [("cmd_today", lambda u, rnd: fake.message(u, "/today"))],
+        "week": [("cmd_week", lambda u, rnd: fake.message(u, "/week"))],
+        "status": [
+            ("cmd_status", lambda u, rnd: fake.message(u, "/status")),
+            ("cb_status", lambda u, rnd: fake.button(u, "status")),
+        ],
+        "sync": [("launch_sync", lambda u, rnd: fake.button(u, "sync_now"))],
+    }
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.strip().partition(":")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def run_users(fake: FakeTelegram, steps: list, weights: list[float], args):
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    deadline = time.perf_counter() + args.duration
+
+    async def user(user_id: int):
+        rnd = random.Random(args.seed * 100_000 + user_id)
+        while time.perf_counter() < deadline:
+            handler, make_update = rnd.choices(steps, weights)[0]
+            reply = fake.expect_reply(user_id)
+            started = time.perf_counter()
+            try:
+                await fake.push_update(make_update(user_id, rnd))
+                await asyncio.wait_for(reply, args.timeout)
+                latencies[handler].append((time.perf_counter() - started) * 1000)
+            except Exception:
+                reply.cancel()
+                errors[handler] += 1
+            if args.think:
+                await asyncio.sleep(rnd.uniform(0, 2 * args.think))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(FIRST_USER_ID + i) for i in range(args.users)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def report(latencies, errors, wall: float, users: int):
+    total = sum(len(v) for v in latencies.values())
+    print(f"users={users} duration={wall:.1f}s replies={total} rps={total / wall:.1f}")
+    print(
+        f"{'handler':20} {'n':>6} {'err':>5} {'rps':>7} {'p50':>8} {'p95':>8} "
+        f"{'p99':>8} {'max':>8}"
+    )
+
+    def line(name: str, vals: list[float], err: int):
+        print(
+            f"{name:20} {len(vals):6d} {err:5d} {len(vals) / wall:7.1f} "
+            f"{percentile(vals, 50):8.1f} {percentile(vals, 95):8.1f} "
+            f"{percentile(vals, 99):8.1f} {max(vals, default=0):8.1f}"
+        )
+
+    for handler in sorted(set(latencies) | set(errors)):
+        line(handler, latencies.get(handler, []), errors.get(handler, 0))
+    all_vals = [v for vals in latencies.values() for v in vals]
+    line("ALL", all_vals, sum(errors.values()))
+    if all_vals:
+        print(f"mean={statistics.fmean(all_vals):.1f} ms")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="сек")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="сценарий:вес,... (см. выше)")
+    parser.add_argument("--think", type=float, default=0, help="средняя пауза пользователя, сек")
+    parser.add_argument("--timeout", type=float, default=10, help="ожидание ответа, сек")
+    parser.add_argument("--mode", choices=("polling", "webhook"), default="polling")
+    parser.add_argument("--port", type=int, default=8099, help="порт заглушки Bot API")
+    parser.add_argument("--external", action="store_true", help="бот уже запущен отдельно")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="логи бота")
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    weights = parse_mix(args.mix)
+    fake = FakeTelegram(port=args.port)
+    available = scenarios(fake, [])
+    unknown = set(weights) - set(available)
+    if unknown:
+        print(f"Неизвестные сценарии: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    await schedule_cache.refresh()
+    names = [n for n in schedule_cache.teachers if len(n) >= 3]
+    if "teacher" in weights and not names:
+        print("В lessons нет будущих занятий (см. scripts/bench_bot_db.py --populate)", file=sys.stderr)
+        return 1
+
+    steps, step_weights = [], []
+    for name, handlers in scenarios(fake, names).items():
+        for step in handlers:
+            if weights.get(name):
+                steps.append(step)
+                step_weights.append(weights[name] / len(handlers))
+
+    await fake.start()
+    try:
+        if not args.external:
+            settings.TELEGRAM_API_URL = fake.url
+            # все пользователи — админы, иначе /status отвечает "нет доступа"
+            settings.ADMIN_IDS = ",".join(str(FIRST_USER_ID + i) for i in range(args.users))
+            webhook_url = f"http://127.0.0.1:{settings.BOT_WEBHOOK_PORT}"
+            await tg_bot.switch_bot(FAKE_TOKEN, args.mode, webhook_url)
+            if tg_bot.bot is None:
+                print("Бот не запустился", file=sys.stderr)
+                return 1
+        print(
+            f"{args.users} пользователей, {args.duration:.0f}с, mode={args.mode}, "
+            f"mix={args.mix}, преподавателей: {len(names)}"
+        )
+        report(*await run_users(fake, steps, step_weights, args), args.users)
+        calls = ", ".join(f"{k}={v}" for k, v in sorted(fake.calls.items()))
+        print(f"Bot API: {calls}")
+        for reason, n in sorted(fake.rejected.items()):
+            print(f"отклонено: {reason} × {n}")
+    finally:
+        if not args.external:
+            await tg_bot.switch_bot(None)
+            await tg_bot.webhook.stop()
+            await close_api()
+        await close_pool()
+        await fake.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -28,6 +28,10 @@ export async function postSync() {
     return res.json();
 }
 
+export function syncJobEventsUrl(id: number) {
+    return `/api/sync/jobs/${id}/events`;
+}
+
 export async function postScheduler(action: "start" | "stop") {
     const res = await fetch(`/api/scheduler/${action}`, {
         method: "POST",
@@ -44,6 +48,20 @@ export async function getSchedulerOverview() {
     return res.json();
 }
 
+export async function getRunStats(days = 7) {
+    const res = await fetch(`/api/runs/stats?days=${days}`);
+    return res.json();
+}
+
+export async function getProfiles() {
+    const res = await fetch("/api/profiles");
+    return res.json();
+}
+
+export function profileDownloadUrl(name: string) {
+    return `/api/profiles/${encodeURIComponent(name)}`;
+}
+
 export async function getBotSettings(): Promise<{ bot_enabled: boolean }> {
     const res = await fetch("/api/bot/settings");
     if (!res.ok) throw new Error("getBotSettings failed");
@@ -58,16 +76,69 @@ export async function postBotSettings(enabled: boolean) {
     });
 }
 
-export async function getBotConfig(): Promise<{ bot_token: string; admin_ids: string }> {
+export type BotMode = "polling" | "webhook";
+
+export async function getBotConfig(): Promise<{
+    bot_enabled: boolean;
+    bot_token: string;
+    admin_ids: string;
+    bot_mode: BotMode;
+    bot_webhook_url: string;
+}> {
     const res = await fetch("/api/bot/config");
     if (!res.ok) throw new Error("getBotConfig failed");
     return res.json();
 }
 
-export async function patchBotConfig(payload: { bot_token?: string; admin_ids?: string }) {
+export async function patchBotConfig(payload: {
+    bot_token?: string;
+    admin_ids?: string;
+    bot_mode?: BotMode;
+    bot_webhook_url?: string;
+}) {
     return fetch("/api/bot/config", {
         method: "PATCH",
         headers: {"Content-Type": "application/json"},
         body: JSON.stringify(payload),
     });
 }
+
+export interface TeacherHit {
+    teacher: string;
+    score: number;
+    upcoming: number;
+    next_date: string | null;
+}
+
+export interface LessonHit {
+    date: string;
+    start: string;
+    end: string;
+    subject: string;
+    teacher: string | null;
+    room: string | null;
+    lesson_type: string | null;
+}
+
+export async function searchTeachers(q: string, limit = 10): Promise<TeacherHit[]> {
+    const params = new URLSearchParams({q, limit: String(limit)});
+    const res = await fetch(`/api/search/teachers?${params}`);
+    if (!res.ok) throw new Error("searchTeachers failed");
+    return res.json();
+}
+
+export async function searchLessons(query: {
+    q?: string;
+    teacher?: string;
+    date_from?: string;
+    date_to?: string;
+    limit?: number;
+}): Promise<LessonHit[]> {
+    const params = new URLSearchParams();
+    for (const [key, value] of Object.entries(query)) {
+        if (value !== undefined && value !== "") params.set(key, String(value));
+    }
+    const res = await fetch(`/api/search/lessons?${params}`);
+    if (!res.ok) throw new Error("searchLessons failed");
+    return res.json();
+}
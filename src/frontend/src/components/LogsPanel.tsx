@@ -23,32 +23,26 @@ function clean(m: string) {
 
 export default function LogsPanel() {
     const [logs, setLogs] = useState<LogEntry[]>([])
-    const [lastId, setLastId] = useState(0)
     const [expanded, setExpanded] = useState(() => localStorage.getItem("logsExpanded") === "true")
     const [autoScroll, setAutoScroll] = useState(() => localStorage.getItem("logsAutoScroll") !== "false")
     const [hasScrolled, setHasScrolled] = useState(false)
     const tail = useRef<HTMLDivElement>(null)
 
+    // сервер сам присылает новые строки; при обрыве EventSource
+    // переподключается с Last-Event-ID и получает пропущенное
     useEffect(() => {
-        const fetchLogs = () => {
-            fetch("/api/logs/sql?after_id=" + lastId)
-                .then(r => r.json())
-                .then((chunk: LogEntry[]) => {
-                    if (chunk.length) {
-                        setLogs(prev => {
-                            const updated = [...prev, ...chunk].slice(-100)
-                            setLastId(updated[updated.length - 1].id)
-                            return updated
-                        })
-                    }
-                })
-                .catch(console.error)
+        const es = new EventSource("/api/logs/stream")
+        es.onmessage = e => {
+            const entry: LogEntry = JSON.parse(e.data)
+            // строка, закоммиченная позже соседних, приходит с меньшим id
+            setLogs(prev => {
+                if (prev.some(l => l.id === entry.id)) return prev
+                return [...prev, entry].sort((a, b) => a.id - b.id).slice(-100)
+            })
         }
-
-        fetchLogs()
-        const id = setInterval(fetchLogs, 5000)
-        return () => clearInterval(id)
-    }, [lastId])
+        es.onerror = () => console.error("logs stream: соединение прервано, переподключение")
+        return () => es.close()
+    }, [])
 
     useEffect(() => {
         if (autoScroll && !hasScrolled && tail.current && logs.length) {
@@ -0,0 +1,89 @@
+import {useEffect, useState} from "react"
+import {getProfiles, profileDownloadUrl} from "../api"
+import "../styles/schedulerStatus.css"
+
+/* типы — ответ /api/profiles */
+interface ProfileFile {
+    name: string
+    size: number
+}
+
+interface Profile {
+    id: string
+    label?: string
+    mode?: string
+    status?: string
+    started: string
+    duration_s?: number
+    files: ProfileFile[]
+}
+
+/* утилиты */
+function started(iso: string) {
+    return iso.slice(0, 16).replace("T", " ")
+}
+
+function size(bytes: number) {
+    return bytes < 1024 ? `${bytes} Б` : `${Math.round(bytes / 1024)} КБ`
+}
+
+/* компонент: сохраненные профили прогонов со ссылками на файлы */
+export default function ProfilesPanel() {
+    const [profiles, setProfiles] = useState<Profile[] | null>(null)
+
+    useEffect(() => {
+        getProfiles().then(r => setProfiles(r.profiles)).catch(console.error)
+    }, [])
+
+    if (!profiles) {
+        return <div className="schedule-wrapper">Загрузка...</div>
+    }
+
+    if (profiles.length === 0) {
+        return (
+            <div className="schedule-wrapper">
+                Профилей пока нет: включите SYNC_PROFILE или запустите sync-now --profile.
+            </div>
+        )
+    }
+
+    return (
+        <div className="schedule-wrapper">
+            <table>
+                <thead>
+                <tr>
+                    <th>Начало</th>
+                    <th>Прогон</th>
+                    <th>Файлы</th>
+                </tr>
+                </thead>
+
+                <tbody>
+                {profiles.map(p => (
+                    <tr key={p.id}>
+                        <td>{started(p.started)}</td>
+                        <td>
+                            {p.status && (
+                                <span className={`status-dot ${p.status === "error" ? "status-err" : "status-ok"}`}/>
+                            )}
+                            {p.label ?? p.id}
+                            {p.mode && ` (${p.mode})`}
+                            {p.duration_s !== undefined && `, ${p.duration_s.toFixed(1)} с`}
+                        </td>
+                        <td>
+                            {p.files.map(f => (
+                                <div key={f.name}>
+                                    <a href={profileDownloadUrl(f.name)} download={f.name}>
+                                        {f.name}
+                                    </a>{" "}
+                                    <small>{size(f.size)}</small>
+                                </div>
+                            ))}
+                        </td>
+                    </tr>
+                ))}
+                </tbody>
+            </table>
+        </div>
+    )
+}
@@ -0,0 +1,104 @@
+import {useEffect, useState} from "react"
+import {getRunStats} from "../api"
+import "../styles/schedulerStatus.css"
+
+/* типы — ответ /api/runs/stats */
+interface StageStats {
+    stage: string
+    runs: number
+    p50_ms: number | null
+    p95_ms: number | null
+    max_ms: number | null
+}
+
+interface RunStats {
+    days: number
+    runs: number
+    errors: number
+    duration_ms: { p50: number | null, p95: number | null }
+    stages: StageStats[]
+    counters: Record<string, { total: number, avg: number, max: number }>
+}
+
+/* утилиты */
+const STAGE_TITLES: Record<string, string> = {
+    browser_start: "Запуск браузера",
+    login: "Вход в ЛК",
+    schedule_load: "Загрузка расписания",
+    extract: "Разбор расписания",
+    snapshot_load: "Загрузка снимка",
+    db_save: "Сохранение в БД",
+    calendar_auth: "Авторизация Google",
+    calendar_lookup: "Поиск событий",
+    plan: "Планирование",
+    apply: "Применение",
+    final_save: "Итоговое сохранение",
+}
+
+const PERIODS = [1, 7, 30]
+
+function seconds(ms: number | null) {
+    return ms === null ? "—" : `${(ms / 1000).toFixed(ms < 10_000 ? 2 : 1)} с`
+}
+
+/* компонент: p50/p95 этапов синхронизации за период */
+export default function RunStatsPanel() {
+    const [days, setDays] = useState(7)
+    const [data, setData] = useState<RunStats | null>(null)
+
+    useEffect(() => {
+        getRunStats(days).then(setData).catch(console.error)
+    }, [days])
+
+    if (!data) {
+        return <div className="schedule-wrapper">Загрузка...</div>
+    }
+
+    return (
+        <div className="schedule-wrapper">
+            <p className="stats-summary">
+                {PERIODS.map(n => (
+                    <button
+                        key={n}
+                        className={`period-btn ${n === days ? "active" : ""}`}
+                        onClick={() => setDays(n)}
+                    >
+                        {n} дн.
+                    </button>
+                ))}
+                <span>
+                    Прогонов: {data.runs}, ошибок: {data.errors}, длительность
+                    p50 {seconds(data.duration_ms.p50)}, p95 {seconds(data.duration_ms.p95)}
+                </span>
+            </p>
+
+            {data.stages.length === 0 ? (
+                <p>Нет прогонов со статистикой за этот период.</p>
+            ) : (
+                <table>
+                    <thead>
+                    <tr>
+                        <th>Этап</th>
+                        <th>Прогонов</th>
+                        <th>p50</th>
+                        <th>p95</th>
+                        <th>Макс.</th>
+                    </tr>
+                    </thead>
+
+                    <tbody>
+                    {data.stages.map(s => (
+                        <tr key={s.stage}>
+                            <td>{STAGE_TITLES[s.stage] ?? s.stage}</td>
+                            <td>{s.runs}</td>
+                            <td>{seconds(s.p50_ms)}</td>
+                            <td>{seconds(s.p95_ms)}</td>
+                            <td>{seconds(s.max_ms)}</td>
+                        </tr>
+                    ))}
+                    </tbody>
+                </table>
+            )}
+        </div>
+    )
+}
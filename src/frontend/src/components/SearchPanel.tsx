@@ -0,0 +1,106 @@
+import {useEffect, useState} from "react"
+import {searchLessons, searchTeachers} from "../api"
+import type {LessonHit, TeacherHit} from "../api"
+import "../styles/search.css"
+
+const DEBOUNCE_MS = 250
+
+const formatDate = (iso: string) => iso.slice(8, 10) + "." + iso.slice(5, 7)
+
+/* компонент */
+export default function SearchPanel() {
+    const [query, setQuery] = useState("")
+    const [teacher, setTeacher] = useState<string | null>(null)
+    const [teachers, setTeachers] = useState<TeacherHit[]>([])
+    const [lessons, setLessons] = useState<LessonHit[]>([])
+
+    /* поиск по мере ввода: преподаватели и занятия по дисциплине/ФИО */
+    useEffect(() => {
+        if (teacher !== null) return
+        const q = query.trim()
+        if (q.length < 2) {
+            setTeachers([])
+            setLessons([])
+            return
+        }
+        let cancelled = false
+        const id = setTimeout(() => {
+            Promise.all([searchTeachers(q, 5), searchLessons({q, limit: 50})])
+                .then(([t, l]) => {
+                    if (cancelled) return
+                    setTeachers(t)
+                    setLessons(l)
+                })
+                .catch(console.error)
+        }, DEBOUNCE_MS)
+        return () => {
+            cancelled = true
+            clearTimeout(id)
+        }
+    }, [query, teacher])
+
+    /* выбран преподаватель — его ближайшие занятия */
+    useEffect(() => {
+        if (teacher === null) return
+        let cancelled = false
+        searchLessons({teacher, limit: 100})
+            .then(l => !cancelled && setLessons(l))
+            .catch(console.error)
+        return () => {
+            cancelled = true
+        }
+    }, [teacher])
+
+    return (
+        <div className="search-wrapper">
+            <input
+                className="search-input"
+                type="search"
+                placeholder="Преподаватель или дисциплина"
+                value={teacher ?? query}
+                onChange={e => {
+                    setTeacher(null)
+                    setQuery(e.target.value)
+                }}
+            />
+
+            {teacher === null && teachers.length > 0 && (
+                <ul className="search-teachers">
+                    {teachers.map(t => (
+                        <li key={t.teacher}>
+                            <button onClick={() => setTeacher(t.teacher)}>
+                                {t.teacher}
+                                <span className="search-meta">
+                                    {t.next_date ? `ближайшее ${formatDate(t.next_date)}` : "нет занятий"}
+                                </span>
+                            </button>
+                        </li>
+                    ))}
+                </ul>
+            )}
+
+            {lessons.length > 0 ? (
+                <table>
+                    <tbody>
+                    {lessons.map((l, i) => (
+                        <tr key={`${l.date}-${l.start}-${i}`}>
+                            <td>{formatDate(l.date)} {l.start}</td>
+                            <td>
+                                {l.subject}
+                                {l.room && <span className="search-meta"> ({l.room})</span>}
+                                {teacher === null && l.teacher && (
+                                    <span className="search-meta"> — {l.teacher}</span>
+                                )}
+                            </td>
+                        </tr>
+                    ))}
+                    </tbody>
+                </table>
+            ) : (
+                (teacher !== null || query.trim().length >= 2) && (
+                    <div className="empty-state">Ничего не найдено</div>
+                )
+            )}
+        </div>
+    )
+}
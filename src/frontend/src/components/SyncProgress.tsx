@@ -0,0 +1,68 @@
+import {useEffect, useState} from "react"
+import {syncJobEventsUrl} from "../api"
+
+const STAGE_TITLES: Record<string, string> = {
+    queued: "в очереди",
+    parse: "получаем расписание из личного кабинета",
+    save: "сохраняем занятия",
+    calendar: "обновляем Google Календарь",
+    finished: "завершено",
+}
+
+const COUNT_TITLES: Record<string, string> = {
+    lessons_parsed: "занятий получено",
+    events_inserted: "событий добавлено",
+    events_updated: "событий обновлено",
+    events_deleted: "событий удалено",
+}
+
+interface SyncEvent {
+    type: string
+    stage?: string
+    status?: string
+    detail?: string
+    counts?: Record<string, number>
+    errors_count?: number
+}
+
+/* ход задачи синхронизации по SSE /api/sync/jobs/{id}/events */
+export default function SyncProgress({jobId}: { jobId: number }) {
+    const [event, setEvent] = useState<SyncEvent | null>(null)
+
+    useEffect(() => {
+        setEvent(null)
+        const es = new EventSource(syncJobEventsUrl(jobId))
+        es.onmessage = e => {
+            const next: SyncEvent = JSON.parse(e.data)
+            setEvent(next)
+            if (next.type === "done") es.close()
+        }
+        es.onerror = () => console.error("sync events: соединение прервано, переподключение")
+        return () => es.close()
+    }, [jobId])
+
+    if (event === null) return <p className="sync-progress">Синхронизация: в очереди…</p>
+
+    const done = event.type === "done"
+    const stage = event.stage ?? "queued"
+    const counts = Object.entries(COUNT_TITLES).filter(([key]) => event.counts?.[key])
+
+    return (
+        <div className={`sync-progress ${done ? event.status : ""}`}>
+            <p>
+                {done
+                    ? `Синхронизация ${event.status === "done" ? "завершена" : "завершилась с ошибкой"}`
+                    : `Синхронизация: ${STAGE_TITLES[stage] ?? stage}…`}
+            </p>
+            {counts.length > 0 && (
+                <ul>
+                    {counts.map(([key, title]) => (
+                        <li key={key}>{title}: {event.counts?.[key]}</li>
+                    ))}
+                </ul>
+            )}
+            {!done && !!event.errors_count && <p>ошибок: {event.errors_count}</p>}
+            {done && event.detail && <p className="sync-detail">{event.detail}</p>}
+        </div>
+    )
+}
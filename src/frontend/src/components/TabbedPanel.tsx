@@ -1,10 +1,13 @@
 import { useState } from "react"
 import LogsPanel from "./LogsPanel"
 import SchedulerStatusPanel from "./SchedulerStatusPanel"
+import RunStatsPanel from "./RunStatsPanel"
+import ProfilesPanel from "./ProfilesPanel"
+import SearchPanel from "./SearchPanel"
 import "../styles/tabs.css"
 
 export default function TabbedPanel() {
-  const [tab, setTab] = useState<"logs" | "schedule">("logs")
+  const [tab, setTab] = useState<"logs" | "schedule" | "stats" | "profiles" | "search">("logs")
 
   return (
     <section className="tab-wrapper">
@@ -21,10 +24,32 @@ export default function TabbedPanel() {
         >
           Расписание
         </button>
+        <button
+          className={`tab-btn ${tab === "stats" ? "active" : ""}`}
+          onClick={() => setTab("stats")}
+        >
+          Этапы
+        </button>
+        <button
+          className={`tab-btn ${tab === "profiles" ? "active" : ""}`}
+          onClick={() => setTab("profiles")}
+        >
+          Профили
+        </button>
+        <button
+          className={`tab-btn ${tab === "search" ? "active" : ""}`}
+          onClick={() => setTab("search")}
+        >
+          Поиск
+        </button>
       </div>
 
       <div className="tab-body">
-        {tab === "logs" ? <LogsPanel /> : <SchedulerStatusPanel />}
+        {tab === "logs" && <LogsPanel />}
+        {tab === "schedule" && <SchedulerStatusPanel />}
+        {tab === "stats" && <RunStatsPanel />}
+        {tab === "profiles" && <ProfilesPanel />}
+        {tab === "search" && <SearchPanel />}
       </div>
     </section>
   )
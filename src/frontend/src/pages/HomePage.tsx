@@ -3,6 +3,7 @@ import Navigation from "../components/Navigation"
 import MobileNavbar from "../components/MobileNavbar"
 import {getHealth, postScheduler, postSync} from "../api"
 import TabbedPanel from "../components/TabbedPanel"
+import SyncProgress from "../components/SyncProgress"
 
 import syncIcon from "../assets/icons/sync.png"
 import playIcon from "../assets/icons/play.png"
@@ -16,6 +17,7 @@ import "../styles/tabs.css"
 export default function HomePage() {
     const [server, setServer] = useState<"ok" | "offline">("offline")
     const [scheduler, setScheduler] = useState<"running" | "stopped">("stopped")
+    const [syncJob, setSyncJob] = useState<number | null>(null)
 
     /* проверяем сервер и статус планировщика */
     useEffect(() => {
@@ -28,7 +30,7 @@ export default function HomePage() {
 
     /* обработчики кликов */
     const handleSync = () =>
-        postSync().then(r => alert(r.details)).catch(console.error)
+        postSync().then(r => setSyncJob(r.job_id)).catch(console.error)
 
     const toggleScheduler = () => {
         const action = scheduler === "running" ? "stop" : "start"
@@ -60,6 +62,7 @@ export default function HomePage() {
                             <img src={syncIcon} alt="" className="icon"/>
                             Синхронизировать сейчас
                         </button>
+                        {syncJob !== null && <SyncProgress jobId={syncJob}/>}
                     </div>
 
                     {/* плитка "планировщик" */}
@@ -1,54 +1,82 @@
 import logging
 import os
-import signal
-import subprocess
+import time
 from datetime import date, datetime, timedelta
 from pathlib import Path
-from signal import SIGTERM
-from threading import Thread
-from typing import Dict, Optional
+from typing import Any, Dict, Literal, Optional
 
+import pytz
 from fastapi import (
     APIRouter,
     Depends,
     FastAPI,
     File,
     Form,
+    Header,
     HTTPException,
+    Request,
     Response,
     UploadFile,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from sqlalchemy import desc, func, text
+from sqlalchemy import (
+    Date,
+    Float,
+    Integer,
+    and_,
+    case,
+    cast,
+    desc,
+    func,
+    select,
+    text,
+    true,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from schedule_vvsu import metrics
 from schedule_vvsu.auth import router as auth_router
 from schedule_vvsu.config import get_settings
-from schedule_vvsu.database import SessionLocal, get_db, init_db, save_lessons_to_db
-from schedule_vvsu.db.models import LogEntry, ParseRun, SchedulerStatus, Setting
-from schedule_vvsu.google_calendar.auth import authenticate_google_calendar
-from schedule_vvsu.google_calendar.calendar import get_or_create_calendar
-from schedule_vvsu.google_calendar.sync import sync_schedule_to_calendar
-from schedule_vvsu.logs.logger_setup import setup_logging
-from schedule_vvsu.parser import parse_schedule
-from schedule_vvsu.scheduler import record_parse_run
-from schedule_vvsu.services.settings_service import (
-    get_calendar_name,
-    get_parsing_intervals,
+from schedule_vvsu.database import AsyncSessionLocal, get_async_db, get_db
+from schedule_vvsu.db.models import (
+    LogEntry,
+    ParseRun,
+    ParseRunDaily,
+    SchedulerStatus,
+    Setting,
+    SyncJob,
+)
+from schedule_vvsu.logs.log_reader import merge_recent, tail_lines
+from schedule_vvsu.logs.log_stream import get_log_broadcaster, log_entry_dict
+from schedule_vvsu.logs.logger_setup import get_db_log_handler, setup_logging
+from schedule_vvsu.services.maintenance import RUN_OK_STATUSES
+from schedule_vvsu.services.pg_listener import get_pg_listener
+from schedule_vvsu.services.profiling import PROFILE_MODES, list_profiles, profile_file
+from schedule_vvsu.services import search
+from schedule_vvsu.services.run_stats import STAGES
+from schedule_vvsu.services.scheduler_service import (
+    get_scheduler_service,
+    scheduler_state,
+    set_scheduler_enabled,
 )
+from schedule_vvsu.services.sync_jobs import enqueue_sync, get_job, get_sync_worker, job_to_dict
+from schedule_vvsu.services.sync_policy import set_policy
+from schedule_vvsu.services.sync_run import job_events
+from schedule_vvsu.services.sync_service import SOURCE_LABELS
 
 settings = get_settings()
 setup_logging()
 logger = logging.getLogger("cli_logger")
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
-SCHEDULER_PID_FILE = BASE_DIR / "scheduler.pid"
-CURRENT_PID = os.getpid()
 LOG_DIR = BASE_DIR / "src" / "schedule_vvsu" / "logs"
 LOG_PATH = LOG_DIR / "sync_log.log"
+MAX_LOG_LINES = 1000
 CREDENTIALS_PATH = BASE_DIR / "src" / "schedule_vvsu" / "json" / "credentials"
 FRONTEND_DIST = BASE_DIR / "src" / "frontend" / "dist"
 
@@ -67,19 +95,59 @@ app.add_middleware(
 api_router = APIRouter()
 
 
+@app.on_event("startup")
+def start_sync_worker():
+    if settings.SYNC_WORKER_ENABLED:
+        get_sync_worker().start()
+    if settings.SCHEDULER_SERVICE_ENABLED:
+        get_scheduler_service().start()
+
+
+@app.on_event("startup")
+async def restore_sync_metrics():
+    """Время последней успешной синхронизации переживает рестарт API."""
+    async with AsyncSessionLocal() as db:
+        last = await db.scalar(
+            select(func.max(ParseRun.timestamp)).where(ParseRun.status.in_(RUN_OK_STATUSES))
+        )
+    if last is not None:
+        local = pytz.timezone(settings.TIMEZONE).localize(last)
+        metrics.SYNC_LAST_SUCCESS.set(local.timestamp())
+
+
+@app.on_event("shutdown")
+async def close_pg_listener():
+    get_sync_worker().stop()
+    # лидерство сразу переходит к другому процессу
+    get_scheduler_service().stop()
+    await get_pg_listener().close()
+    metrics.mark_process_dead(os.getpid())
+
+
+@app.middleware("http")
+async def http_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # шаблон маршрута, а не сырой путь — иначе метки разрастутся
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.HTTP_LATENCY.labels(request.method, route).observe(time.perf_counter() - started)
+        metrics.HTTP_REQUESTS.labels(request.method, route, str(status)).inc()
+
+
 @app.get("/healthz", include_in_schema=False)
 def healthcheck():
     return {"status": "ok"}
 
 
-# Helper
-def _pid_running(pid: int) -> bool:
-    """True, если процесс с данным PID еще жив."""
-    try:
-        os.kill(pid, 0)  # проверка без посылки сигнала
-        return True
-    except OSError:
-        return False
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
 
 
 # Health check
@@ -90,48 +158,59 @@ async def health():
 
 # Проверка базовой настройки
 @api_router.get("/config/status")
-async def config_status():
-    session = SessionLocal()
-    has_username = session.query(Setting).filter_by(key="USERNAME").first()
-    has_password = session.query(Setting).filter_by(key="PASSWORD").first()
-    session.close()
-    return {"configured": bool(has_username and has_password)}
+async def config_status(db: AsyncSession = Depends(get_async_db)):
+    keys = set(
+        await db.scalars(
+            select(Setting.key).where(Setting.key.in_(("USERNAME", "PASSWORD")))
+        )
+    )
+    return {"configured": {"USERNAME", "PASSWORD"} <= keys}
 
 
 # Получение логов из БД
 @api_router.get("/logs/sql")
-async def get_sql_logs(after_id: int = 0):
-    session = SessionLocal()
-    try:
-        entries = (
-            session.query(LogEntry)
-            .filter(LogEntry.id > after_id)
-            .order_by(LogEntry.id)
-            .limit(100)
-            .all()
-        )
-        return [
-            {
-                "id": e.id,
-                "ts": e.timestamp.isoformat(),
-                "level": e.level,
-                "msg": e.message,
-            }
-            for e in entries
-        ]
-    finally:
-        session.close()
+async def get_sql_logs(
+    after_id: int = 0, trace_id: Optional[str] = None, db: AsyncSession = Depends(get_async_db)
+):
+    query = select(LogEntry).where(LogEntry.id > after_id)
+    if trace_id:
+        query = query.where(LogEntry.trace_id == trace_id.lower())
+    entries = await db.scalars(query.order_by(LogEntry.id).limit(100))
+    return [log_entry_dict(e) for e in entries]
+
+
+# Живая лента логов (SSE)
+@api_router.get("/logs/stream")
+async def stream_logs(
+    after_id: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Новые записи logs по мере записи. Без курсора сначала отдаются
+    последние 100 строк; при переподключении браузер сам шлет
+    Last-Event-ID, и стрим догоняет пропущенное.
+    """
+    if last_event_id and last_event_id.isdigit():
+        after_id = int(last_event_id)
+    return StreamingResponse(
+        get_log_broadcaster().events(after_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Статистика записи логов в БД
+@api_router.get("/logs/stats")
+def get_log_stats():
+    handler = get_db_log_handler()
+    return handler.stats() if handler else {}
 
 
 # Получение настроек
 @api_router.get("/account")
-async def get_account():
-    session = SessionLocal()
-    try:
-        settings = session.query(Setting).all()
-        return {s.key: s.value for s in settings}
-    finally:
-        session.close()
+async def get_account(db: AsyncSession = Depends(get_async_db)):
+    settings = await db.scalars(select(Setting))
+    return {s.key: s.value for s in settings}
 
 
 # Обновление / установка настроек
@@ -143,29 +222,31 @@ async def update_account(
     parsing_intervals: str = Form(...),
     calendar_name: str = Form(...),
     file: UploadFile = File(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    session = SessionLocal()
-
-    def upsert(key, value):
-        setting = session.query(Setting).filter_by(key=key).first()
-        if setting:
-            setting.value = value
+    values = {
+        "USERNAME": username,
+        "PASSWORD": password,
+        "USER_MAIL_ACCOUNT": user_mail_account,
+        "PARSING_INTERVALS": parsing_intervals,
+        "CALENDAR_NAME": calendar_name,
+    }
+    existing = {
+        s.key: s
+        for s in await db.scalars(select(Setting).where(Setting.key.in_(values)))
+    }
+    for key, value in values.items():
+        if key in existing:
+            existing[key].value = value
         else:
-            session.add(Setting(key=key, value=value))
-
-    upsert("USERNAME", username)
-    upsert("PASSWORD", password)
-    upsert("USER_MAIL_ACCOUNT", user_mail_account)
-    upsert("PARSING_INTERVALS", parsing_intervals)
-    upsert("CALENDAR_NAME", calendar_name)
+            db.add(Setting(key=key, value=value))
 
     if file:
         CREDENTIALS_PATH.mkdir(parents=True, exist_ok=True)
         with open(CREDENTIALS_PATH / "service_account.json", "wb") as f:
             f.write(await file.read())
 
-    session.commit()
-    session.close()
+    await db.commit()
     return {"ok": True}
 
 
@@ -178,233 +259,395 @@ async def setup(
     parsing_intervals: str = Form(...),
     calendar_name: str = Form(...),
     file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
 ):
     return await update_account(
-        username, password, user_mail_account, parsing_intervals, calendar_name, file
+        username, password, user_mail_account, parsing_intervals, calendar_name, file, db
     )
 
 
 @api_router.post("/sync")
-async def sync_now():
-    def run_sync():
-        logger.info("Ручной запуск синхронизации через API.")
-        record_parse_run("started", "ручной запуск синхронизации")
-
-        try:
-            # Создаем сессию базы данных вручную
-            from schedule_vvsu.database import SessionLocal
-
-            with SessionLocal() as db:
-                # парсим расписание
-                init_db()
-                schedule = parse_schedule()
-
-                if not schedule:
-                    msg = "Не удалось получить расписание."
-                    logger.warning(msg)
-                    record_parse_run("error", msg)
-                    return
-
-                # сохраняем в БД и Google Calendar
-                save_lessons_to_db(schedule)
-                service = authenticate_google_calendar()
-                calendar_id = get_or_create_calendar(
-                    service, get_calendar_name(db), db
-                )  # Передаем db
-                sync_schedule_to_calendar(service, schedule, calendar_id)
-
-                # финальная запись об успехе
-                ok_msg = f"синхронизировано {len(schedule)} занятий"
-                logger.info(ok_msg)
-                record_parse_run("success", ok_msg)
-
-        except Exception as e:
-            err_msg = f"Ошибка во время синхронизации: {e}"
-            logger.exception(err_msg)
-            record_parse_run("error", err_msg[:250])  # ограничиваем длину деталей
-
-    # запускаем синхронизацию в отдельном потоке,
-    # чтобы не блокировать ответ API
-    Thread(target=run_sync, daemon=True).start()
-    return {"synced": "started", "details": "Синхронизация выполняется в фоне"}
-
-
-# Запуск планировщика
-@api_router.post("/scheduler/start")
-async def start_scheduler():
-    if SCHEDULER_PID_FILE.exists():
-        pid = int(SCHEDULER_PID_FILE.read_text())
-
-        # битый PID указывает на текущий uvicorn-процесс
-        if pid == CURRENT_PID:
-            logger.warning("Старый PID-файл с PID текущего сервера — удаляю.")
-            SCHEDULER_PID_FILE.unlink(missing_ok=True)
-        elif _pid_running(pid):
-            logger.info("Попытка повторного запуска — планировщик уже работает.")
-            return {"scheduler": "already running", "pid": pid}
-        else:
-            # зомби PID
-            SCHEDULER_PID_FILE.unlink(missing_ok=True)
+def sync_now(source: str = "api", profile: Optional[str] = None):
+    """
+    Ставит синхронизацию в очередь и сразу возвращает id задачи.
+    Если задача уже в очереди или выполняется, запрос сливается с ней.
+    profile — профилировать прогон (sample / cprofile / full / memory).
+    """
+    if source not in SOURCE_LABELS:
+        source = "api"
+    if profile is not None and profile not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"profile: одно из {', '.join(PROFILE_MODES)}")
+    job_id, merged = enqueue_sync(source, profile=profile)
+    return {
+        "synced": "started",
+        "job_id": job_id,
+        "merged": merged,
+        "details": (
+            "Синхронизация уже выполняется, запрос объединен с ней"
+            if merged
+            else "Синхронизация выполняется в фоне"
+        ),
+    }
+
 
-    proc = subprocess.Popen(
-        ["python", "-m", "schedule_vvsu.scheduler"],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.STDOUT,
+@api_router.get("/profiles")
+def get_profiles():
+    """Сохраненные профили прогонов, новые первыми."""
+    return {"profiles": list_profiles()}
+
+
+@api_router.get("/profiles/{name}")
+def download_profile(name: str):
+    path = profile_file(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Профиль не найден")
+    media_type = "application/json" if path.suffix == ".json" else "application/octet-stream"
+    if path.suffix == ".folded":
+        media_type = "text/plain; charset=utf-8"
+    return FileResponse(path, media_type=media_type, filename=path.name)
+
+
+@api_router.get("/sync/jobs/{job_id}")
+def sync_job_status(job_id: int):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return job_to_dict(job)
+
+
+@api_router.get("/sync/jobs/{job_id}/events")
+async def sync_job_events(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    SSE: снимок прогресса задачи, затем события по мере выполнения
+    (stage, progress, error) и финальное done.
+    """
+    if await db.get(SyncJob, job_id) is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return StreamingResponse(
+        job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    SCHEDULER_PID_FILE.write_text(str(proc.pid))
-    logger.info(f"Планировщик запущен, PID={proc.pid}")
-    return {"scheduler": "started", "pid": proc.pid}
+
+
+# Запуск планировщика: состояние общее для всех процессов (settings)
+@api_router.post("/scheduler/start")
+def start_scheduler():
+    if scheduler_state()["enabled"]:
+        logger.info("Попытка повторного запуска — планировщик уже включен.")
+        return {"scheduler": "already running"}
+    set_scheduler_enabled(True)
+    logger.info("Планировщик включен.")
+    return {"scheduler": "started"}
 
 
 # Остановка планировщика
 @api_router.post("/scheduler/stop")
-async def stop_scheduler():
-    if not SCHEDULER_PID_FILE.exists():
+def stop_scheduler():
+    if not scheduler_state()["enabled"]:
         return {"scheduler": "already stopped"}
-
-    pid = int(SCHEDULER_PID_FILE.read_text())
-
-    # если PID указывает на uvicorn — не убиваем сервер
-    if pid == CURRENT_PID:
-        logger.warning("PID-файл указывает на API-процесс — просто очищаю файл.")
-        SCHEDULER_PID_FILE.unlink(missing_ok=True)
-        return {"scheduler": "stopped (stale pid removed)"}
-
-    try:
-        if _pid_running(pid):
-            os.kill(pid, signal.SIGTERM)
-            logger.info(f"SIGTERM отправлен, PID={pid}")
-        else:
-            logger.warning("Процесс планировщика уже не существует.")
-    finally:
-        SCHEDULER_PID_FILE.unlink(missing_ok=True)
-
+    set_scheduler_enabled(False)
+    logger.info("Планировщик выключен.")
     return {"scheduler": "stopped"}
 
 
 # Логи синхронизации
 @api_router.get("/logs/sync")
-async def get_sync_logs():
+def get_sync_logs(limit: int = 50, before: Optional[int] = None):
+    """Последние строки sync_log.log, новые первыми; before — курсор из next_before."""
     if not LOG_PATH.exists():
         return JSONResponse(status_code=404, content={"error": "Log file not found"})
 
-    with open(LOG_PATH, "r", encoding="utf-8") as f:
-        lines = f.readlines()[-50:]
-    return {"logs": lines[::-1]}
+    lines, next_before = tail_lines(LOG_PATH, max(1, min(limit, MAX_LOG_LINES)), before)
+    return {"logs": lines, "next_before": next_before}
 
 
 # Общие логи
 @api_router.get("/logs/combined")
-async def get_combined_logs():
-    log_files = list(LOG_DIR.glob("*.log"))
-    all_lines = []
+def get_combined_logs(limit: int = 100, before: Optional[str] = None):
+    """Свежие строки всех логов (включая ротированные) одной лентой, новые первыми."""
+    log_files = [
+        path for path in LOG_DIR.glob("*.log*")
+        if path.is_file() and (path.suffix == ".log" or ".log." in path.name)
+    ]
+    lines, next_before = merge_recent(
+        log_files, max(1, min(limit, MAX_LOG_LINES)), before
+    )
+    return {"logs": lines, "next_before": next_before}
 
-    for path in log_files:
-        if path.exists():
-            with open(path, "r", encoding="utf-8") as f:
-                all_lines.extend(line.strip() for line in f)
 
-    def extract_timestamp(line):
-        try:
-            return line.split(" ", 2)[0] + " " + line.split(" ", 2)[1]
-        except IndexError:
-            return "0000-00-00 00:00:00"
+@api_router.get("/scheduler/status")
+def scheduler_status():
+    """running — планировщик включен и у него есть лидер (процесс API или schedule-sync)."""
+    return scheduler_state()
 
-    sorted_lines = sorted(all_lines, key=extract_timestamp, reverse=True)
-    return {"logs": sorted_lines[:100]}
 
+class SchedulerPolicyPatch(BaseModel):
+    mode: Optional[str] = None  # fixed / adaptive
+    override_minutes: Optional[int] = None  # ручной интервал
+    override_until: Optional[datetime] = None  # до какого времени (TIMEZONE)
+    clear_override: bool = False
 
-@api_router.get("/scheduler/status")
-async def scheduler_status():
-    if SCHEDULER_PID_FILE.exists():
-        pid = int(SCHEDULER_PID_FILE.read_text())
-        return {
-            "status": "running"
-            if _pid_running(pid) and pid != CURRENT_PID
-            else "stopped",
-            "pid": pid,
-        }
-    return {"status": "stopped"}
+
+@api_router.post("/scheduler/policy")
+def update_scheduler_policy(patch: SchedulerPolicyPatch):
+    """Режим запусков (по PARSING_INTERVALS или адаптивный) и ручной интервал."""
+    try:
+        set_policy(patch.mode, patch.override_minutes, patch.override_until, patch.clear_override)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Режим планировщика изменен: {patch.dict(exclude_none=True)}")
+    return scheduler_state()
+
+
+# Кэш таймлайна: валиден, пока не записан новый ParseRun (и не сменились сутки)
+_timeline_cache: Dict[str, object] = {"version": None, "by_days": {}}
+
+
+def _timeline_query(today: date, days: int):
+    """
+    Один запрос на весь период: generate_series по дням LEFT JOIN
+    агрегаты parse_runs по локальной дате плюс дневные сводки
+    parse_run_daily для дней, сырые записи которых уже свернуты.
+    """
+    start = today - timedelta(days=days - 1)
+    run_day = cast(func.date_trunc("day", ParseRun.timestamp), Date)
+    raw = (
+        select(
+            run_day.label("day"),
+            func.count().filter(ParseRun.status.in_(RUN_OK_STATUSES)).label("ok"),
+            func.count().filter(ParseRun.status == "error").label("err"),
+        )
+        .where(ParseRun.timestamp >= cast(start, Date))
+        .group_by(run_day)
+    )
+    rolled = select(ParseRunDaily.day, ParseRunDaily.ok, ParseRunDaily.err).where(
+        ParseRunDaily.day >= start
+    )
+    both = union_all(raw, rolled).subquery()
+    runs = (
+        select(
+            both.c.day,
+            func.sum(both.c.ok).label("ok"),
+            func.sum(both.c.err).label("err"),
+        )
+        .group_by(both.c.day)
+        .subquery()
+    )
+    series = select(
+        cast(
+            func.generate_series(cast(start, Date), cast(today, Date), text("interval '1 day'")),
+            Date,
+        ).label("day")
+    ).subquery()
+    status = case(
+        (runs.c.day.is_(None), "none"),
+        (and_(runs.c.ok > 0, runs.c.err == 0), "ok"),
+        (runs.c.ok > 0, "warn"),
+        else_="error",
+    )
+    return (
+        select(series.c.day, status)
+        .select_from(series.outerjoin(runs, runs.c.day == series.c.day))
+        .order_by(series.c.day)
+    )
 
 
 @api_router.get("/scheduler/timeline")
-async def scheduler_timeline(days: int = 30):
+async def scheduler_timeline(
+    request: Request, days: int = 30, db: AsyncSession = Depends(get_async_db)
+):
     """Возвращает массив за N дней: [{date, status, message?}]"""
-    session = SessionLocal()
-    try:
-        today = date.today()
+    days = max(1, min(days, 3660))
+    today = datetime.now(pytz.timezone(settings.TIMEZONE)).date()
+
+    last_run_id = await db.scalar(select(func.max(ParseRun.id))) or 0
+    version = (today, last_run_id)
+    etag = f'W/"timeline-{days}-{today.isoformat()}-{last_run_id}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    if _timeline_cache["version"] != version:
+        _timeline_cache["version"] = version
+        _timeline_cache["by_days"] = {}
+    result = _timeline_cache["by_days"].get(days)
+
+    if result is None:
         result = []
+        for day, status in await db.execute(_timeline_query(today, days)):
+            if status == "none":
+                result.append(
+                    {"date": day.isoformat(), "status": "error", "message": "нет запусков"}
+                )
+            else:
+                result.append({"date": day.isoformat(), "status": status})
+        _timeline_cache["by_days"][days] = result
 
-        for shift in range(days):
-            d0 = today - timedelta(days=shift)
-            d1 = d0 + timedelta(days=1)
+    return JSONResponse(content=result, headers=headers)
 
-            rows = (
-                session.query(ParseRun.status, func.count())
-                .filter(ParseRun.timestamp >= d0, ParseRun.timestamp < d1)
-                .group_by(ParseRun.status)
-                .all()
-            )
 
-            if not rows:
-                result.append(
-                    {
-                        "date": d0.isoformat(),
-                        "status": "error",
-                        "message": "нет запусков",
-                    }
-                )
-                continue
+@api_router.get("/scheduler/overview")
+async def scheduler_overview(db: AsyncSession = Depends(get_async_db)):
+    # статус планировщика
+    st_entry = await db.scalar(
+        select(SchedulerStatus).order_by(desc(SchedulerStatus.updated_at)).limit(1)
+    )
+    status = st_entry.status if st_entry else "stopped"
 
-            has_err = any(s in ("error",) for s, _ in rows)
-            has_ok = any(s in ("success", "done") for s, _ in rows)
+    # интервалы из настроек
+    interval_str = await db.scalar(
+        select(Setting.value).where(Setting.key == "PARSING_INTERVALS")
+    )
+    intervals = [t.strip() for t in (interval_str or "9:00").split(",") if t.strip()]
 
-            status = (
-                "ok"
-                if has_ok and not has_err
-                else "warn"
-                if has_ok and has_err
-                else "error"
-            )
+    # последние прогоны
+    runs_q = await db.scalars(
+        select(ParseRun).order_by(desc(ParseRun.timestamp)).limit(20)
+    )
+    runs = [{"time": r.time_str, "status": r.status, "detail": r.detail} for r in runs_q]
 
-            result.append({"date": d0.isoformat(), "status": status})
+    return {"status": status, "intervals": intervals, "runs": runs}
 
-        return list(reversed(result))
-    finally:
-        session.close()
 
+def _p50_p95(value):
+    return (
+        func.percentile_cont(0.5).within_group(value),
+        func.percentile_cont(0.95).within_group(value),
+    )
 
-@api_router.get("/scheduler/overview")
-async def scheduler_overview():
-    session = SessionLocal()
-    try:
-        # статус планировщика
-        st_entry = (
-            session.query(SchedulerStatus)
-            .order_by(desc(SchedulerStatus.updated_at))
-            .first()
-        )
-        status = st_entry.status if st_entry else "stopped"
 
-        # интервалы из настроек
-        intervals = [t.strip() for t in get_parsing_intervals().split(",") if t.strip()]
+def _ms(value) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
 
-        # последние прогоны
-        runs_q = (
-            session.query(ParseRun).order_by(desc(ParseRun.timestamp)).limit(20).all()
+@api_router.get("/runs/stats")
+async def run_stats_summary(
+    days: int = 7, status: Optional[str] = None, db: AsyncSession = Depends(get_async_db)
+):
+    """p50/p95 длительностей этапов и сводка счетчиков по прогонам за N дней."""
+    days = max(1, min(days, 365))
+    # timestamp в parse_runs — локальное время без tz
+    since = datetime.now(pytz.timezone(settings.TIMEZONE)).replace(tzinfo=None) - timedelta(days=days)
+    where = [ParseRun.timestamp >= since, ParseRun.stats.isnot(None)]
+    if status:
+        where.append(ParseRun.status == status)
+
+    p50, p95 = _p50_p95(ParseRun.duration_ms)
+    runs, errors, total_p50, total_p95 = (
+        await db.execute(
+            select(func.count(), func.count().filter(ParseRun.status == "error"), p50, p95).where(
+                *where
+            )
         )
-        runs = [
-            {"time": r.time_str, "status": r.status, "detail": r.detail} for r in runs_q
-        ]
+    ).one()
 
-        return {"status": status, "intervals": intervals, "runs": runs}
-    finally:
-        session.close()
+    stage = (
+        func.jsonb_each_text(ParseRun.stats["stages"])
+        .table_valued("key", "value")
+        .render_derived(name="stage")
+    )
+    ms = cast(stage.c.value, Float)
+    p50, p95 = _p50_p95(ms)
+    stage_rows = await db.execute(
+        select(stage.c.key, func.count(), p50, p95, func.max(ms))
+        .select_from(ParseRun)
+        .join(stage, true())
+        .where(*where)
+        .group_by(stage.c.key)
+    )
+    order = {name: i for i, name in enumerate(STAGES)}
+    stages = sorted(
+        (
+            {"stage": key, "runs": n, "p50_ms": _ms(a), "p95_ms": _ms(b), "max_ms": _ms(m)}
+            for key, n, a, b, m in stage_rows
+        ),
+        key=lambda row: (order.get(row["stage"], len(order)), row["stage"]),
+    )
+
+    counter = (
+        func.jsonb_each_text(ParseRun.stats["counters"])
+        .table_valued("key", "value")
+        .render_derived(name="counter")
+    )
+    value = cast(counter.c.value, Integer)
+    counter_rows = await db.execute(
+        select(counter.c.key, func.sum(value), func.avg(value), func.max(value))
+        .select_from(ParseRun)
+        .join(counter, true())
+        .where(*where)
+        .group_by(counter.c.key)
+        .order_by(counter.c.key)
+    )
+    counters = {
+        key: {"total": int(total), "avg": round(float(avg), 2), "max": int(peak)}
+        for key, total, avg, peak in counter_rows
+    }
+
+    return {
+        "days": days,
+        "runs": runs,
+        "errors": errors,
+        "duration_ms": {"p50": _ms(total_p50), "p95": _ms(total_p95)},
+        "stages": stages,
+        "counters": counters,
+    }
+
+
+async def _search_version(request: Request, db: AsyncSession):
+    """Версия снимка расписания и заголовки; None вместо версии — 304."""
+    today = datetime.now(pytz.timezone(settings.TIMEZONE)).date()
+    version = await search.snapshot_version(db, today)
+    etag = f'W/"search-{today.isoformat()}-{version[1]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return None, headers
+    return version, headers
+
+
+@api_router.get("/search/teachers")
+async def search_teachers(
+    request: Request, q: str = "", limit: int = 10, db: AsyncSession = Depends(get_async_db)
+):
+    """Преподаватели по части ФИО или с опечаткой: [{teacher, score, upcoming, next_date}]"""
+    version, headers = await _search_version(request, db)
+    if version is None:
+        return Response(status_code=304, headers=headers)
+    result = await search.search_teachers(db, version, q, max(1, min(limit, 50)))
+    return JSONResponse(content=result, headers=headers)
+
+
+@api_router.get("/search/lessons")
+async def search_lessons(
+    request: Request,
+    q: str = "",
+    teacher: str = "",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Занятия по подстроке дисциплины или ФИО (q) и/или точному ФИО
+    (teacher); по умолчанию — начиная с сегодняшнего дня.
+    """
+    if len(q.strip()) < search.MIN_QUERY and not teacher.strip():
+        raise HTTPException(status_code=400, detail="Укажите q (от 2 символов) или teacher")
+    version, headers = await _search_version(request, db)
+    if version is None:
+        return Response(status_code=304, headers=headers)
+    result = await search.search_lessons(
+        db, version, q, teacher, date_from or version[0], date_to, max(1, min(limit, 500))
+    )
+    return JSONResponse(content=result, headers=headers)
 
 
 class BotConfigPatch(BaseModel):
     bot_token: Optional[str] = None  # может быть пустым -> бот выключится
     admin_ids: Optional[str] = None  # CSV или JSON-строка
+    bot_mode: Optional[Literal["polling", "webhook"]] = None
+    # внешний адрес стека для setWebhook, например https://schedule.example.ru
+    bot_webhook_url: Optional[str] = None
 
 
 def _get_setting(db: Session, key: str, default: Optional[str] = None) -> Optional[str]:
@@ -413,11 +656,17 @@ def _get_setting(db: Session, key: str, default: Optional[str] = None) -> Option
 
 
 @bot_router.get("/config")
-def bot_config(db: Session = Depends(get_db)) -> Dict[str, str]:
-    """Текущие настройки бота (без авторизации — контейнеры в одной сети)."""
+def bot_config(db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """
+    Текущие настройки бота (без авторизации — контейнеры в одной сети).
+    Бот перечитывает их целиком по NOTIFY bot_config.
+    """
     return {
+        "bot_enabled": _get_setting(db, "BOT_ENABLED", "false") == "true",
         "bot_token": _get_setting(db, "BOT_TOKEN") or "",
         "admin_ids": _get_setting(db, "ADMIN_IDS") or "",
+        "bot_mode": _get_setting(db, "BOT_MODE") or "polling",
+        "bot_webhook_url": _get_setting(db, "BOT_WEBHOOK_URL") or "",
     }
 
 
@@ -425,15 +674,15 @@ def bot_config(db: Session = Depends(get_db)) -> Dict[str, str]:
 def update_bot_config(
     patch: BotConfigPatch, db: Session = Depends(get_db)
 ) -> Dict[str, bool]:
-    """Обновить BOT_TOKEN / ADMIN_IDS без перезапуска контейнера."""
+    """Обновить BOT_TOKEN / ADMIN_IDS / режим приема обновлений без перезапуска контейнера."""
     for field, value in patch.dict(exclude_none=True).items():
         rec = db.query(Setting).filter_by(key=field.upper()).first()
         if rec:
             rec.value = value or ""
         else:
             db.add(Setting(key=field.upper(), value=value or ""))
+    # NOTIFY bot_config отправит _notify_bot (db/models.py), один на коммит
     db.commit()
-    db.execute(text("NOTIFY bot_config, 'reload';"))
     return {"ok": True}
 
 
@@ -475,7 +724,6 @@ def update_bot_settings(settings: BotSettings, db: Session = Depends(get_db)):
         _upsert_setting(db, "EXTRA_SETTING_2", settings.extra_setting_2)
 
     db.commit()
-    db.execute(text("NOTIFY bot_config, 'reload';"))
     return {"status": "ok"}
 
 
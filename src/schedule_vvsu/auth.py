@@ -40,7 +40,7 @@ def _make_jwt(uid: int) -> str:
     return jwt.encode(payload, SECRET, "HS256")
 
 
-async def current_admin(
+def current_admin(
         token: Annotated[str, Depends(bearer)],
         session=Depends(get_session),
 ) -> Admin:
@@ -91,7 +91,7 @@ def needs_init(session=Depends(get_session)) -> bool:
     return session.scalar(select(func.count(Admin.id))) == 0
 
 
-async def optional_admin(
+def optional_admin(
         token: Annotated[Optional[str], Depends(bearer)],
         session=Depends(get_session),
 ) -> Optional[Admin]:
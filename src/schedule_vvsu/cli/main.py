@@ -1,18 +1,28 @@
 import typer
 import logging
 import subprocess
+import sys
 from datetime import datetime
 from typing import Optional
 
-from apscheduler.schedulers.blocking import BlockingScheduler
-
 from schedule_vvsu.config import get_settings
 from schedule_vvsu.google_calendar.auth import authenticate_google_calendar
-from schedule_vvsu.google_calendar.calendar import list_calendars, remove_calendar, get_or_create_calendar
-from schedule_vvsu.google_calendar.sync import sync_schedule_to_calendar
-from schedule_vvsu.parser import parse_schedule
-from schedule_vvsu.database import init_db, save_lessons_to_db, Base, engine
+from schedule_vvsu.google_calendar.calendar import list_calendars, remove_calendar
+from schedule_vvsu.database import Base, engine
 from schedule_vvsu.logs.logger_setup import setup_logging
+from schedule_vvsu.scheduler import main as run_scheduler
+from schedule_vvsu.services.maintenance import run_maintenance
+from schedule_vvsu.services.leases import LEASE_MODES
+from schedule_vvsu.services.profiling import PROFILE_MODES
+from schedule_vvsu.services.scheduler_service import scheduler_state, set_scheduler_enabled
+from schedule_vvsu.services.sync_policy import POLICY_MODES, set_policy
+from schedule_vvsu.services.sync_jobs import (
+    enqueue_sync,
+    get_active_job,
+    get_sync_worker,
+    wait_for_job,
+)
+from schedule_vvsu.services.sync_service import sync_lease
 
 # Инициализация настроек
 settings = get_settings()
@@ -27,10 +37,6 @@ logger = logging.getLogger("cli_logger")
 # Typer-приложение
 app = typer.Typer()
 
-# PID процесса планировщика
-scheduler_process: Optional[subprocess.Popen] = None
-
-
 @app.command()
 def list_all():
     """
@@ -66,55 +72,113 @@ def rm(calendar_id: str):
 @app.command()
 def start_scheduler():
     """
-    Запускает планировщик в отдельном процессе.
+    Включает планировщик (выполняет его процесс-лидер: API или schedule-sync).
     """
-    logger.info("Планировщик запустился")
-    global scheduler_process
-    if scheduler_process and scheduler_process.poll() is None:
-        typer.echo("Планировщик уже запущен.")
+    if scheduler_state()["enabled"]:
+        typer.echo("Планировщик уже включен.")
         return
-
-    cmd = ["python", "-m", "schedule_vvsu.scheduler"]
-    scheduler_process = subprocess.Popen(cmd)
-    typer.echo(f"Планировщик запущен, PID={scheduler_process.pid}")
-    logger.info(f"Планировщик запущен, PID={scheduler_process.pid}")
+    set_scheduler_enabled(True)
+    typer.echo("Планировщик включен.")
+    logger.info("Планировщик включен из CLI")
 
 
 @app.command()
 def stop_scheduler():
     """
-    Останавливает планировщик (если запущен).
+    Выключает планировщик во всех процессах.
     """
-    logger.info("Планировщик был остановлен")
-    global scheduler_process
-    if not scheduler_process or scheduler_process.poll() is not None:
+    if not scheduler_state()["enabled"]:
         typer.echo("Планировщик уже остановлен.")
         return
-
-    # Посылаем сигнал SIGTERM
-    scheduler_process.terminate()
-    scheduler_process.wait()
+    set_scheduler_enabled(False)
     typer.echo("Планировщик остановлен.")
-    logger.info("Планировщик остановлен")
+    logger.info("Планировщик выключен из CLI")
 
 
 @app.command()
-def sync_now():
+def scheduler_status():
     """
-    Синхронизирует расписание с Google Календарем немедленно.
+    Показывает, включен ли планировщик, кто лидер и время запусков.
     """
-    logger.info("Запуск немедленной синхронизации расписания.")
-    init_db()
-    schedule = parse_schedule()
-    if not schedule:
-        logger.error("Не удалось получить расписание с Google календаря.")
-        return
+    state = scheduler_state()
+    typer.echo(f"Статус: {state['status']} (включен: {'да' if state['enabled'] else 'нет'})")
+    if state["leader"]:
+        typer.echo(f"Лидер: {state['leader']} с {state['since']}")
+    if state["mode"] == "adaptive":
+        policy = state["policy"] or {}
+        typer.echo(f"Запуски: адаптивно, интервал {policy.get('interval', '-')} мин")
+        if state["override"]:
+            until = f" до {state['override_until']}" if state["override_until"] else ""
+            typer.echo(f"Ручной интервал: {state['override']} мин{until}")
+        if policy:
+            typer.echo(f"Следующий запуск: {policy['next_run']} ({policy['reason']})")
+    else:
+        typer.echo(f"Запуски: {', '.join(state['intervals'])}")
 
-    save_lessons_to_db(schedule)
 
-    service = authenticate_google_calendar()
-    calendar_id = get_or_create_calendar(service, settings.CALENDAR_NAME)
-    sync_schedule_to_calendar(service, schedule, calendar_id)
+@app.command()
+def scheduler_policy(
+    mode: Optional[str] = typer.Option(
+        None, help="fixed — по PARSING_INTERVALS, adaptive — по числу изменений в расписании"
+    ),
+    override: Optional[int] = typer.Option(
+        None, help="Ручной интервал между запусками, мин (адаптивный режим)"
+    ),
+    until: Optional[datetime] = typer.Option(
+        None,
+        formats=["%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%d"],
+        help="До какого времени действует ручной интервал (по TIMEZONE)",
+    ),
+    clear_override: bool = typer.Option(False, "--clear-override", help="Снять ручной интервал"),
+):
+    """
+    Меняет режим запусков планировщика и ручной интервал.
+    """
+    if mode is not None and mode not in POLICY_MODES:
+        raise typer.BadParameter(f"mode: одно из {', '.join(POLICY_MODES)}")
+    try:
+        set_policy(mode, override, until, clear_override)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    logger.info(f"Режим планировщика изменен из CLI: mode={mode}, override={override}, until={until}")
+    scheduler_status()
+
+
+@app.command()
+def sync_now(
+    mode: str = typer.Option(
+        "piggyback",
+        help="Если синхронизация уже идет: piggyback — дождаться ее результата, "
+        "wait — дождаться и запустить новую, skip — ничего не делать",
+    ),
+    profile: Optional[str] = typer.Option(
+        None,
+        help="Профилировать прогон: sample, cprofile, full или memory "
+        "(профили пишутся в PROFILE_DIR)",
+    ),
+):
+    """
+    Синхронизирует расписание с Google Календарем немедленно.
+    """
+    logger.info(f"Запуск немедленной синхронизации расписания (mode={mode}).")
+    if mode not in LEASE_MODES:
+        raise typer.BadParameter(f"mode: одно из {', '.join(LEASE_MODES)}")
+    if profile is not None and profile not in PROFILE_MODES:
+        raise typer.BadParameter(f"profile: одно из {', '.join(PROFILE_MODES)}")
+
+    active = get_active_job()
+    if active is not None or sync_lease.is_held():
+        if mode == "skip":
+            typer.echo("Синхронизация уже выполняется, пропускаем.")
+            return
+        if mode == "wait" and active is not None:
+            typer.echo(f"Ждем завершения текущей синхронизации (задача #{active.id}).")
+            wait_for_job(active.id)
+
+    job = _run_sync_job("cli", profile=profile)
+    if job is None or job.status != "done":
+        typer.echo(f"Синхронизация не выполнена: {job.detail if job else 'задача не найдена'}")
+        raise typer.Exit(code=1)
     logger.info("Синхронизация завершена успешно.")
     typer.echo("Синхронизация завершена.")
 
@@ -129,33 +193,35 @@ def migrate():
     logger.info("Миграции применены.")
 
 
-def job():
-    logger.info(f"[{datetime.now()}] Запуск задачи синхронизации.")
-    init_db()
-    schedule = parse_schedule()
-    if schedule:
-        save_lessons_to_db(schedule)
-        service = authenticate_google_calendar()
-        calendar_id = get_or_create_calendar(service, settings.CALENDAR_NAME)
-        sync_schedule_to_calendar(service, schedule, calendar_id)
-        logger.info(f"[{datetime.now()}] Задача синхронизации завершена.")
-    else:
-        logging.warning("Не удалось получить расписание.")
+@app.command()
+def maintenance(
+    vacuum: bool = typer.Option(False, "--vacuum", help="После чистки выполнить VACUUM ANALYZE"),
+):
+    """
+    Удаляет записи старше сроков хранения и сворачивает старые parse_runs.
+    """
+    logger.info("Команда maintenance()")
+    result = run_maintenance(vacuum=vacuum)
+    for table, count in result.items():
+        typer.echo(f"{table}: удалено {count}")
 
 
-def main():
-    init_db()
-    Base.metadata.create_all(bind=engine)
+def _run_sync_job(source: str, profile: Optional[str] = None):
+    """
+    Ставит задачу в очередь и выполняет ее здесь же; если задачу уже
+    взял другой воркер (API, планировщик), дожидается его результата.
+    """
+    job_id, merged = enqueue_sync(source, profile=profile)
+    if merged:
+        typer.echo(f"Синхронизация уже идет (задача #{job_id}), ждем ее завершения.")
+    get_sync_worker().run_pending()
+    return wait_for_job(job_id)
 
-    scheduler = BlockingScheduler()
-    intervals = settings.PARSING_INTERVALS.split(",")
-    for interval in intervals:
-        hour, minute = map(int, interval.strip().split(":"))
-        scheduler.add_job(job, 'cron', hour=hour, minute=minute)
-        logger.info(f"Задача добавлена на запуск в {hour:02d}:{minute:02d}.")
 
-    logger.info("Планировщик запущен и ожидает задач.")
-    try:
-        scheduler.start()
-    except (KeyboardInterrupt, SystemExit):
-        logger.info("Планировщик остановлен.")
+def main():
+    # vvsu-cli <команда> — выполнить команду, без аргументов — запустить планировщик
+    if len(sys.argv) > 1:
+        app()
+        return
+
+    run_scheduler()
@@ -44,6 +44,80 @@ class Settings(BaseSettings):
     USE_REMOTE_CHROME: bool = Field(False, env="USE_REMOTE_CHROME")
     SELENIUM_REMOTE_URL: str = Field("http://firefox:4444/wd/hub", env="SELENIUM_REMOTE_URL")
 
+    # Запись логов в БД: размер пачки, период сброса (сек), длина очереди
+    # и политика переполнения (drop_new / drop_old / block)
+    LOG_DB_BATCH_SIZE: int = Field(200, env="LOG_DB_BATCH_SIZE")
+    LOG_DB_FLUSH_INTERVAL: float = Field(1.0, env="LOG_DB_FLUSH_INTERVAL")
+    LOG_DB_QUEUE_SIZE: int = Field(10000, env="LOG_DB_QUEUE_SIZE")
+    LOG_DB_OVERFLOW: str = Field("drop_new", env="LOG_DB_OVERFLOW")
+
+    # Сроки хранения (дней, 0 — хранить всегда). parse_runs старше срока
+    # сворачиваются в дневную сводку parse_run_daily
+    LOG_RETENTION_DAYS: int = Field(30, env="LOG_RETENTION_DAYS")
+    PARSE_RUN_RETENTION_DAYS: int = Field(90, env="PARSE_RUN_RETENTION_DAYS")
+    SCHEDULER_STATUS_RETENTION_DAYS: int = Field(30, env="SCHEDULER_STATUS_RETENTION_DAYS")
+    RETENTION_BATCH_SIZE: int = Field(5000, env="RETENTION_BATCH_SIZE")
+    # Время ежедневного обслуживания БД (HH:MM, по TIMEZONE)
+    MAINTENANCE_TIME: str = Field("04:30", env="MAINTENANCE_TIME")
+
+    # Очередь синхронизаций: запускать воркер в процессе API, как часто
+    # (сек) прогон пишет heartbeat задачи и аренды "sync" (по ходу этапов),
+    # через сколько секунд без продвижения прогон считается зависшим и
+    # сколько раз задачу можно перезапустить
+    SYNC_WORKER_ENABLED: bool = Field(True, env="SYNC_WORKER_ENABLED")
+    SYNC_JOB_HEARTBEAT: int = Field(10, env="SYNC_JOB_HEARTBEAT")
+    SYNC_JOB_STALE_AFTER: int = Field(900, env="SYNC_JOB_STALE_AFTER")
+    SYNC_JOB_MAX_ATTEMPTS: int = Field(2, env="SYNC_JOB_MAX_ATTEMPTS")
+    SYNC_JOB_RETENTION_DAYS: int = Field(30, env="SYNC_JOB_RETENTION_DAYS")
+
+    # Планировщик: участвовать ли этому процессу в выборе лидера и как
+    # часто (сек) кандидаты пробуют захватить лидерство, а лидер шлет heartbeat.
+    # Включен ли он и время запусков — в settings (SCHEDULER_ENABLED,
+    # PARSING_INTERVALS)
+    SCHEDULER_SERVICE_ENABLED: bool = Field(True, env="SCHEDULER_SERVICE_ENABLED")
+    SCHEDULER_POLL_INTERVAL: int = Field(10, env="SCHEDULER_POLL_INTERVAL")
+    # Пропущенные запуски: выполнять один раз вместо всех пропущенных и
+    # насколько (сек) запуск может опоздать, 0 — без ограничения; случайный
+    # сдвиг каждого запуска, сек (0 — без сдвига)
+    SCHEDULER_COALESCE: bool = Field(True, env="SCHEDULER_COALESCE")
+    SCHEDULER_MISFIRE_GRACE: int = Field(3600, env="SCHEDULER_MISFIRE_GRACE")
+    SCHEDULER_JITTER: int = Field(300, env="SCHEDULER_JITTER")
+
+    # Адаптивный режим (settings.SCHEDULER_MODE=adaptive): границы интервала
+    # (мин), во сколько раз он меняется, сколько изменений в прогоне
+    # считается изменением расписания и после скольких прогонов без них
+    # интервал растет; тихие часы без запусков (HH:MM-HH:MM, пусто — нет)
+    SYNC_ADAPTIVE_MIN_INTERVAL: int = Field(60, env="SYNC_ADAPTIVE_MIN_INTERVAL")
+    SYNC_ADAPTIVE_MAX_INTERVAL: int = Field(720, env="SYNC_ADAPTIVE_MAX_INTERVAL")
+    SYNC_ADAPTIVE_FACTOR: float = Field(2.0, env="SYNC_ADAPTIVE_FACTOR")
+    SYNC_ADAPTIVE_CHURN_THRESHOLD: int = Field(1, env="SYNC_ADAPTIVE_CHURN_THRESHOLD")
+    SYNC_ADAPTIVE_STABLE_RUNS: int = Field(3, env="SYNC_ADAPTIVE_STABLE_RUNS")
+    SYNC_QUIET_HOURS: str = Field("23:00-07:00", env="SYNC_QUIET_HOURS")
+
+    # Профилирование прогонов: off / sample / cprofile / full / memory, период
+    # сэмплирования (сек), каталог профилей и сколько их хранить
+    SYNC_PROFILE: str = Field("off", env="SYNC_PROFILE")
+    PROFILE_SAMPLE_INTERVAL: float = Field(0.01, env="PROFILE_SAMPLE_INTERVAL")
+    PROFILE_DIR: str = Field(
+        str(BASE_DIR / "schedule_vvsu" / "logs" / "profiles"), env="PROFILE_DIR"
+    )
+    PROFILE_KEEP: int = Field(20, env="PROFILE_KEEP")
+    PROFILE_RETENTION_DAYS: int = Field(14, env="PROFILE_RETENTION_DAYS")
+    # режим memory: сколько мест выделения памяти показывать по каждому этапу
+    PROFILE_MEMORY_TOP: int = Field(15, env="PROFILE_MEMORY_TOP")
+
+    # Трассировка: off / jsonl / otlp (адрес коллектора — стандартная
+    # OTEL_EXPORTER_OTLP_ENDPOINT), файл и его размер до ротации для jsonl
+    TRACING_EXPORTER: str = Field("off", env="TRACING_EXPORTER")
+    TRACING_JSONL_PATH: str = Field(
+        str(BASE_DIR / "schedule_vvsu" / "logs" / "traces.jsonl"), env="TRACING_JSONL_PATH"
+    )
+    TRACING_JSONL_MAX_MB: int = Field(50, env="TRACING_JSONL_MAX_MB")
+
+    # /api/search: сколько ответов держать в кэше процесса (сбрасывается,
+    # когда меняются занятия в lessons)
+    SEARCH_CACHE_SIZE: int = Field(512, env="SEARCH_CACHE_SIZE")
+
     class Config:
         env_file = ENV_PATH
         env_file_encoding = "utf-8"
@@ -1,10 +1,13 @@
 from datetime import datetime as dt_datetime, date as dt_date, time as dt_time
 from typing import Optional
 
-from sqlalchemy import Column, Date, DateTime, Integer, String, Time, event
+from sqlalchemy import Column, Computed, Date, DateTime, Index, Integer, String, Time, event, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
 
+from schedule_vvsu.text_norm import FOLD_SQL, NORM_SQL
+
 
 class Base(DeclarativeBase):
     pass
@@ -14,9 +17,13 @@ class LogEntry(Base):
     __tablename__ = "logs"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    timestamp: Mapped[dt_datetime] = mapped_column(DateTime, server_default=func.now())
+    timestamp: Mapped[dt_datetime] = mapped_column(
+        DateTime, server_default=func.now(), index=True
+    )
     level: Mapped[str] = mapped_column(String)
     message: Mapped[str] = mapped_column(String)
+    # trace_id OpenTelemetry (hex), если запись сделана внутри трассы
+    trace_id: Mapped[Optional[str]] = mapped_column(String(32), nullable=True, index=True)
 
 
 class Setting(Base):
@@ -29,10 +36,30 @@ class Setting(Base):
 
 class Lesson(Base):
     __tablename__ = "lessons"
+    __table_args__ = (
+        # занятия преподавателя по нормализованному имени
+        Index("ix_lessons_teacher_norm_date", "teacher_norm", "date"),
+        # /api/search: триграммный поиск (pg_trgm) по ФИО и дисциплине
+        Index(
+            "ix_lessons_teacher_norm_trgm",
+            "teacher_norm",
+            postgresql_using="gin",
+            postgresql_ops={"teacher_norm": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_lessons_subject_trgm",
+            text(FOLD_SQL.format(col="subject") + " gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     subject: Mapped[str] = mapped_column(String, nullable=False)
     teacher: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # ФИО для поиска (text_norm.norm), считает Postgres
+    teacher_norm: Mapped[Optional[str]] = mapped_column(
+        String, Computed(NORM_SQL.format(col="teacher"), persisted=True)
+    )
     room: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     lesson_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     start_time: Mapped[dt_time] = mapped_column(Time, nullable=False)
@@ -60,7 +87,9 @@ class SchedulerStatus(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     status: Mapped[str] = mapped_column(String, nullable=False)
-    updated_at: Mapped[dt_datetime] = mapped_column(DateTime, default=dt_datetime.utcnow)
+    updated_at: Mapped[dt_datetime] = mapped_column(
+        DateTime, default=dt_datetime.utcnow, index=True
+    )
 
 
 class ParseRun(Base):
@@ -70,15 +99,94 @@ class ParseRun(Base):
     time_str: Mapped[str] = mapped_column(String, nullable=False)
     status: Mapped[str] = mapped_column(String, nullable=False)
     detail: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-    timestamp: Mapped[dt_datetime] = mapped_column(DateTime, default=dt_datetime.utcnow)
+    timestamp: Mapped[dt_datetime] = mapped_column(
+        DateTime, default=dt_datetime.utcnow, index=True
+    )
+    # телеметрия завершенного прогона: {"stages": {этап: мс}, "counters": {...}, "calls": {...}}
+    duration_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    stats: Mapped[Optional[dict]] = mapped_column(JSONB(none_as_null=True), nullable=True)
+
+
+class ParseRunDaily(Base):
+    """Дневная сводка по parse_runs для дней старше срока хранения сырых записей."""
+
+    __tablename__ = "parse_run_daily"
+
+    day: Mapped[dt_date] = mapped_column(Date, primary_key=True)
+    ok: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    err: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class SyncJob(Base):
+    """
+    Очередь синхронизаций. Активной (queued/running) может быть только одна
+    задача — повторные запросы сливаются в нее (requests += 1).
+    """
+
+    __tablename__ = "sync_jobs"
+    __table_args__ = (
+        Index(
+            "uq_sync_jobs_active",
+            text("(true)"),
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="queued")
+    source: Mapped[str] = mapped_column(String, nullable=False)
+    requests: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    worker: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    detail: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # последний снимок прогресса (services/sync_run.py)
+    progress: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    # режим профилирования прогона (services/profiling.py), None — по SYNC_PROFILE
+    profile: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    created_at: Mapped[dt_datetime] = mapped_column(
+        DateTime, server_default=func.now(), index=True
+    )
+    started_at: Mapped[Optional[dt_datetime]] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[Optional[dt_datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[dt_datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class Lease(Base):
+    """Состояние аренд на advisory lock (см. services/leases.py)."""
+
+    __tablename__ = "leases"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    holder: Mapped[str] = mapped_column(String, nullable=False)
+    backend_pid: Mapped[int] = mapped_column(Integer, nullable=False)
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    detail: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    acquired_at: Mapped[dt_datetime] = mapped_column(DateTime, nullable=False)
+    heartbeat_at: Mapped[dt_datetime] = mapped_column(DateTime, nullable=False)
+    released_at: Mapped[Optional[dt_datetime]] = mapped_column(DateTime, nullable=True)
+    # результат последнего завершенного прогона (для piggyback)
+    last_generation: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    last_status: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    last_detail: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
 
 @event.listens_for(Setting, "after_insert")
 @event.listens_for(Setting, "after_update")
 def _notify_bot(mapper, connection, target):
-    """Отправляем NOTIFY на изменение конфигурации бота."""
-    if target.key in ("BOT_TOKEN", "ADMIN_IDS", "BOT_ENABLED"):
+    """Отправляем NOTIFY на изменение конфигурации бота и планировщика."""
+    if target.key in ("BOT_TOKEN", "ADMIN_IDS", "BOT_ENABLED", "BOT_MODE", "BOT_WEBHOOK_URL"):
         connection.exec_driver_sql("NOTIFY bot_config, 'reload';")
+    if target.key in (
+        "SCHEDULER_ENABLED",
+        "PARSING_INTERVALS",
+        "SCHEDULER_MODE",
+        "SYNC_INTERVAL_OVERRIDE",
+        "SYNC_INTERVAL_OVERRIDE_UNTIL",
+    ):
+        connection.exec_driver_sql("NOTIFY scheduler_config, 'reload';")
 
 
 from passlib.hash import bcrypt
@@ -1,13 +1,20 @@
 import logging
 import os
+import time
 from pathlib import Path
+from urllib.parse import urlparse
 
 from google.auth.transport.requests import Request
 from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+from opentelemetry import trace
 
+from schedule_vvsu import metrics, tracing
 from schedule_vvsu.config import get_settings
+from schedule_vvsu.services import run_stats
 
 settings = get_settings()
 
@@ -63,6 +70,44 @@ def authenticate_service_account():
     return creds
 
 
+class CountingHttpRequest(HttpRequest):
+    """HttpRequest, учитывающий вызовы, ошибки и повторы в телеметрии прогона."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # _retry_request спит через self._sleep перед каждым повтором
+        self._sleep = self._retry_sleep
+
+    def _retry_sleep(self, seconds: float):
+        run_stats.incr("calendar_api_retries")
+        metrics.CALENDAR_RETRY_WAITS.inc()
+        metrics.CALENDAR_RETRY_WAIT_SECONDS.inc(seconds)
+        trace.get_current_span().add_event("retry", {"sleep_s": seconds})
+        time.sleep(seconds)
+
+    def execute(self, http=None, num_retries=0):
+        method = self.methodId or self.method
+        run_stats.incr("calendar_api_calls")
+        run_stats.call(method)
+        status = "error"
+        with tracing.span(
+            f"calendar {method}",
+            kind=trace.SpanKind.CLIENT,
+            **{"http.request.method": self.method, "url.path": urlparse(self.uri).path},
+        ) as span:
+            try:
+                result = super().execute(http=http, num_retries=num_retries)
+                status = "ok"
+                return result
+            except HttpError as e:
+                run_stats.incr("calendar_api_errors")
+                status = str(e.resp.status)
+                span.set_attribute("http.response.status_code", e.resp.status)
+                raise
+            finally:
+                metrics.CALENDAR_CALLS.labels(method, status).inc()
+
+
 def authenticate_google_calendar(return_creds: bool = False):
     """
     Фабричный метод для выбора метода аутентификации в зависимости от настроек.
@@ -78,7 +123,13 @@ def authenticate_google_calendar(return_creds: bool = False):
         raise ValueError("Неверный тип аккаунта в настройках (ACCOUNT_TYPE).")
     from googleapiclient.discovery import build
 
-    service = build("calendar", "v3", credentials=creds, cache_discovery=False)
+    service = build(
+        "calendar",
+        "v3",
+        credentials=creds,
+        cache_discovery=False,
+        requestBuilder=CountingHttpRequest,
+    )
     if return_creds:
         return service, creds
     return service
@@ -4,6 +4,7 @@ import logging
 from collections import defaultdict
 from datetime import datetime
 from datetime import time as dtime
+from typing import Optional
 
 import pytz
 
@@ -20,6 +21,7 @@ from schedule_vvsu.google_calendar.events import (
     generate_lesson_key,
     update_event,
 )
+from schedule_vvsu.services import run_stats, schedule_changes, sync_run
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -109,165 +111,211 @@ def _filter_excluded(schedule: list[Lesson]) -> list[Lesson]:
         session.close()
 
 
-def sync_schedule_to_calendar(service, schedule: list[Lesson], calendar_id: str):
-    """Main sync entry — idempotent; always keeps webinar URL in description."""
-    # previous snapshot from DB
+def _lesson_fields(lesson: Lesson) -> tuple:
+    """Поля занятия, не входящие в lesson_key: их смена — изменение занятия."""
+    return (lesson.discipline, lesson.get_start_end_times(), lesson.teacher, lesson.auditorium)
+
+
+def load_previous_schedule() -> list[Lesson]:
     try:
         prev = load_lessons_from_db()
         logger.info("Загружено предыдущее расписание из БД.")
+        return prev
     except Exception as e:
         logger.warning("Ошибка загрузки предыдущего расписания: %s", e)
-        prev = []
+        return []
 
-    # 2) apply excludes
-    schedule = _filter_excluded(schedule)
 
-    # 3) compute keys
-    key_of = lambda l: generate_lesson_key(l.dict())
-    prev_keys = {key_of(l) for l in prev}
-    curr_keys = {key_of(l) for l in schedule}
-    added = [l for l in schedule if key_of(l) not in prev_keys]
-    removed = [l for l in prev if key_of(l) not in curr_keys]
-    common_keys = prev_keys & curr_keys
+def sync_schedule_to_calendar(
+    service,
+    schedule: list[Lesson],
+    calendar_id: str,
+    prev: Optional[list[Lesson]] = None,
+):
+    """
+    Main sync entry — idempotent; always keeps webinar URL in description.
+    prev — расписание до этого прогона; если не передано, читается из БД
+    (вызывающий код, успевший сохранить новое расписание, обязан передать prev).
+    """
+    with run_stats.timed("plan"):
+        # 1) previous snapshot from DB
+        if prev is None:
+            prev = load_previous_schedule()
 
-    logger.info("Добавлено занятий: %d", len(added))
-    logger.info("Удалено занятий: %d", len(removed))
+        # 2) apply excludes
+        schedule = _filter_excluded(schedule)
 
-    # 4) first lesson of day for reminders
-    sorted_sched = sorted(
-        schedule, key=lambda l: (l.get_date(), l.get_start_end_times()[0])
-    )
-    day_min_starts = {}
-    for l in sorted_sched:
-        day = l.get_date()
-        start_time, _ = l.get_start_end_times()
-        start_str = start_time.strftime("%H:%M")
-        if day not in day_min_starts or start_str < day_min_starts[day]:
-            day_min_starts[day] = start_str
+        # 3) compute keys
+        key_of = lambda l: generate_lesson_key(l.dict())
+        prev_keys = {key_of(l) for l in prev}
+        curr_keys = {key_of(l) for l in schedule}
+        added = [l for l in schedule if key_of(l) not in prev_keys]
+        removed = [l for l in prev if key_of(l) not in curr_keys]
+        common_keys = prev_keys & curr_keys
 
-    def is_first_of_day(lesson: Lesson) -> bool:
-        day = lesson.get_date()
-        start_time, _ = lesson.get_start_end_times()
-        lesson_start_str = start_time.strftime("%H:%M")
-        return day in day_min_starts and lesson_start_str == day_min_starts[day]
+        prev_by_key = {key_of(l): l for l in prev}
+        changed = [
+            l
+            for l in schedule
+            if key_of(l) in common_keys
+            and _lesson_fields(l) != _lesson_fields(prev_by_key[key_of(l)])
+        ]
 
-    # 5) added (with adoption)
-    for lesson in added:
-        key = key_of(lesson)
-        is_first = is_first_of_day(lesson)
-        try:
-            ev = _find_event_by_key(service, calendar_id, key)
-            if not ev:
-                ev = _find_event_by_time_and_title(service, calendar_id, lesson)
-            if ev:
-                ev.setdefault("extendedProperties", {}).setdefault("private", {})[
-                    "lesson_key"
-                ] = key
-                update_event(service, calendar_id, ev, lesson, lesson_key=key)
-                logger.info("Обновлено событие (усыновлено): %s", ev.get("summary"))
-            else:
-                body = create_event(
-                    lesson.dict(), is_first_of_day=is_first, lesson_key=key
-                )
-                created = (
-                    service.events().insert(calendarId=calendar_id, body=body).execute()
-                )
-                logger.info(
-                    "Добавлено событие: %s (%s)",
-                    created.get("summary"),
-                    created["start"]["dateTime"],
-                )
-        except Exception as e:
-            logger.error("Ошибка при добавлении/обновлении события: %s", e)
+        logger.info("Добавлено занятий: %d", len(added))
+        logger.info("Удалено занятий: %d", len(removed))
+        run_stats.incr("lessons_added", len(added))
+        run_stats.incr("lessons_removed", len(removed))
+        run_stats.incr("lessons_changed", len(changed))
+        changes = schedule_changes.build_payload(added, removed, changed, prev_by_key, key_of)
 
-    # 6) delete future removed
-    for lesson in removed:
-        if _is_past(lesson):
-            logger.info(
-                "Пропущено удаление прошедшего события: %s %s",
-                lesson.discipline,
-                lesson.date,
-            )
-            continue
-        key = key_of(lesson)
-        try:
-            resp = (
-                service.events()
-                .list(
-                    calendarId=calendar_id,
-                    privateExtendedProperty=f"lesson_key={key}",
-                    singleEvents=True,
-                )
-                .execute()
-            )
-            for ev in resp.get("items", []):
-                service.events().delete(
-                    calendarId=calendar_id, eventId=ev["id"]
-                ).execute()
-                logger.info("Удалено событие: %s", ev.get("summary"))
-        except Exception as e:
-            logger.error("Ошибка при удалении события: %s", e)
+        # 4) first lesson of day for reminders
+        sorted_sched = sorted(
+            schedule, key=lambda l: (l.get_date(), l.get_start_end_times()[0])
+        )
+        day_min_starts = {}
+        for l in sorted_sched:
+            day = l.get_date()
+            start_time, _ = l.get_start_end_times()
+            start_str = start_time.strftime("%H:%M")
+            if day not in day_min_starts or start_str < day_min_starts[day]:
+                day_min_starts[day] = start_str
 
-    # 7) update common
-    tz = pytz.timezone(settings.TIMEZONE)
-    update_time = datetime.now(tz).strftime("%m.%d в %H:%M")
-    for lesson in schedule:
-        key = key_of(lesson)
-        if key not in common_keys:
-            continue
-        try:
-            resp = (
-                service.events()
-                .list(
-                    calendarId=calendar_id,
-                    privateExtendedProperty=f"lesson_key={key}",
-                    singleEvents=True,
-                )
-                .execute()
-            )
-            items = resp.get("items", [])
-            if not items:
-                # try to find by time+title
-                ev = _find_event_by_time_and_title(service, calendar_id, lesson)
+        def is_first_of_day(lesson: Lesson) -> bool:
+            day = lesson.get_date()
+            start_time, _ = lesson.get_start_end_times()
+            lesson_start_str = start_time.strftime("%H:%M")
+            return day in day_min_starts and lesson_start_str == day_min_starts[day]
+
+    with run_stats.timed("apply"):
+        # 5) added (with adoption)
+        for lesson in added:
+            key = key_of(lesson)
+            is_first = is_first_of_day(lesson)
+            try:
+                ev = _find_event_by_key(service, calendar_id, key)
+                if not ev:
+                    ev = _find_event_by_time_and_title(service, calendar_id, lesson)
                 if ev:
                     ev.setdefault("extendedProperties", {}).setdefault("private", {})[
                         "lesson_key"
                     ] = key
                     update_event(service, calendar_id, ev, lesson, lesson_key=key)
-                    logger.info(
-                        "Обновлено событие (добавлен ключ): %s - Update: %s",
-                        ev.get("summary"),
-                        update_time,
-                    )
+                    sync_run.count("events_updated")
+                    logger.info("Обновлено событие (усыновлено): %s", ev.get("summary"))
                 else:
-                    is_first = is_first_of_day(lesson)
                     body = create_event(
                         lesson.dict(), is_first_of_day=is_first, lesson_key=key
                     )
                     created = (
-                        service.events()
-                        .insert(calendarId=calendar_id, body=body)
-                        .execute()
+                        service.events().insert(calendarId=calendar_id, body=body).execute()
                     )
+                    sync_run.count("events_inserted")
                     logger.info(
-                        "Воссоздано событие: %s (%s)",
+                        "Добавлено событие: %s (%s)",
                         created.get("summary"),
                         created["start"]["dateTime"],
                     )
-            else:
-                for ev in items:
-                    update_event(service, calendar_id, ev, lesson, lesson_key=key)
-                    logger.info(
-                        "Обновлено событие: %s - Update: %s",
-                        ev.get("summary"),
-                        update_time,
+            except Exception as e:
+                logger.error("Ошибка при добавлении/обновлении события: %s", e)
+                sync_run.error(f"добавление события: {e}")
+
+        # 6) delete future removed
+        for lesson in removed:
+            if _is_past(lesson):
+                logger.info(
+                    "Пропущено удаление прошедшего события: %s %s",
+                    lesson.discipline,
+                    lesson.date,
+                )
+                continue
+            key = key_of(lesson)
+            try:
+                resp = (
+                    service.events()
+                    .list(
+                        calendarId=calendar_id,
+                        privateExtendedProperty=f"lesson_key={key}",
+                        singleEvents=True,
+                    )
+                    .execute()
+                )
+                for ev in resp.get("items", []):
+                    service.events().delete(
+                        calendarId=calendar_id, eventId=ev["id"]
+                    ).execute()
+                    sync_run.count("events_deleted")
+                    logger.info("Удалено событие: %s", ev.get("summary"))
+            except Exception as e:
+                logger.error("Ошибка при удалении события: %s", e)
+                sync_run.error(f"удаление события: {e}")
+
+        # 7) update common
+        tz = pytz.timezone(settings.TIMEZONE)
+        update_time = datetime.now(tz).strftime("%m.%d в %H:%M")
+        for lesson in schedule:
+            key = key_of(lesson)
+            if key not in common_keys:
+                continue
+            try:
+                resp = (
+                    service.events()
+                    .list(
+                        calendarId=calendar_id,
+                        privateExtendedProperty=f"lesson_key={key}",
+                        singleEvents=True,
                     )
-        except Exception as e:
-            logger.error("Ошибка при обновлении/воссоздании события: %s", e)
+                    .execute()
+                )
+                items = resp.get("items", [])
+                if not items:
+                    # try to find by time+title
+                    ev = _find_event_by_time_and_title(service, calendar_id, lesson)
+                    if ev:
+                        ev.setdefault("extendedProperties", {}).setdefault("private", {})[
+                            "lesson_key"
+                        ] = key
+                        update_event(service, calendar_id, ev, lesson, lesson_key=key)
+                        sync_run.count("events_updated")
+                        logger.info(
+                            "Обновлено событие (добавлен ключ): %s - Update: %s",
+                            ev.get("summary"),
+                            update_time,
+                        )
+                    else:
+                        is_first = is_first_of_day(lesson)
+                        body = create_event(
+                            lesson.dict(), is_first_of_day=is_first, lesson_key=key
+                        )
+                        created = (
+                            service.events()
+                            .insert(calendarId=calendar_id, body=body)
+                            .execute()
+                        )
+                        sync_run.count("events_inserted")
+                        logger.info(
+                            "Воссоздано событие: %s (%s)",
+                            created.get("summary"),
+                            created["start"]["dateTime"],
+                        )
+                else:
+                    for ev in items:
+                        update_event(service, calendar_id, ev, lesson, lesson_key=key)
+                        sync_run.count("events_updated")
+                        logger.info(
+                            "Обновлено событие: %s - Update: %s",
+                            ev.get("summary"),
+                            update_time,
+                        )
+            except Exception as e:
+                logger.error("Ошибка при обновлении/воссоздании события: %s", e)
+                sync_run.error(f"обновление события: {e}")
 
     # 8) persist
     try:
-        save_lessons_to_db(schedule)
+        with run_stats.timed("final_save"):
+            save_lessons_to_db(schedule)
         logger.info("Текущее расписание сохранено в базу данных.")
+        # разница публикуется только для сохраненного расписания
+        schedule_changes.publish(changes)
     except Exception as e:
         logger.error("Ошибка при сохранении расписания: %s", e)
@@ -1,17 +1,210 @@
 import logging
-from schedule_vvsu.database import SessionLocal
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, List
+
+from sqlalchemy import insert, text
+
+from schedule_vvsu import metrics
+from schedule_vvsu.database import engine
 from schedule_vvsu.db.models import LogEntry
 
+OVERFLOW_POLICIES = ("drop_new", "drop_old", "block")
+
+# канал NOTIFY после каждой записанной пачки (живая лента /api/logs/stream)
+NOTIFY_CHANNEL = "logs"
+
+
+class _FlushRequest:
+    def __init__(self):
+        self.done = threading.Event()
+
 
 class DBLogHandler(logging.Handler):
+    """
+    Пишет логи в таблицу logs пачками из фонового потока.
+
+    emit() только форматирует запись и кладет ее в ограниченный буфер,
+    поэтому не делает round trip в БД на вызывающем потоке. Поток-писатель
+    сбрасывает накопленное одним multi-row INSERT, как только набралось
+    batch_size записей или прошло flush_interval секунд.
+
+    Переполнение буфера (БД недоступна или не успевает):
+    - drop_new — новая запись отбрасывается;
+    - drop_old — вытесняется самая старая запись из буфера;
+    - block    — emit ждет место не дольше block_timeout, затем отбрасывает.
+
+    В буфере лежат только записи: запросы flush() и остановка передаются
+    писателю отдельно, под тем же замком, и вытеснение их не задевает.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_queue: int = 10000,
+        overflow: str = "drop_new",
+        block_timeout: float = 1.0,
+    ):
+        super().__init__()
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+        self.flushed = 0  # записей успешно вставлено
+        self.dropped = 0  # записей отброшено из-за переполнения
+        self.failed = 0  # записей потеряно из-за ошибок INSERT
+        self._closed = False
+        self._start_writer()
+
+        # после fork поток-писатель в дочернем процессе не существует
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._start_writer)
+
+    def _start_writer(self):
+        # счетчики, буфер и сигналы писателю — под одним замком
+        self._cond = threading.Condition()
+        self._rows: Deque[dict] = deque()
+        self._flush_requests: List[_FlushRequest] = []
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="db-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    # Producer side
+
     def emit(self, record):
-        session = SessionLocal()
+        if self._closed:
+            return
+        try:
+            row = {
+                "timestamp": datetime.utcfromtimestamp(record.created),
+                "level": record.levelname,
+                "message": self.format(record),
+                "trace_id": getattr(record, "trace_id", None),
+            }
+        except Exception:
+            self.handleError(record)
+            return
+        self._enqueue(row)
+
+    def _enqueue(self, row: dict):
+        with self._cond:
+            if len(self._rows) >= self.max_queue:
+                if self.overflow == "drop_old":
+                    self._rows.popleft()
+                    self._drop()
+                elif self.overflow == "block":
+                    if not self._cond.wait_for(
+                        lambda: len(self._rows) < self.max_queue or self._stopping,
+                        timeout=self.block_timeout,
+                    ) or self._stopping:
+                        self._drop()
+                        return
+                else:
+                    self._drop()
+                    return
+            self._rows.append(row)
+            if len(self._rows) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _drop(self):
+        # вызывается под self._cond
+        self.dropped += 1
+        metrics.LOG_RECORDS.labels("dropped").inc()
+
+    def flush(self, timeout: float = 5.0):
+        """Синхронно сбрасывает все, что уже лежит в буфере."""
+        if self._closed or not self._thread.is_alive():
+            return
+        req = _FlushRequest()
+        with self._cond:
+            self._flush_requests.append(req)
+            self._cond.notify_all()
+        req.done.wait(timeout)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            with self._cond:
+                self._stopping = True
+                self._cond.notify_all()
+            if self._thread.is_alive():
+                self._thread.join(timeout=10)
+        super().close()
+
+    @property
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._rows)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": len(self._rows),
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+                "failed": self.failed,
+            }
+
+    # Writer side
+
+    def _take(self, limit: int) -> list:
+        # вызывается под self._cond; освободившееся место будит block-ожидающих
+        n = min(limit, len(self._rows))
+        batch = [self._rows.popleft() for _ in range(n)]
+        if batch:
+            self._cond.notify_all()
+        return batch
+
+    def _run(self):
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping
+                    or self._flush_requests
+                    or len(self._rows) >= self.batch_size,
+                    timeout=max(0.0, deadline - time.monotonic()),
+                )
+                stopping = self._stopping
+                requests, self._flush_requests = self._flush_requests, []
+                # flush и остановка сбрасывают все, что уже накоплено
+                pending = len(self._rows) if stopping or requests else self.batch_size
+                batch = self._take(pending)
+
+            while batch:
+                self._write(batch[: self.batch_size])
+                batch = batch[self.batch_size :]
+            for req in requests:
+                req.done.set()
+            if stopping:
+                return
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+                metrics.LOG_QUEUE_DEPTH.set(self.queue_depth)
+
+    def _write(self, rows: list):
+        if not rows:
+            return
         try:
-            entry = LogEntry(level=record.levelname, message=self.format(record))
-            session.add(entry)
-            session.commit()
+            with engine.begin() as conn:
+                conn.execute(insert(LogEntry), rows)
+                conn.execute(text(f"NOTIFY {NOTIFY_CHANNEL}"))
+            with self._cond:
+                self.flushed += len(rows)
+            metrics.LOG_RECORDS.labels("written").inc(len(rows))
         except Exception as e:
-            session.rollback()
+            # логировать отсюда нельзя — запись снова попадет в этот же handler
+            with self._cond:
+                self.failed += len(rows)
+            metrics.LOG_RECORDS.labels("failed").inc(len(rows))
             print("DBLogHandler error:", e)
-        finally:
-            session.close()
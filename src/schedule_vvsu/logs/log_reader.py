@@ -0,0 +1,190 @@
+"""
+Чтение хвоста лог-файлов без загрузки файла в память.
+
+Файлы читаются блоками с конца, поэтому время и память зависят от
+запрошенного количества строк, а не от размера логов.
+"""
+from __future__ import annotations
+
+import heapq
+import re
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+BLOCK_SIZE = 64 * 1024
+
+# "2025-06-08 12:33:04,106 INFO: ..." — формат logger_setup
+_TS_RE = re.compile(rb"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:,\d{3})?)")
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace")
+
+
+def _line_ts(raw: bytes) -> Optional[str]:
+    m = _TS_RE.match(raw)
+    return m.group(1).decode() if m else None
+
+
+def iter_lines_reverse(
+    f: BinaryIO, end: Optional[int] = None, block_size: int = BLOCK_SIZE
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Идет по файлу от позиции end (по умолчанию конец) к началу.
+    Отдает (offset начала строки, строка без перевода строки).
+    """
+    if end is None:
+        f.seek(0, 2)
+        end = f.tell()
+    pos = end
+    tail = b""
+    while pos > 0:
+        read = min(block_size, pos)
+        pos -= read
+        f.seek(pos)
+        chunk = f.read(read) + tail
+        lines = chunk.split(b"\n")
+        # первая строка блока может быть неполной — дочитаем ее со следующим блоком
+        tail = lines.pop(0)
+        offset = pos + len(tail) + 1
+        found = []
+        for line in lines:
+            found.append((offset, line))
+            offset += len(line) + 1
+        for item in reversed(found):
+            if item[0] < end:
+                yield item
+    if end > 0:
+        yield 0, tail
+
+
+def tail_lines(
+    path: Path, limit: int, before: Optional[int] = None
+) -> Tuple[List[str], Optional[int]]:
+    """
+    Последние limit строк файла (новые первыми), заканчивающиеся до
+    байтового смещения before. Возвращает (строки, курсор для следующей страницы).
+    """
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        end = size if before is None else max(0, min(before, size))
+
+        lines: List[str] = []
+        next_before: Optional[int] = None
+        for offset, raw in iter_lines_reverse(f, end):
+            lines.append(_decode(raw) + "\n")
+            next_before = offset
+            if len(lines) >= limit:
+                break
+        if next_before == 0 or len(lines) < limit:
+            next_before = None
+    return lines, next_before
+
+
+# Объединенный просмотр нескольких файлов
+
+
+def _first_stamped_at(f: BinaryIO, pos: int) -> Tuple[Optional[int], Optional[str]]:
+    """Первая строка с меткой времени, начинающаяся не раньше pos."""
+    if pos > 0:
+        f.seek(pos - 1)
+        f.readline()  # дочитываем строку, в середину которой попали
+    else:
+        f.seek(0)
+    while True:
+        offset = f.tell()
+        raw = f.readline()
+        if not raw:
+            return None, None
+        ts = _line_ts(raw)
+        if ts is not None:
+            return offset, ts
+
+
+def _offset_after(f: BinaryIO, size: int, ts: str) -> int:
+    """
+    Бинарный поиск: смещение первой записи с меткой > ts.
+    Все, что до него, относится к записям с меткой <= ts.
+    """
+    lo, hi = 0, size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        _, line_ts = _first_stamped_at(f, mid)
+        if line_ts is None or line_ts > ts:
+            hi = mid
+        else:
+            lo = mid + 1
+    offset, _ = _first_stamped_at(f, lo)
+    return size if offset is None else offset
+
+
+def _records_reverse(path: Path, before_ts: Optional[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Строки файла с конца как (метка записи, строка). Строки без метки
+    (traceback и т.п.) получают метку записи, к которой относятся.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        end = size if before_ts is None else _offset_after(f, size, before_ts)
+        pending: List[bytes] = []
+        for _, raw in iter_lines_reverse(f, end):
+            ts = _line_ts(raw)
+            if ts is None:
+                if raw.strip():
+                    pending.append(raw)
+                continue
+            for line in pending:
+                yield ts, _decode(line).strip()
+            pending = []
+            yield ts, _decode(raw).strip()
+        for line in pending:
+            yield "", _decode(line).strip()
+
+
+def _parse_cursor(cursor: Optional[str]) -> Tuple[Optional[str], int]:
+    """Курсор "<метка>#<сколько строк с этой меткой уже отдано>"."""
+    if not cursor:
+        return None, 0
+    if "#" not in cursor:
+        return cursor, 0
+    ts, _, skip = cursor.rpartition("#")
+    return ts, int(skip) if skip.isdigit() else 0
+
+
+def merge_recent(
+    paths: Iterable[Path], limit: int, before: Optional[str] = None
+) -> Tuple[List[str], Optional[str]]:
+    """
+    K-way merge обратных итераторов по файлам: limit самых свежих строк
+    (новые первыми) старше курсора before. Читается только нужный хвост
+    каждого файла.
+    """
+    before_ts, skip = _parse_cursor(before)
+    iters = [_records_reverse(p, before_ts) for p in paths]
+    merged = heapq.merge(*iters, key=lambda item: item[0], reverse=True)
+
+    # записи с меткой, равной курсору, частично уже отданы на прошлой странице
+    if before_ts is not None and skip:
+        merged = _skip_same_ts(merged, before_ts, skip)
+
+    page = list(islice(merged, limit))
+    lines = [line for _, line in page]
+    if len(page) < limit:
+        return lines, None
+
+    last_ts = page[-1][0]
+    same = sum(1 for ts, _ in page if ts == last_ts)
+    if last_ts == before_ts:
+        same += skip
+    return lines, f"{last_ts}#{same}"
+
+
+def _skip_same_ts(items: Iterator[Tuple[str, str]], ts: str, skip: int):
+    for item in items:
+        if skip and item[0] == ts:
+            skip -= 1
+            continue
+        yield item
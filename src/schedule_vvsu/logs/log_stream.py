@@ -0,0 +1,229 @@
+"""
+Живая лента логов для /api/logs/stream (Server-Sent Events).
+
+DBLogHandler после каждой пачки делает NOTIFY logs. Один LogBroadcaster
+на процесс подписан на канал, дочитывает новые строки одним запросом и
+раздает их всем открытым стримам. Пропущенное клиент догоняет через
+Last-Event-ID (id записи в logs): строки дочитываются пачками по
+возрастанию id, пока не догонит.
+
+API и планировщик пишут логи из разных процессов, и пачка с меньшими id
+может закоммититься позже пачки с большими. Поэтому курсор — не только
+max(id): дочитывание каждый раз перепроверяет окно LATE_WINDOW id позади
+курсора и отдает строки, которых там еще не было.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy import func, select
+
+from schedule_vvsu.database import AsyncSessionLocal
+from schedule_vvsu.db.models import LogEntry
+from schedule_vvsu.logs.db_logger import NOTIFY_CHANNEL
+from schedule_vvsu.services.pg_listener import PgListener, get_pg_listener
+
+logger = logging.getLogger(__name__)
+
+FETCH_BATCH = 500
+# насколько id назад искать поздно закоммиченные строки: с запасом на
+# несколько пачек DBLogHandler (LOG_DB_BATCH_SIZE) из соседних процессов
+LATE_WINDOW = 2000
+INITIAL_ROWS = 100  # сколько последних строк отдать новому клиенту без курсора
+HEARTBEAT = 15.0  # секунд между keep-alive комментариями
+RETRY_MS = 3000
+
+
+def log_entry_dict(entry: LogEntry) -> dict:
+    return {
+        "id": entry.id,
+        "ts": entry.timestamp.isoformat(),
+        "level": entry.level,
+        "msg": entry.message,
+        "trace_id": entry.trace_id,
+    }
+
+
+async def fetch_logs_after(after_id: int, limit: int) -> List[dict]:
+    async with AsyncSessionLocal() as session:
+        rows = await session.scalars(
+            select(LogEntry).where(LogEntry.id > after_id).order_by(LogEntry.id).limit(limit)
+        )
+        return [log_entry_dict(e) for e in rows]
+
+
+async def fetch_log_ids(after_id: int, upto_id: int) -> Set[int]:
+    async with AsyncSessionLocal() as session:
+        ids = await session.scalars(
+            select(LogEntry.id).where(LogEntry.id > after_id, LogEntry.id <= upto_id)
+        )
+        return set(ids)
+
+
+async def fetch_logs_by_ids(ids: Iterable[int]) -> List[dict]:
+    async with AsyncSessionLocal() as session:
+        rows = await session.scalars(
+            select(LogEntry).where(LogEntry.id.in_(list(ids))).order_by(LogEntry.id)
+        )
+        return [log_entry_dict(e) for e in rows]
+
+
+async def fetch_logs_tail(after_id: int, limit: int) -> List[dict]:
+    """Последние limit записей с id > after_id, по возрастанию id."""
+    async with AsyncSessionLocal() as session:
+        rows = await session.scalars(
+            select(LogEntry)
+            .where(LogEntry.id > after_id)
+            .order_by(LogEntry.id.desc())
+            .limit(limit)
+        )
+        return [log_entry_dict(e) for e in reversed(rows.all())]
+
+
+def _sse(entry: dict, cursor: bool = True) -> str:
+    data = f"data: {json.dumps(entry, ensure_ascii=False)}\n\n"
+    # поздняя строка без id: иначе Last-Event-ID браузера откатится назад
+    return f"id: {entry['id']}\n{data}" if cursor else data
+
+
+class _SeenIds:
+    """id, уже отданные получателю, в пределах LATE_WINDOW от максимального."""
+
+    def __init__(self, last: int = 0, ids: Iterable[int] = ()):
+        self.last = last
+        self.ids: Set[int] = set(ids)
+
+    def fresh(self, rows: List[dict]) -> List[dict]:
+        out = [entry for entry in rows if entry["id"] not in self.ids]
+        if out:
+            self.ids.update(entry["id"] for entry in out)
+            self.last = max(self.last, max(entry["id"] for entry in out))
+            floor = self.last - LATE_WINDOW
+            self.ids = {i for i in self.ids if i > floor}
+        return out
+
+
+class LogBroadcaster:
+    """
+    Раздает новые записи logs подписчикам. Пока есть хотя бы один
+    подписчик, держит callback в PgListener и фоновую задачу дочитывания.
+    """
+
+    def __init__(self, listener: PgListener, queue_size: int = 100):
+        self._listener = listener
+        self._queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._wakeup = asyncio.Event()
+        self._pump_task: Optional[asyncio.Task] = None
+        self._seen = _SeenIds()
+        # запуск и остановка дочитывания не пересекаются: иначе первые
+        # одновременные подписчики запустят по своей задаче, а подписчик,
+        # пришедший во время остановки, останется без callback
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        async with self._lock:
+            self._subscribers.add(q)
+            if self._pump_task is None:
+                try:
+                    async with AsyncSessionLocal() as session:
+                        last = await session.scalar(select(func.max(LogEntry.id))) or 0
+                    self._seen = _SeenIds(last, await fetch_log_ids(last - LATE_WINDOW, last))
+                    self._wakeup.clear()
+                    await self._listener.add_callback(NOTIFY_CHANNEL, self._on_notify)
+                except BaseException:
+                    self._subscribers.discard(q)
+                    raise
+                self._pump_task = asyncio.create_task(self._pump())
+        return q
+
+    async def unsubscribe(self, q: asyncio.Queue):
+        async with self._lock:
+            self._subscribers.discard(q)
+            if not self._subscribers and self._pump_task is not None:
+                self._pump_task.cancel()
+                self._pump_task = None
+                await self._listener.remove_callback(NOTIFY_CHANNEL, self._on_notify)
+
+    def _on_notify(self, payload: Optional[str]):
+        self._wakeup.set()
+
+    async def _pump(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            seen = self._seen
+            try:
+                # строки, закоммиченные позже строк с большими id
+                late = await fetch_log_ids(seen.last - LATE_WINDOW, seen.last) - seen.ids
+                if late:
+                    self._broadcast(seen.fresh(await fetch_logs_by_ids(late)))
+                while True:
+                    rows = await fetch_logs_after(seen.last, FETCH_BATCH)
+                    fresh = seen.fresh(rows)
+                    if fresh:
+                        self._broadcast(fresh)
+                    if len(rows) < FETCH_BATCH:
+                        break
+            except Exception:
+                logger.exception("Не удалось дочитать новые логи")
+                await asyncio.sleep(1)
+
+    def _broadcast(self, rows: List[dict]):
+        for q in list(self._subscribers):
+            try:
+                q.put_nowait(rows)
+            except asyncio.QueueFull:
+                # клиент не успевает читать: закрываем его стрим, браузер
+                # переподключится и догонит пропущенное по Last-Event-ID
+                self._subscribers.discard(q)
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait(None)
+
+    async def events(self, after_id: Optional[int]):
+        """Генератор SSE-сообщений для одного клиента."""
+        q = await self.subscribe()  # до догона, чтобы не потерять записи между ними
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            # догон и рассылка пересекаются: повторно одну строку не отдаем
+            sent = _SeenIds(after_id or 0)
+            if after_id is None:
+                for entry in sent.fresh(await fetch_logs_tail(0, INITIAL_ROWS)):
+                    yield _sse(entry)
+            else:
+                # догон по Last-Event-ID без пропусков: пачками вперед от курсора
+                while True:
+                    rows = await fetch_logs_after(sent.last, FETCH_BATCH)
+                    for entry in sent.fresh(rows):
+                        yield _sse(entry)
+                    if len(rows) < FETCH_BATCH:
+                        break
+
+            while True:
+                try:
+                    rows = await asyncio.wait_for(q.get(), timeout=HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if rows is None:
+                    return
+                last = sent.last
+                for entry in sent.fresh(rows):
+                    yield _sse(entry, cursor=entry["id"] > last)
+        finally:
+            await self.unsubscribe(q)
+
+
+_broadcaster: Optional[LogBroadcaster] = None
+
+
+def get_log_broadcaster() -> LogBroadcaster:
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = LogBroadcaster(get_pg_listener())
+    return _broadcaster
@@ -1,7 +1,11 @@
 import logging
 from logging.handlers import TimedRotatingFileHandler
 from pathlib import Path
+from typing import Optional
+
+from schedule_vvsu.config import get_settings
 from schedule_vvsu.logs.db_logger import DBLogHandler
+from schedule_vvsu.tracing import TraceIdFilter, setup_tracing
 
 _initialized = False
 
@@ -11,6 +15,7 @@ def setup_logging():
     if _initialized:
         return
 
+    setup_tracing()
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
@@ -24,16 +29,34 @@ def setup_logging():
         interval=1,
         backupCount=7
     )
-    file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s: %(message)s"))
+    file_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s: %(message)s%(trace_suffix)s")
+    )
+    file_handler.addFilter(TraceIdFilter())
 
     if not any(isinstance(h, TimedRotatingFileHandler) for h in logger.handlers):
         logger.addHandler(file_handler)
 
-    db_handler = DBLogHandler()
-    db_handler.setLevel(logging.INFO)
-    db_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s: %(message)s"))
-
+    # поток-писатель создаем только для первого DBLogHandler
     if not any(isinstance(h, DBLogHandler) for h in logger.handlers):
+        settings = get_settings()
+        db_handler = DBLogHandler(
+            batch_size=settings.LOG_DB_BATCH_SIZE,
+            flush_interval=settings.LOG_DB_FLUSH_INTERVAL,
+            max_queue=settings.LOG_DB_QUEUE_SIZE,
+            overflow=settings.LOG_DB_OVERFLOW,
+        )
+        db_handler.setLevel(logging.INFO)
+        db_handler.addFilter(TraceIdFilter())
+        db_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s: %(message)s"))
         logger.addHandler(db_handler)
 
     _initialized = True  # пометка, что уже настроен
+
+
+def get_db_log_handler() -> Optional[DBLogHandler]:
+    """DBLogHandler корневого логгера (для статистики очереди)."""
+    for h in logging.getLogger().handlers:
+        if isinstance(h, DBLogHandler):
+            return h
+    return None
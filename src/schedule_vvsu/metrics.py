@@ -0,0 +1,150 @@
+"""
+Метрики Prometheus (эндпоинт /metrics в api.py).
+
+При нескольких воркерах uvicorn задайте PROMETHEUS_MULTIPROC_DIR —
+пустой каталог, общий для воркеров и очищаемый перед запуском. Тогда
+каждый процесс пишет значения в свои файлы, а /metrics собирает их
+через MultiProcessCollector. Без переменной используется обычный
+реестр процесса.
+"""
+from __future__ import annotations
+
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# этапы синхронизации длятся от долей секунды до минут
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+HTTP_REQUESTS = Counter(
+    "vvsu_http_requests_total",
+    "HTTP-запросы к API",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "vvsu_http_request_duration_seconds",
+    "Время обработки HTTP-запроса (до начала ответа)",
+    ["method", "route"],
+)
+
+SYNC_RUNS = Counter("vvsu_sync_runs_total", "Прогоны синхронизации", ["status"])
+SYNC_DURATION = Histogram(
+    "vvsu_sync_duration_seconds", "Длительность прогона синхронизации", buckets=STAGE_BUCKETS
+)
+SYNC_STAGE_DURATION = Histogram(
+    "vvsu_sync_stage_duration_seconds",
+    "Длительность этапа синхронизации",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+SYNC_LAST_SUCCESS = Gauge(
+    "vvsu_sync_last_success_timestamp_seconds",
+    "Unix-время последней успешной синхронизации",
+    multiprocess_mode="max",
+)
+
+CALENDAR_CALLS = Counter(
+    "vvsu_calendar_api_calls_total",
+    "Вызовы Google Calendar API",
+    ["method", "status"],
+)
+CALENDAR_RETRY_WAITS = Counter(
+    "vvsu_calendar_retry_waits_total",
+    "Паузы перед повтором вызова Calendar API (rate limit, 5xx)",
+)
+CALENDAR_RETRY_WAIT_SECONDS = Counter(
+    "vvsu_calendar_retry_wait_seconds_total",
+    "Суммарное время пауз перед повторами Calendar API",
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "vvsu_db_pool_checked_out",
+    "Соединения, выданные из пула",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OPEN = Gauge(
+    "vvsu_db_pool_connections",
+    "Открытые соединения пула",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+LOG_QUEUE_DEPTH = Gauge(
+    "vvsu_log_queue_depth",
+    "Записи логов в очереди на запись в БД",
+    multiprocess_mode="livesum",
+)
+LOG_RECORDS = Counter(
+    "vvsu_log_records_total",
+    "Записи логов по результату записи в БД",
+    ["result"],
+)
+
+SEARCH_CACHE = Counter(
+    "vvsu_search_cache_total",
+    "Ответы /api/search: из кэша (hit) или из БД (miss)",
+    ["result"],
+)
+
+
+def instrument_engine(engine, name: str):
+    """Вешает на пул движка счетчики выданных и открытых соединений."""
+    pool = getattr(engine, "sync_engine", engine).pool
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    opened = DB_POOL_OPEN.labels(name)
+
+    @event.listens_for(pool, "connect")
+    def _connect(dbapi_conn, record):
+        opened.inc()
+
+    @event.listens_for(pool, "close")
+    def _close(dbapi_conn, record):
+        opened.dec()
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        checked_out.inc()
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(dbapi_conn, record):
+        checked_out.dec()
+
+
+def observe_run(status: str, duration_ms: Optional[int], stages: dict):
+    """Учитывает завершенный прогон (stages — {этап: мс} из RunStats)."""
+    SYNC_RUNS.labels(status).inc()
+    if duration_ms is not None:
+        SYNC_DURATION.observe(duration_ms / 1000)
+    for stage, ms in stages.items():
+        SYNC_STAGE_DURATION.labels(stage).observe(ms / 1000)
+    if status == "success":
+        SYNC_LAST_SUCCESS.set(time.time())
+
+
+def mark_process_dead(pid: int):
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+def render() -> tuple[bytes, str]:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
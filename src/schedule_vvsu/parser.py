@@ -2,7 +2,7 @@ import logging
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from bs4 import BeautifulSoup
 from selenium import webdriver
@@ -18,6 +18,7 @@ from schedule_vvsu.database import get_setting, save_lessons_to_db
 # Внутренние импорты проекта
 from schedule_vvsu.dto.models import Lesson
 from schedule_vvsu.logs.logger_setup import setup_logging
+from schedule_vvsu.services import run_stats
 
 BASE_DIR = Path(__file__).resolve().parent
 
@@ -62,6 +63,7 @@ def get_webdriver(use_remote: bool, remote_url: str) -> webdriver.Firefox:
             logger.warning(
                 f"[{datetime.now()}] Ошибка подключения (попытка {attempt}): {exc.msg}"
             )
+            run_stats.incr("webdriver_retries")
             if attempt == MAX_RETRIES:
                 raise RuntimeError("Не удалось создать сессию WebDriver") from exc
             time.sleep(RETRY_DELAY)
@@ -152,42 +154,110 @@ def _extract_subject(cell) -> str:
     return full.strip()
 
 
+def extract_week_lessons(
+    html: str, current_date: Optional[str] = None
+) -> Tuple[List[Lesson], Optional[str]]:
+    """
+    Занятия из HTML одной недели карусели. current_date — дата, действующая
+    к началу недели; возвращается вместе с датой на ее конец.
+    """
+    lessons: List[Lesson] = []
+    soup = BeautifulSoup(html, "html.parser")
+    try:
+        table = soup.find("table", class_="table")
+        tbody = table.find("tbody") if table else None
+        if not tbody:
+            return lessons, current_date
+
+        for row in tbody.find_all("tr"):
+            cols = row.find_all("td")
+            if len(cols) == 1:
+                # строка с датой: <b>Вторник 16.09.2025</b>
+                b_tag = cols[0].find("b")
+                if b_tag:
+                    parts = b_tag.get_text(strip=True).split()
+                    current_date = parts[-1] if parts else current_date
+                continue
+
+            if len(cols) >= 5 and current_date:
+                time_cell = cols[0]
+                disc_cell = cols[1]
+                teacher_cell = cols[2]
+                type_cell = cols[3]
+                room_cell = cols[4]
+
+                # Время "18:30-20:00"
+                time_range = time_cell.get_text(strip=True)
+
+                subject = _extract_subject(disc_cell)
+                webinar_url = _find_webinar_url(disc_cell)
+
+                teacher = teacher_cell.get_text(strip=True)
+                lesson_type = type_cell.get_text(strip=True)
+                room = room_cell.get_text(strip=True)
+
+                # Если нашли ссылку — добавим ее в subject хвостом 'вебинар:<url>'
+                # (это гарантирует, что ссылка дойдет до БД даже если у модели нет поля webinar_url)
+                if webinar_url and ("вебинар:" not in subject):
+                    subject = f"{subject} вебинар:{webinar_url}"
+
+                # Модель Lesson в проекте принимает поля вида 'date/time_range/discipline/teacher/lesson_type/auditorium'
+                # Дальше маппер в БД преобразует: discipline->subject, time_range->start/end, auditorium->room
+                lesson = Lesson(
+                    date=current_date,
+                    time_range=time_range,
+                    discipline=subject,
+                    teacher=teacher,
+                    lesson_type=lesson_type,
+                    auditorium=room,
+                )
+                lessons.append(lesson)
+        return lessons, current_date
+    finally:
+        # дерево BeautifulSoup полно циклических ссылок и без decompose()
+        # живет до сборки мусора — деревья всех недель копились бы в памяти
+        soup.decompose()
+
+
 def parse_schedule() -> List[Lesson]:
     cfg = get_config()
 
-    driver = get_webdriver(cfg["USE_REMOTE"], cfg["SELENIUM_REMOTE_URL"])
+    with run_stats.timed("browser_start"):
+        driver = get_webdriver(cfg["USE_REMOTE"], cfg["SELENIUM_REMOTE_URL"])
     lessons: List[Lesson] = []
     current_date = None
 
     try:
-        logger.info("Открываем страницу авторизации.")
-        driver.get(cfg["LOGIN_URL"])
         wait = WebDriverWait(driver, 30)
+        with run_stats.timed("login"):
+            logger.info("Открываем страницу авторизации.")
+            driver.get(cfg["LOGIN_URL"])
 
-        login_field = wait.until(EC.presence_of_element_located((By.ID, "login")))
-        password_field = wait.until(EC.presence_of_element_located((By.ID, "password")))
+            login_field = wait.until(EC.presence_of_element_located((By.ID, "login")))
+            password_field = wait.until(EC.presence_of_element_located((By.ID, "password")))
 
-        logger.info("Вводим логин и пароль.")
-        login_field.send_keys(cfg["USERNAME"])
-        password_field.send_keys(cfg["PASSWORD"])
+            logger.info("Вводим логин и пароль.")
+            login_field.send_keys(cfg["USERNAME"])
+            password_field.send_keys(cfg["PASSWORD"])
 
-        login_button = wait.until(
-            EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Войти')]"))
-        )
-        login_button.click()
+            login_button = wait.until(
+                EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Войти')]"))
+            )
+            login_button.click()
 
-        logger.info("Переходим на страницу расписания.")
-        time.sleep(10)
-        driver.get(cfg["SCHEDULE_URL"])
+        with run_stats.timed("schedule_load"):
+            logger.info("Переходим на страницу расписания.")
+            time.sleep(10)
+            driver.get(cfg["SCHEDULE_URL"])
 
-        # немножко прокрутим, чтобы сработала подгрузка
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
+            # немножко прокрутим, чтобы сработала подгрузка
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            time.sleep(2)
 
-        wait.until(EC.presence_of_element_located((By.CLASS_NAME, "carousel-inner")))
+            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "carousel-inner")))
 
-        logger.info("Ждем появления расписания...")
-        week_elements = wait_for_carousel_items(driver)
+            logger.info("Ждем появления расписания...")
+            week_elements = wait_for_carousel_items(driver)
 
         if not week_elements:
             logger.warning(
@@ -202,61 +272,13 @@ def parse_schedule() -> List[Lesson]:
             return []
 
         logger.info("Начинаем парсинг расписания.")
-        for index, week in enumerate(week_elements):
-            logger.info(f"Парсим неделю {index + 1}/{len(week_elements)}.")
-            soup = BeautifulSoup(week.get_attribute("outerHTML"), "html.parser")
-            table = soup.find("table", class_="table")
-            if not table:
-                continue
-
-            tbody = table.find("tbody")
-            if not tbody:
-                continue
-            rows = tbody.find_all("tr")
-
-            for row in rows:
-                cols = row.find_all("td")
-                if len(cols) == 1:
-                    # строка с датой: <b>Вторник 16.09.2025</b>
-                    b_tag = cols[0].find("b")
-                    if b_tag:
-                        parts = b_tag.get_text(strip=True).split()
-                        current_date = parts[-1] if parts else current_date
-                    continue
-
-                if len(cols) >= 5 and current_date:
-                    time_cell = cols[0]
-                    disc_cell = cols[1]
-                    teacher_cell = cols[2]
-                    type_cell = cols[3]
-                    room_cell = cols[4]
-
-                    # Время "18:30-20:00"
-                    time_range = time_cell.get_text(strip=True)
-
-                    subject = _extract_subject(disc_cell)
-                    webinar_url = _find_webinar_url(disc_cell)
-
-                    teacher = teacher_cell.get_text(strip=True)
-                    lesson_type = type_cell.get_text(strip=True)
-                    room = room_cell.get_text(strip=True)
-
-                    # Если нашли ссылку — добавим ее в subject хвостом 'вебинар:<url>'
-                    # (это гарантирует, что ссылка дойдет до БД даже если у модели нет поля webinar_url)
-                    if webinar_url and ("вебинар:" not in subject):
-                        subject = f"{subject} вебинар:{webinar_url}"
-
-                    # Модель Lesson в проекте принимает поля вида 'date/time_range/discipline/teacher/lesson_type/auditorium'
-                    # Дальше маппер в БД преобразует: discipline->subject, time_range->start/end, auditorium->room
-                    lesson = Lesson(
-                        date=current_date,
-                        time_range=time_range,
-                        discipline=subject,
-                        teacher=teacher,
-                        lesson_type=lesson_type,
-                        auditorium=room,
-                    )
-                    lessons.append(lesson)
+        with run_stats.timed("extract"):
+            for index, week in enumerate(week_elements):
+                logger.info(f"Парсим неделю {index + 1}/{len(week_elements)}.")
+                week_lessons, current_date = extract_week_lessons(
+                    week.get_attribute("outerHTML"), current_date
+                )
+                lessons.extend(week_lessons)
 
         logger.info(f"Парсинг завершен. Извлечено занятий: {len(lessons)}")
         return lessons
@@ -0,0 +1,313 @@
+"""
+Аренда (lease) на Postgres advisory lock, общая для всех процессов и
+контейнеров, работающих с одной БД.
+
+Сам взаимоисключающий замок — pg_try_advisory_lock на отдельном
+соединении: он снимается автоматически, если процесс-владелец умер или
+потерял соединение. Строка в таблице leases хранит владельца, heartbeat
+и результат последнего прогона, чтобы остальные могли:
+
+- wait      — дождаться освобождения и выполнить работу самим;
+- skip      — сразу отказаться, если работа уже идет;
+- piggyback — дождаться текущего прогона и взять его результат.
+
+Heartbeat в run() — не отдельный поток, а ход самой работы: каждая
+граница этапа (run_stats.timed) и, не чаще раза в heartbeat сек,
+счетчики прогона (hook в run_stats). Heartbeat пишется на соединении с
+замком, поэтому заодно проверяет, что замок еще наш; если аренду
+перехватили, на ближайшей границе этапа работа прерывается LeaseLost.
+
+Владелец, который держит замок, но не продвигается дальше stale_after
+(завис внутри этапа), перехватывается: его backend завершается через
+pg_terminate_backend, и аренда переходит к ожидающему. Пока владелец
+проходит этапы, heartbeat свежий и его не трогают.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+
+from schedule_vvsu.database import SessionLocal, engine
+from schedule_vvsu.db.models import Lease
+from schedule_vvsu.services import run_stats
+
+logger = logging.getLogger(__name__)
+
+LEASE_MODES = ("wait", "skip", "piggyback")
+
+
+def lock_key(name: str) -> int:
+    """Стабильный signed int64 ключ advisory lock для имени аренды."""
+    digest = hashlib.blake2b(f"schedule_vvsu:{name}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class LeaseLost(Exception):
+    """Аренду перехватили, пока работа шла: ее нужно прервать."""
+
+
+@dataclass
+class LeaseOutcome:
+    ran: bool  # работа выполнена в этом процессе
+    status: str  # done / error / skipped / timeout
+    detail: str = ""
+    result: object = None
+
+
+class _Holding:
+    """Аренда, под которой выполняется текущий run(); progress — hook run_stats."""
+
+    def __init__(self, lease: "AdvisoryLease", conn, generation: int):
+        self.lease = lease
+        self.conn = conn
+        self.generation = generation
+        self.beat_at = time.monotonic()
+        self.lost = False
+
+    def beat(self, force: bool):
+        if self.lost or (not force and time.monotonic() - self.beat_at < self.lease.heartbeat):
+            return
+        lease = self.lease
+        try:
+            # на соединении с замком: прошло — значит, замок еще держим мы
+            updated = self.conn.execute(
+                update(Lease)
+                .where(
+                    Lease.name == lease.name,
+                    Lease.generation == self.generation,
+                    Lease.backend_pid == func.pg_backend_pid(),
+                    Lease.status == "running",
+                )
+                .values(heartbeat_at=func.now())
+            ).rowcount
+        except Exception as e:
+            logger.warning(f"Аренда {lease.name}: heartbeat не записан: {e}")
+            # между этапами переживем, на границе этапа владение не подтверждено
+            self.lost = force
+            return
+        self.beat_at = time.monotonic()
+        if not updated:
+            self.lost = True
+
+    def progress(self, boundary: bool):
+        # на границе этапа heartbeat пишется всегда и проверяет владение
+        self.beat(force=boundary)
+        if boundary and self.lost:
+            raise LeaseLost(f"аренда {self.lease.name} перехвачена, прогон прерван")
+
+
+class AdvisoryLease:
+    def __init__(
+        self,
+        name: str,
+        heartbeat: float = 10.0,
+        stale_after: float = 60.0,
+        poll: float = 1.0,
+    ):
+        self.name = name
+        self.key = lock_key(name)
+        self.heartbeat = heartbeat
+        self.stale_after = stale_after
+        self.poll = poll
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+
+    # Состояние
+
+    def current(self) -> Optional[Lease]:
+        with SessionLocal() as session:
+            return session.get(Lease, self.name)
+
+    def is_held(self) -> bool:
+        """Держит ли кто-нибудь замок прямо сейчас (по pg_locks, без захвата)."""
+        unsigned = self.key & 0xFFFFFFFFFFFFFFFF
+        with engine.connect() as conn:
+            return bool(
+                conn.scalar(
+                    text(
+                        "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' "
+                        "AND granted AND objsubid = 1 "
+                        "AND classid::bigint = :hi AND objid::bigint = :lo)"
+                    ),
+                    {"hi": unsigned >> 32, "lo": unsigned & 0xFFFFFFFF},
+                )
+            )
+
+    # Захват
+
+    def _try_lock(self, conn) -> bool:
+        return bool(conn.scalar(text("SELECT pg_try_advisory_lock(:k)"), {"k": self.key}))
+
+    def take_over_if_stale(self):
+        """
+        Завершает backend владельца, который держит замок, но не шлет
+        heartbeat stale_after сек (в run() — не проходит этапы).
+        """
+        with engine.begin() as conn:
+            pid = conn.scalar(
+                select(Lease.backend_pid).where(
+                    Lease.name == self.name,
+                    Lease.status == "running",
+                    Lease.heartbeat_at < func.now() - timedelta(seconds=self.stale_after),
+                )
+            )
+            if pid:
+                logger.warning(
+                    f"Аренда {self.name}: владелец (backend {pid}) не продвигается, перехватываем"
+                )
+                conn.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": pid})
+                detail = "аренда перехвачена: владелец завис"
+                conn.execute(
+                    update(Lease)
+                    .where(Lease.name == self.name, Lease.backend_pid == pid)
+                    .values(
+                        status="error",
+                        detail=detail,
+                        last_generation=Lease.generation,
+                        last_status="error",
+                        last_detail=detail,
+                    )
+                )
+
+    def _mark_acquired(self, conn) -> int:
+        stmt = insert(Lease).values(
+            name=self.name,
+            holder=self.holder,
+            backend_pid=func.pg_backend_pid(),
+            generation=1,
+            status="running",
+            detail=None,
+            acquired_at=func.now(),
+            heartbeat_at=func.now(),
+            released_at=None,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Lease.name],
+            set_={
+                "holder": stmt.excluded.holder,
+                "backend_pid": stmt.excluded.backend_pid,
+                "generation": Lease.generation + 1,
+                "status": "running",
+                "detail": None,
+                "acquired_at": func.now(),
+                "heartbeat_at": func.now(),
+                "released_at": None,
+            },
+        ).returning(Lease.generation)
+        return conn.execute(stmt).scalar()
+
+    # Долгое владение (лидерство): замок держится на соединении conn
+    # вызывающего кода, heartbeat он шлет сам
+
+    def try_acquire(self, conn) -> Optional[int]:
+        """Захватывает аренду без ожидания; generation или None, если занята."""
+        if not self._try_lock(conn):
+            return None
+        return self._mark_acquired(conn)
+
+    def touch(self, conn, generation: int):
+        conn.execute(
+            update(Lease)
+            .where(Lease.name == self.name, Lease.generation == generation)
+            .values(heartbeat_at=func.now())
+        )
+
+    def release(self, conn, generation: int, detail: str = ""):
+        conn.execute(
+            update(Lease)
+            .where(Lease.name == self.name, Lease.generation == generation)
+            .values(
+                status="done",
+                detail=detail[:250],
+                released_at=func.now(),
+                last_generation=generation,
+                last_status="done",
+                last_detail=detail[:250],
+            )
+        )
+        conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": self.key})
+
+    def _wait_generation(self, generation: int, deadline: float) -> LeaseOutcome:
+        """Ждет окончания прогона generation и возвращает его результат."""
+        while time.monotonic() < deadline:
+            lease = self.current()
+            if lease is not None and (lease.last_generation or 0) >= generation:
+                if lease.last_generation == generation:
+                    return LeaseOutcome(False, lease.last_status, lease.last_detail or "")
+                return LeaseOutcome(False, "done", "прогон завершен другим процессом")
+            if not self.is_held():
+                # владелец умер, не успев записать результат
+                return LeaseOutcome(False, "error", "владелец аренды пропал")
+            self.take_over_if_stale()
+            time.sleep(self.poll)
+        return LeaseOutcome(False, "timeout", "не дождались текущего прогона")
+
+    def run(
+        self,
+        fn: Callable[[], object],
+        mode: str = "wait",
+        timeout: float = 3600.0,
+        describe: Callable[[object], str] = str,
+    ) -> LeaseOutcome:
+        """
+        Выполняет fn под арендой. Результат fn сохраняется в leases.detail
+        (через describe), исключение — как status=error и пробрасывается.
+        """
+        if mode not in LEASE_MODES:
+            raise ValueError(f"Unknown lease mode: {mode}")
+        deadline = time.monotonic() + timeout
+
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            while not self._try_lock(conn):
+                lease = self.current()
+                if mode == "skip":
+                    return LeaseOutcome(False, "skipped", "уже выполняется другим процессом")
+                if mode == "piggyback" and lease is not None and lease.status == "running":
+                    return self._wait_generation(lease.generation, deadline)
+                if time.monotonic() >= deadline:
+                    return LeaseOutcome(False, "timeout", "аренда не освободилась")
+                self.take_over_if_stale()
+                time.sleep(self.poll)
+
+            try:
+                generation = self._mark_acquired(conn)
+                token = run_stats.add_progress_hook(_Holding(self, conn, generation).progress)
+                status, detail = "error", ""
+                try:
+                    result = fn()
+                    status, detail = "done", describe(result)
+                    return LeaseOutcome(True, status, detail, result)
+                except Exception as e:
+                    detail = str(e) or type(e).__name__
+                    raise
+                finally:
+                    run_stats.remove_progress_hook(token)
+                    try:
+                        conn.execute(
+                            update(Lease)
+                            .where(Lease.name == self.name, Lease.generation == generation)
+                            .values(
+                                status=status,
+                                detail=detail[:250],
+                                released_at=func.now(),
+                                last_generation=generation,
+                                last_status=status,
+                                last_detail=detail[:250],
+                            )
+                        )
+                    except Exception as e:
+                        logger.warning(f"Аренда {self.name}: результат не записан: {e}")
+            finally:
+                try:
+                    conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": self.key})
+                except Exception as e:
+                    # соединение могли завершить при перехвате — замок снят вместе с ним
+                    logger.warning(f"Аренда {self.name}: unlock не выполнен: {e}")
@@ -0,0 +1,151 @@
+"""
+Обслуживание БД: удаление старых записей и свертка parse_runs.
+
+Удаление идет пачками по RETENTION_BATCH_SIZE строк, каждая пачка в своей
+транзакции, чтобы не держать долгих блокировок и не раздувать WAL.
+Старые parse_runs сворачиваются в parse_run_daily по одному дню за
+транзакцию: вставка сводки и удаление сырых строк либо проходят вместе,
+либо не проходят вовсе.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict
+
+import pytz
+from sqlalchemy import Date, cast, delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from schedule_vvsu.config import get_settings
+from schedule_vvsu.database import engine
+from schedule_vvsu.db.models import LogEntry, ParseRun, ParseRunDaily, SchedulerStatus, SyncJob
+from schedule_vvsu.services.profiling import prune_profiles
+
+logger = logging.getLogger("cli_logger")
+settings = get_settings()
+
+RUN_OK_STATUSES = ("success", "done")
+MAINTAINED_TABLES = ("logs", "parse_runs", "parse_run_daily", "scheduler_status", "sync_jobs")
+
+
+def _delete_in_batches(table, where, batch_size: int) -> int:
+    """DELETE ... WHERE id IN (SELECT id ... LIMIT batch) до исчерпания."""
+    total = 0
+    while True:
+        ids = select(table.id).where(*where).order_by(table.id).limit(batch_size)
+        with engine.begin() as conn:
+            deleted = conn.execute(delete(table).where(table.id.in_(ids))).rowcount
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def purge_logs(days: int, batch_size: int) -> int:
+    if days <= 0:
+        return 0
+    # timestamp в logs — UTC
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    return _delete_in_batches(LogEntry, [LogEntry.timestamp < cutoff], batch_size)
+
+
+def purge_scheduler_status(days: int, batch_size: int) -> int:
+    if days <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    # последняя запись — текущий статус планировщика, ее не трогаем
+    latest = (
+        select(SchedulerStatus.id)
+        .order_by(SchedulerStatus.updated_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    return _delete_in_batches(
+        SchedulerStatus,
+        [SchedulerStatus.updated_at < cutoff, SchedulerStatus.id != latest],
+        batch_size,
+    )
+
+
+def purge_sync_jobs(days: int, batch_size: int) -> int:
+    if days <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    return _delete_in_batches(
+        SyncJob,
+        [SyncJob.created_at < cutoff, SyncJob.status.in_(("done", "error"))],
+        batch_size,
+    )
+
+
+def rollup_parse_runs(days: int) -> int:
+    """
+    Сворачивает parse_runs старше days дней в parse_run_daily.
+    Возвращает число удаленных сырых строк.
+    """
+    if days <= 0:
+        return 0
+    # timestamp в parse_runs — локальное время без tz, режем по границе суток
+    today = datetime.now(pytz.timezone(settings.TIMEZONE)).date()
+    cutoff = datetime.combine(today - timedelta(days=days), datetime.min.time())
+    run_day = cast(func.date_trunc("day", ParseRun.timestamp), Date)
+
+    with engine.connect() as conn:
+        days_to_roll = conn.scalars(
+            select(run_day).where(ParseRun.timestamp < cutoff).group_by(run_day).order_by(run_day)
+        ).all()
+
+    total = 0
+    for day in days_to_roll:
+        start = datetime.combine(day, datetime.min.time())
+        in_day = [ParseRun.timestamp >= start, ParseRun.timestamp < start + timedelta(days=1)]
+        with engine.begin() as conn:
+            ok, err, count = conn.execute(
+                select(
+                    func.count().filter(ParseRun.status.in_(RUN_OK_STATUSES)),
+                    func.count().filter(ParseRun.status == "error"),
+                    func.count(),
+                ).where(*in_day)
+            ).one()
+            stmt = insert(ParseRunDaily).values(day=day, ok=ok, err=err, total=count)
+            conn.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[ParseRunDaily.day],
+                    set_={
+                        "ok": ParseRunDaily.ok + stmt.excluded.ok,
+                        "err": ParseRunDaily.err + stmt.excluded.err,
+                        "total": ParseRunDaily.total + stmt.excluded.total,
+                    },
+                )
+            )
+            total += conn.execute(delete(ParseRun).where(*in_day)).rowcount
+    return total
+
+
+def vacuum_tables():
+    """VACUUM ANALYZE обслуживаемых таблиц (вне транзакции)."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in MAINTAINED_TABLES:
+            conn.execute(text(f"VACUUM (ANALYZE) {table}"))
+
+
+def run_maintenance(vacuum: bool = False) -> Dict[str, int]:
+    batch = settings.RETENTION_BATCH_SIZE
+    result = {
+        "logs": purge_logs(settings.LOG_RETENTION_DAYS, batch),
+        "parse_runs": rollup_parse_runs(settings.PARSE_RUN_RETENTION_DAYS),
+        "scheduler_status": purge_scheduler_status(
+            settings.SCHEDULER_STATUS_RETENTION_DAYS, batch
+        ),
+        "sync_jobs": purge_sync_jobs(settings.SYNC_JOB_RETENTION_DAYS, batch),
+        "profiles": prune_profiles(),
+    }
+    if vacuum:
+        vacuum_tables()
+    logger.info(
+        "Обслуживание БД: удалено logs=%(logs)d, parse_runs=%(parse_runs)d (свернуто), "
+        "scheduler_status=%(scheduler_status)d, sync_jobs=%(sync_jobs)d, "
+        "profiles=%(profiles)d",
+        result,
+    )
+    return result
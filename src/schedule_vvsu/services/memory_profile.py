@@ -0,0 +1,195 @@
+"""
+Память прогона синхронизации: tracemalloc и пиковый RSS по этапам.
+
+Включается режимом профилирования memory (services/profiling.py). На
+каждой границе этапа (run_stats.timed) снимается снимок tracemalloc, а в
+parse_runs.stats["memory"] попадает по этапу:
+- py_peak_kb / py_end_kb   — пик и остаток памяти Python-объектов;
+- rss_peak_kb / rss_end_kb — пиковый и текущий RSS процесса.
+
+Пиковый RSS этапа на Linux считается сбросом VmHWM (/proc/self/clear_refs);
+где сброс недоступен, это максимум RSS с запуска процесса (rss_peak_scope =
+"process"). Отчет с top-N мест выделения памяти по этапам сохраняется
+рядом с остальными файлами профиля (<id>.txt). Память браузера — отдельный
+процесс Firefox/geckodriver — сюда не входит.
+"""
+from __future__ import annotations
+
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PROC_STATUS = Path("/proc/self/status")
+_PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+# собственные выделения трекера и tracemalloc в отчет не попадают
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+)
+
+
+def _status_kb(field: str) -> Optional[int]:
+    try:
+        for line in _PROC_STATUS.read_text().splitlines():
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def current_rss_kb() -> Optional[int]:
+    return _status_kb("VmRSS")
+
+
+def peak_rss_kb() -> Optional[int]:
+    peak = _status_kb("VmHWM")
+    if peak is not None or resource is None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def reset_peak_rss() -> bool:
+    """Сбрасывает VmHWM до текущего RSS (Linux 4.0+); False — не вышло."""
+    try:
+        _PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def _kb(size: Optional[int]) -> Optional[int]:
+    return None if size is None else size // 1024
+
+
+def _max(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    if a is None or b is None:
+        return a if b is None else b
+    return max(a, b)
+
+
+class _Frame:
+    __slots__ = ("name", "snapshot", "py_peak", "rss_peak")
+
+    def __init__(self, name: str, snapshot):
+        self.name = name
+        self.snapshot = snapshot
+        self.py_peak = 0
+        self.rss_peak: Optional[int] = None
+
+
+class MemoryTracker:
+    """
+    Замеры памяти по этапам. Этапы могут быть вложенными: пик этапа
+    учитывается и во всех объемлющих, повторный вход в этап дает максимум
+    пиков и последний остаток.
+    """
+
+    def __init__(self, top: int = 15):
+        self.top = top
+        self.stages: Dict[str, dict] = {}
+        self.reports: List[Tuple[str, List[str]]] = []
+        self.py_peak_kb = 0
+        self.rss_peak_kb: Optional[int] = None
+        self._stack: List[_Frame] = []
+        self._own_tracing = False
+        self._rss_resettable = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracing = True
+        self._rss_resettable = reset_peak_rss()
+        tracemalloc.reset_peak()
+        self._stack.append(_Frame("run", self._snapshot()))
+
+    def stop(self):
+        if not self._stack:
+            return
+        self._fold()
+        root = self._stack[0]
+        self._stack.clear()
+        self.py_peak_kb = _kb(root.py_peak)
+        self.rss_peak_kb = root.rss_peak
+        final = self._snapshot().statistics("lineno")[: self.top]
+        self.reports.append(("итог: занято в конце прогона", [str(s) for s in final]))
+        if self._own_tracing:
+            tracemalloc.stop()
+
+    def enter(self, name: str):
+        if not self._stack:
+            return
+        self._fold()
+        self._reset()
+        self._stack.append(_Frame(name, self._snapshot()))
+
+    def exit(self, name: str):
+        if len(self._stack) < 2:
+            return
+        self._fold()
+        frame = self._stack.pop()
+        py_end, _ = tracemalloc.get_traced_memory()
+        rss_end = current_rss_kb()
+        snapshot = self._snapshot()
+        growth = snapshot.compare_to(frame.snapshot, "lineno")[: self.top]
+        self.reports.append((name, [str(s) for s in growth]))
+
+        entry = self.stages.setdefault(name, {"py_peak_kb": 0, "rss_peak_kb": None})
+        entry["py_peak_kb"] = max(entry["py_peak_kb"], _kb(frame.py_peak))
+        entry["py_end_kb"] = _kb(py_end)
+        entry["rss_peak_kb"] = _max(entry["rss_peak_kb"], frame.rss_peak)
+        entry["rss_end_kb"] = rss_end
+        self._reset()
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def _fold(self):
+        """Переносит пики с момента последнего сброса во все открытые этапы."""
+        _, py_peak = tracemalloc.get_traced_memory()
+        rss_peak = peak_rss_kb()
+        for frame in self._stack:
+            frame.py_peak = max(frame.py_peak, py_peak)
+            frame.rss_peak = _max(frame.rss_peak, rss_peak)
+
+    def _reset(self):
+        tracemalloc.reset_peak()
+        if self._rss_resettable:
+            reset_peak_rss()
+
+    def to_dict(self) -> dict:
+        py_peak_kb, rss_peak_kb = self.py_peak_kb, self.rss_peak_kb
+        if self._stack:
+            # прогон еще идет (запись в parse_runs делается до stop())
+            self._fold()
+            py_peak_kb, rss_peak_kb = _kb(self._stack[0].py_peak), self._stack[0].rss_peak
+        return {
+            "stages": self.stages,
+            "py_peak_kb": py_peak_kb,
+            "rss_peak_kb": rss_peak_kb,
+            "rss_peak_scope": "stage" if self._rss_resettable else "process",
+        }
+
+    def report(self) -> str:
+        lines = [
+            f"Пик Python-объектов: {self.py_peak_kb} KiB, пиковый RSS: {self.rss_peak_kb} KiB",
+            "",
+            f"{'этап':<18}{'py пик':>12}{'py конец':>12}{'RSS пик':>12}{'RSS конец':>12}",
+        ]
+        for name, entry in self.stages.items():
+            lines.append(
+                f"{name:<18}{entry['py_peak_kb']:>12}{entry['py_end_kb']:>12}"
+                f"{str(entry['rss_peak_kb']):>12}{str(entry['rss_end_kb']):>12}"
+            )
+        for title, stats in self.reports:
+            suffix = f" (top {self.top}, прирост за этап)" if title in self.stages else ""
+            lines += ["", f"== {title}{suffix} =="]
+            lines += stats or ["(нет выделений)"]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,104 @@
+"""
+Общий LISTEN на процесс API.
+
+Одно asyncpg-соединение держит LISTEN на все нужные каналы и раздает
+NOTIFY подписчикам, так что число открытых дашбордов не влияет на число
+соединений к БД.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import asyncpg
+
+from schedule_vvsu.database import LISTEN_DSN
+
+logger = logging.getLogger(__name__)
+
+# callback(payload); payload=None — соединение переподключилось,
+# уведомления за время разрыва могли потеряться
+Callback = Callable[[Optional[str]], None]
+
+
+class PgListener:
+    def __init__(self, dsn: str, min_delay: float = 1.0, max_delay: float = 30.0):
+        self._dsn = dsn
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._callbacks: Dict[str, List[Callback]] = defaultdict(list)
+        self._conn: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def add_callback(self, channel: str, callback: Callback):
+        first = not self._callbacks[channel]
+        self._callbacks[channel].append(callback)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        elif first and self._conn is not None and not self._conn.is_closed():
+            await self._conn.add_listener(channel, self._dispatch)
+
+    async def remove_callback(self, channel: str, callback: Callback):
+        callbacks = self._callbacks.get(channel, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self._callbacks.pop(channel, None)
+            if self._conn is not None and not self._conn.is_closed():
+                await self._conn.remove_listener(channel, self._dispatch)
+
+    def _dispatch(self, conn, pid, channel, payload):
+        for callback in list(self._callbacks.get(channel, [])):
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception("Ошибка обработчика NOTIFY %s", channel)
+
+    async def _run(self):
+        delay = self._min_delay
+        reconnect = False
+        while True:
+            lost = asyncio.Event()
+            try:
+                self._conn = await asyncpg.connect(self._dsn)
+                self._conn.add_termination_listener(lambda conn: lost.set())
+                for channel in list(self._callbacks):
+                    await self._conn.add_listener(channel, self._dispatch)
+                logger.info("LISTEN %s", ", ".join(self._callbacks) or "-")
+                delay = self._min_delay
+                if reconnect:
+                    for channel in list(self._callbacks):
+                        self._dispatch(self._conn, None, channel, None)
+                await lost.wait()
+                logger.warning("LISTEN-соединение потеряно, переподключаюсь")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("LISTEN: не удалось подключиться (%s), повтор через %.0f с", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self._max_delay)
+            reconnect = True
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+
+_listener: Optional[PgListener] = None
+
+
+def get_pg_listener() -> PgListener:
+    global _listener
+    if _listener is None:
+        _listener = PgListener(LISTEN_DSN)
+    return _listener
@@ -0,0 +1,245 @@
+"""
+Профилирование прогонов синхронизации (включается явно).
+
+Режимы (SYNC_PROFILE, vvsu-cli sync-now --profile, POST /api/sync?profile=):
+- off      — ничего не делается, накладных расходов нет;
+- sample   — фоновый поток раз в PROFILE_SAMPLE_INTERVAL снимает стек
+             потока прогона; результат — .folded (свернутые стеки, формат
+             flamegraph.pl / speedscope);
+- cprofile — детерминированный cProfile, результат — .pstats;
+- full     — sample и cprofile сразу;
+- memory   — tracemalloc и пиковый RSS по этапам прогона, результат —
+             отчет .txt с top-N мест выделения памяти и сводка в
+             parse_runs.stats["memory"] (services/memory_profile.py).
+             Заметно замедляет прогон, поэтому с full не совмещается.
+
+Если интерпретатор не умеет читать стеки чужих потоков, sample
+откатывается на cprofile. Каждый профиль — файлы <id>.folded/.pstats/.txt
+и <id>.json с описанием прогона в PROFILE_DIR; старые удаляются по
+PROFILE_KEEP и PROFILE_RETENTION_DAYS.
+"""
+from __future__ import annotations
+
+import cProfile
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from schedule_vvsu.config import get_settings
+from schedule_vvsu.services.memory_profile import MemoryTracker
+from schedule_vvsu.services.run_stats import RunStats
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PROFILE_MODES = ("off", "sample", "cprofile", "full", "memory")
+PROFILE_SUFFIXES = (".folded", ".pstats", ".txt", ".json")
+_NAME_RE = re.compile(r"^[\w.-]+\.(folded|pstats|txt|json)$")
+_UNSAFE_RE = re.compile(r"[^\w-]")
+
+
+def profile_dir() -> Path:
+    return Path(settings.PROFILE_DIR)
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    # site-packages/googleapiclient/http.py -> googleapiclient/http.py
+    for marker in ("site-packages/", "src/"):
+        if marker in path:
+            path = path.rsplit(marker, 1)[1]
+            break
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Сэмплирующий профилировщик одного потока на sys._current_frames()."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    @staticmethod
+    def supported() -> bool:
+        return hasattr(sys, "_current_frames")
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def write_folded(self, path: Path):
+        with path.open("w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def resolve_mode(mode: Optional[str]) -> str:
+    mode = (mode or settings.SYNC_PROFILE or "off").lower()
+    if mode not in PROFILE_MODES:
+        logger.warning(f"Неизвестный режим профилирования {mode!r}, профилирование выключено")
+        return "off"
+    if mode == "sample" and not StackSampler.supported():
+        return "cprofile"
+    return mode
+
+
+@contextmanager
+def profile_run(
+    mode: Optional[str], label: str, stats: Optional[RunStats] = None
+) -> Iterator[Optional[dict]]:
+    """
+    Оборачивает прогон профилировщиком; отдает словарь с описанием
+    профиля (его можно дополнить), None — профилирование выключено.
+    stats — телеметрия прогона, по этапам которой режим memory делает замеры.
+    """
+    mode = resolve_mode(mode)
+    if mode == "off":
+        yield None
+        return
+
+    started = datetime.now()
+    safe_label = _UNSAFE_RE.sub("_", label)
+    profile_id = f"sync-{started:%Y%m%d-%H%M%S}-{safe_label}"
+    meta: dict = {"id": profile_id, "label": label, "mode": mode, "started": started.isoformat()}
+
+    sampler = None
+    if mode in ("sample", "full"):
+        sampler = StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL)
+        sampler.start()
+    profiler = None
+    if mode in ("cprofile", "full"):
+        profiler = cProfile.Profile()
+        profiler.enable()
+    memory = None
+    if mode == "memory":
+        memory = MemoryTracker(settings.PROFILE_MEMORY_TOP)
+        memory.start()
+        if stats is not None:
+            stats.memory = memory
+
+    t0 = time.monotonic()
+    try:
+        yield meta
+        meta.setdefault("status", "success")
+    except BaseException:
+        meta.setdefault("status", "error")
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+        if memory is not None:
+            memory.stop()
+        meta["duration_s"] = round(time.monotonic() - t0, 3)
+        try:
+            _save(profile_id, meta, sampler, profiler, memory)
+        except Exception as e:
+            logger.warning(f"Профиль {profile_id} не сохранен: {e}")
+
+
+def _save(profile_id: str, meta: dict, sampler, profiler, memory):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    if sampler is not None:
+        sampler.write_folded(directory / f"{profile_id}.folded")
+        meta["samples"] = sampler.samples
+        meta["interval_s"] = sampler.interval
+    if profiler is not None:
+        profiler.dump_stats(str(directory / f"{profile_id}.pstats"))
+    if memory is not None:
+        (directory / f"{profile_id}.txt").write_text(memory.report(), encoding="utf-8")
+        meta["py_peak_kb"] = memory.py_peak_kb
+        meta["rss_peak_kb"] = memory.rss_peak_kb
+    (directory / f"{profile_id}.json").write_text(
+        json.dumps(meta, ensure_ascii=False), encoding="utf-8"
+    )
+    logger.info(f"Профиль прогона сохранен: {directory / profile_id} ({meta['mode']})")
+    prune_profiles()
+
+
+# Хранение и выдача
+
+
+def _groups() -> Dict[str, List[Path]]:
+    groups: Dict[str, List[Path]] = {}
+    directory = profile_dir()
+    if not directory.is_dir():
+        return groups
+    for path in directory.iterdir():
+        if path.suffix in PROFILE_SUFFIXES and path.is_file():
+            groups.setdefault(path.stem, []).append(path)
+    return groups
+
+
+def prune_profiles(keep: Optional[int] = None, days: Optional[int] = None) -> int:
+    """Удаляет профили сверх keep последних и старше days дней."""
+    keep = settings.PROFILE_KEEP if keep is None else keep
+    days = settings.PROFILE_RETENTION_DAYS if days is None else days
+    cutoff = time.time() - timedelta(days=days).total_seconds() if days > 0 else None
+    groups = sorted(
+        _groups().items(),
+        key=lambda item: max(p.stat().st_mtime for p in item[1]),
+        reverse=True,
+    )
+    removed = 0
+    for index, (_, paths) in enumerate(groups):
+        newest = max(p.stat().st_mtime for p in paths)
+        if (keep > 0 and index >= keep) or (cutoff is not None and newest < cutoff):
+            for path in paths:
+                path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def list_profiles() -> List[dict]:
+    result = []
+    for profile_id, paths in _groups().items():
+        meta: dict = {"id": profile_id}
+        meta_path = next((p for p in paths if p.suffix == ".json"), None)
+        if meta_path is not None:
+            try:
+                meta.update(json.loads(meta_path.read_text(encoding="utf-8")))
+            except ValueError:
+                pass
+        meta["files"] = sorted(
+            ({"name": p.name, "size": p.stat().st_size} for p in paths),
+            key=lambda f: f["name"],
+        )
+        meta.setdefault("started", datetime.fromtimestamp(paths[0].stat().st_mtime).isoformat())
+        result.append(meta)
+    return sorted(result, key=lambda m: m["started"], reverse=True)
+
+
+def profile_file(name: str) -> Optional[Path]:
+    """Путь к файлу профиля по имени; None — имя недопустимо или файла нет."""
+    if not _NAME_RE.match(name):
+        return None
+    path = profile_dir() / name
+    return path if path.is_file() else None
@@ -0,0 +1,154 @@
+"""
+Телеметрия прогона синхронизации: длительности этапов и счетчики.
+
+_run_pipeline открывает collect() на весь прогон; код парсера и
+синхронизации календаря размечает этапы через timed("login") и т.п.,
+а счетчики — через incr(). Вне collect() вызовы ничего не делают.
+Каждый этап — еще и спан sync.<этап> в трассе прогона (tracing.py),
+а в режиме профилирования memory — точка замера памяти (memory_profile.py).
+Границы этапов и счетчики — это и ход прогона для тех, кто следит, не
+завис ли он (add_progress_hook): heartbeat аренды "sync" (leases.py) и
+задачи sync_jobs (sync_run.py).
+Итог сохраняется в parse_runs.stats / parse_runs.duration_ms и
+агрегируется в /api/runs/stats.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from schedule_vvsu import tracing
+
+# этапы в порядке прохождения (для отчета); прочие имена тоже допустимы.
+# Каждое имя размечается в одном месте, иначе длительности разных этапов
+# сложатся в один
+STAGES = (
+    "browser_start",
+    "login",
+    "schedule_load",
+    "extract",
+    "snapshot_load",  # прошлое расписание из БД, до сохранения нового
+    "db_save",
+    "calendar_auth",
+    "calendar_lookup",
+    "plan",
+    "apply",
+    "final_save",  # повторное сохранение после синхронизации календаря
+)
+
+_current: ContextVar[Optional["RunStats"]] = ContextVar("run_stats", default=None)
+
+# hook(boundary): boundary=True — граница этапа (всегда), False — счетчик
+# или вызов API (часто, hook сам решает, как часто на них реагировать).
+# Исключение из hook на границе этапа прерывает прогон.
+ProgressHook = Callable[[bool], None]
+_hooks: ContextVar[Tuple[ProgressHook, ...]] = ContextVar("run_progress_hooks", default=())
+
+
+def add_progress_hook(hook: ProgressHook) -> Token:
+    return _hooks.set(_hooks.get() + (hook,))
+
+
+def remove_progress_hook(token: Token):
+    _hooks.reset(token)
+
+
+def _progress(boundary: bool):
+    for hook in _hooks.get():
+        hook(boundary)
+
+
+class RunStats:
+    def __init__(self):
+        self.stages: Dict[str, float] = {}  # мс, повторные входы суммируются
+        self.counters: Dict[str, int] = {}
+        self.calls: Dict[str, int] = {}  # вызовы Google API по methodId
+        self.trace_id: Optional[str] = None  # трасса прогона (tracing.py)
+        self.memory = None  # MemoryTracker в режиме профилирования memory
+        self._started = time.monotonic()
+        self._finished: Optional[float] = None
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        _progress(True)
+        memory = self.memory
+        if memory is not None:
+            memory.enter(name)
+        start = time.monotonic()
+        try:
+            with tracing.span(f"sync.{name}"):
+                yield
+        finally:
+            elapsed = (time.monotonic() - start) * 1000
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            if memory is not None:
+                memory.exit(name)
+        _progress(True)
+
+    def incr(self, key: str, n: int = 1):
+        self.counters[key] = self.counters.get(key, 0) + n
+        _progress(False)
+
+    def call(self, method: str):
+        self.calls[method] = self.calls.get(method, 0) + 1
+        _progress(False)
+
+    def finish(self):
+        if self._finished is None:
+            self._finished = time.monotonic()
+
+    @property
+    def duration_ms(self) -> int:
+        end = self._finished if self._finished is not None else time.monotonic()
+        return int((end - self._started) * 1000)
+
+    def to_dict(self) -> dict:
+        result = {
+            "stages": {k: round(v, 1) for k, v in self.stages.items()},
+            "counters": dict(self.counters),
+            "calls": dict(self.calls),
+        }
+        if self.trace_id:
+            result["trace_id"] = self.trace_id
+        if self.memory is not None:
+            result["memory"] = self.memory.to_dict()
+        return result
+
+
+@contextmanager
+def collect() -> Iterator[RunStats]:
+    stats = RunStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        stats.finish()
+        _current.reset(token)
+
+
+def current_stats() -> Optional[RunStats]:
+    return _current.get()
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    with stats.timed(name):
+        yield
+
+
+def incr(key: str, n: int = 1):
+    stats = _current.get()
+    if stats is not None:
+        stats.incr(key, n)
+
+
+def call(method: str):
+    stats = _current.get()
+    if stats is not None:
+        stats.call(method)
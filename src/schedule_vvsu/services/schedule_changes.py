@@ -0,0 +1,119 @@
+"""
+Публикация изменений расписания после синхронизации.
+
+sync_schedule_to_calendar уже считает разницу с прошлым расписанием
+(добавленные, удаленные и измененные занятия); после сохранения она
+уходит одним NOTIFY schedule_changes. Бот слушает канал и присылает
+админам сводку (tg_bot/app/change_digest.py), так что опрашивать
+/api/scheduler/overview ради новостей не нужно.
+
+Формат полезной нагрузки (JSON):
+
+    {"job_id": 12, "added": 3, "removed": 1, "changed": 2, "omitted": 0,
+     "items": [{"k": "<ключ>", "before": {...} | null, "after": {...} | null}]}
+
+before/after — краткое занятие (d — дата, t — время, s — дисциплина,
+p — преподаватель, r — аудитория); null означает "не было" / "больше
+нет". В NOTIFY помещается не больше 8000 байт, поэтому items
+обрезаются, а omitted — сколько изменений в них не попало. Прошедшие
+занятия не публикуются.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func, select
+
+from schedule_vvsu.database import engine
+from schedule_vvsu.dto.models import Lesson
+from schedule_vvsu.services import sync_run
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "schedule_changes"
+# лимит NOTIFY — 8000 байт; запас на счетчики и экранирование
+PAYLOAD_LIMIT = 7000
+
+
+def brief(lesson: Lesson) -> dict:
+    start, end = lesson.get_start_end_times()
+    return {
+        "d": lesson.get_date().isoformat(),
+        "t": f"{start.strftime('%H:%M')}–{end.strftime('%H:%M')}",
+        "s": lesson.discipline,
+        "p": lesson.teacher,
+        "r": lesson.auditorium,
+    }
+
+
+def build_payload(
+    added: List[Lesson],
+    removed: List[Lesson],
+    changed: List[Lesson],
+    prev_by_key: Dict[str, Lesson],
+    key_of: Callable[[Lesson], str],
+    today: Optional[date] = None,
+) -> Optional[dict]:
+    """Будущие изменения в формате канала; None, если публиковать нечего."""
+    today = today or date.today()
+
+    def short(key: str) -> str:
+        return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+    entries = []
+    for lesson in added:
+        entries.append(("added", lesson, None, lesson))
+    for lesson in removed:
+        entries.append(("removed", lesson, lesson, None))
+    for lesson in changed:
+        entries.append(("changed", lesson, prev_by_key[key_of(lesson)], lesson))
+    entries = [e for e in entries if e[1].get_date() >= today]
+    if not entries:
+        return None
+    entries.sort(key=lambda e: (e[1].get_date(), e[1].get_start_end_times()[0]))
+
+    run = sync_run.current_run()
+    payload = {
+        "job_id": run.job_id if run is not None else None,
+        "added": sum(1 for e in entries if e[0] == "added"),
+        "removed": sum(1 for e in entries if e[0] == "removed"),
+        "changed": sum(1 for e in entries if e[0] == "changed"),
+        "omitted": 0,
+        "items": [],
+    }
+    size = len(json.dumps(payload, ensure_ascii=False).encode())
+    for i, (_, lesson, before, after) in enumerate(entries):
+        item = {
+            "k": short(key_of(lesson)),
+            "before": brief(before) if before is not None else None,
+            "after": brief(after) if after is not None else None,
+        }
+        item_size = len(json.dumps(item, ensure_ascii=False).encode()) + 1
+        if size + item_size > PAYLOAD_LIMIT:
+            payload["omitted"] = len(entries) - i
+            break
+        payload["items"].append(item)
+        size += item_size
+    return payload
+
+
+def publish(payload: Optional[dict]):
+    if payload is None:
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                select(func.pg_notify(CHANNEL, json.dumps(payload, ensure_ascii=False)))
+            )
+        logger.info(
+            "Изменения расписания опубликованы: +%d −%d ~%d",
+            payload["added"],
+            payload["removed"],
+            payload["changed"],
+        )
+    except Exception as e:
+        logger.warning(f"NOTIFY {CHANNEL} не отправлен: {e}")
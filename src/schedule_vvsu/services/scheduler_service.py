@@ -0,0 +1,383 @@
+"""
+Планировщик синхронизаций внутри процесса (API или schedule-sync).
+
+SchedulerService запускается в каждом процессе с SCHEDULER_SERVICE_ENABLED,
+но задания выполняет только лидер — владелец аренды "scheduler"
+(services/leases.py). Замок держится на выделенном соединении, поэтому
+при падении процесса он снимается сам и лидером становится следующий
+кандидат; остальные кандидаты раз в SCHEDULER_POLL_INTERVAL пробуют его
+захватить.
+
+Состояние хранится в settings: SCHEDULER_ENABLED (включен ли планировщик)
+и PARSING_INTERVALS (время запусков). Их изменение рассылает NOTIFY
+scheduler_config (db/models.py), и лидер сразу добавляет и снимает
+cron-задания — без перезапуска процесса.
+
+Сами задания со временем следующего запуска лежат в таблице
+apscheduler_jobs, поэтому запуск, пропущенный, пока лидера не было,
+выполняется новым лидером — один раз (SCHEDULER_COALESCE), если опоздание
+не больше SCHEDULER_MISFIRE_GRACE. Каждый запуск сдвигается на случайные
+0..SCHEDULER_JITTER секунд, чтобы установки с одинаковым расписанием не
+приходили в ЛК и Google API в одну минуту.
+
+В режиме SCHEDULER_MODE=adaptive вместо cron-заданий по PARSING_INTERVALS
+работает одно задание adaptive_sync: после каждого завершенного прогона
+лидер пересчитывает его время по services/sync_policy.py.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import select as _select
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import pytz
+
+from apscheduler.events import EVENT_JOB_MISSED
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from sqlalchemy import select, text
+
+from schedule_vvsu.config import get_settings
+from schedule_vvsu.database import SessionLocal, engine, set_setting
+from schedule_vvsu.db.models import SchedulerStatus, Setting
+from schedule_vvsu.services.leases import AdvisoryLease
+from schedule_vvsu.services import sync_policy
+from schedule_vvsu.services.maintenance import run_maintenance
+from schedule_vvsu.services.sync_jobs import enqueue_sync
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+NOTIFY_CHANNEL = "scheduler_config"
+CONFIG_KEYS = (
+    "SCHEDULER_ENABLED",
+    "PARSING_INTERVALS",
+    "SCHEDULER_MODE",
+    "SYNC_INTERVAL_OVERRIDE",
+    "SYNC_INTERVAL_OVERRIDE_UNTIL",
+)
+DEFAULT_INTERVALS = "09:00"
+SYNC_JOB_PREFIX = "sync_"
+ADAPTIVE_JOB = "adaptive_sync"
+JOBS_TABLE = "apscheduler_jobs"
+
+scheduler_lease = AdvisoryLease(
+    "scheduler",
+    heartbeat=settings.SCHEDULER_POLL_INTERVAL,
+    stale_after=settings.SCHEDULER_POLL_INTERVAL * 6,
+)
+
+
+def parse_intervals(value: Optional[str]) -> List[Tuple[int, int]]:
+    """'09:00, 14:30' -> [(9, 0), (14, 30)]; неверные значения пропускаются."""
+    result = set()
+    for item in (value or DEFAULT_INTERVALS).split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            hour, minute = map(int, item.split(":"))
+            if not (0 <= hour < 24 and 0 <= minute < 60):
+                raise ValueError(item)
+        except ValueError:
+            logger.warning(f"Неверное время запуска в PARSING_INTERVALS: {item!r}")
+            continue
+        result.add((hour, minute))
+    return sorted(result)
+
+
+def read_config() -> Tuple[bool, List[Tuple[int, int]], sync_policy.SyncPolicy]:
+    """(SCHEDULER_ENABLED, PARSING_INTERVALS, режим и ручной интервал) из settings."""
+    with SessionLocal() as session:
+        values = dict(
+            session.execute(
+                select(Setting.key, Setting.value).where(Setting.key.in_(CONFIG_KEYS))
+            ).all()
+        )
+    enabled = (values.get("SCHEDULER_ENABLED") or "true").lower() == "true"
+    return (
+        enabled,
+        parse_intervals(values.get("PARSING_INTERVALS")),
+        sync_policy.SyncPolicy.from_values(values),
+    )
+
+
+def set_scheduler_enabled(enabled: bool):
+    """Включает/выключает планировщик во всех процессах (через NOTIFY)."""
+    set_setting("SCHEDULER_ENABLED", "true" if enabled else "false")
+
+
+def record_scheduler_status(status: str):
+    session = SessionLocal()
+    try:
+        session.add(SchedulerStatus(status=status, updated_at=datetime.utcnow()))
+        session.commit()
+    finally:
+        session.close()
+
+
+def scheduler_state() -> dict:
+    """Состояние планировщика по БД — одинаково для любого процесса API."""
+    enabled, intervals, policy = read_config()
+    running = enabled and scheduler_lease.is_held()
+    lease = scheduler_lease.current() if running else None
+    with engine.connect() as conn:
+        # next_run_time — unix-время с учетом jitter
+        next_runs = conn.execute(
+            text(f"SELECT id, next_run_time FROM {JOBS_TABLE} ORDER BY next_run_time")
+        ).all()
+    tz = pytz.timezone(settings.TIMEZONE)
+    return {
+        "status": "running" if running else "stopped",
+        "enabled": enabled,
+        "leader": lease.holder if lease else None,
+        "since": lease.acquired_at.isoformat() if lease else None,
+        "intervals": [f"{h:02d}:{m:02d}" for h, m in intervals],
+        "mode": policy.mode,
+        "override": policy.active_override(sync_policy.now_local()),
+        "override_until": policy.override_until.isoformat() if policy.override_until else None,
+        # последнее решение адаптивного режима: интервал, причина, следующий запуск
+        "policy": sync_policy.load_state(),
+        "next_runs": {
+            job_id: datetime.fromtimestamp(ts, tz).isoformat() if ts is not None else None
+            for job_id, ts in next_runs
+        },
+    }
+
+
+def sync_task():
+    """cron-запуск: ставим задачу в очередь, выполнит ее первый свободный воркер."""
+    logger.info("Запуск задачи синхронизации расписания из личного кабинета.")
+    enqueue_sync("cron")
+
+
+class SchedulerService:
+    """Кандидат в лидеры планировщика; у лидера работает BackgroundScheduler."""
+
+    def __init__(self):
+        self.poll_interval = settings.SCHEDULER_POLL_INTERVAL
+        self.lease = scheduler_lease
+        self.enabled = False
+        self.intervals: List[Tuple[int, int]] = []
+        self.policy = sync_policy.SyncPolicy()
+        self._generation: Optional[int] = None
+        self._scheduler: Optional[BackgroundScheduler] = None
+        self._stop = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._generation is not None
+
+    # Запуск и остановка
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        os.write(self._wake_w, b"x")
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def run(self):
+        """Основной цикл (в фоне через start() или в текущем потоке)."""
+        while not self._stop.is_set():
+            conn = None
+            try:
+                # отдельное соединение мимо пула: на нем и замок, и LISTEN
+                conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+                conn.exec_driver_sql(f"LISTEN {NOTIFY_CHANNEL}")
+                pg = conn.connection.driver_connection
+                self.reload()
+                while not self._stop.is_set():
+                    self._tick(conn)
+                    ready = _select.select([pg, self._wake_r], [], [], self.poll_interval)[0]
+                    if self._wake_r in ready:
+                        os.read(self._wake_r, 64)
+                    if pg in ready:
+                        pg.poll()
+                    # уведомления могли прийти и во время запросов _tick
+                    # на этом соединении — тогда сокет уже прочитан
+                    if pg.notifies:
+                        pg.notifies.clear()
+                        self.reload()
+                self._step_down(conn, "процесс остановлен")
+            except Exception as e:
+                logger.warning(f"Планировщик: {e}, повтор через 5 с")
+                self._step_down(None, "потеряно соединение с БД")
+                self._stop.wait(5)
+            finally:
+                if conn is not None:
+                    # соединение с замком и LISTEN не должно вернуться в пул
+                    try:
+                        conn.invalidate()
+                        conn.close()
+                    except Exception:
+                        pass
+
+    # Конфигурация и лидерство
+
+    def reload(self):
+        enabled, intervals, policy = read_config()
+        if (enabled, intervals, policy) == (self.enabled, self.intervals, self.policy):
+            return
+        self.enabled, self.intervals, self.policy = enabled, intervals, policy
+        if policy.mode == "adaptive":
+            runs = "адаптивно" + (f", вручную каждые {policy.override} мин" if policy.override else "")
+        else:
+            runs = ", ".join(f"{h:02d}:{m:02d}" for h, m in intervals)
+        logger.info(f"Настройки планировщика: {'включен' if enabled else 'выключен'}, запуски {runs}")
+        if self._scheduler is not None:
+            self._apply_jobs(force=True)
+
+    def _tick(self, conn):
+        if self.is_leader:
+            if not self.enabled:
+                self._step_down(conn, "планировщик выключен")
+            else:
+                self.lease.touch(conn, self._generation)
+                if self.policy.mode == "adaptive":
+                    self._adapt()
+            return
+        if not self.enabled:
+            return
+        generation = self.lease.try_acquire(conn)
+        if generation is None:
+            self.lease.take_over_if_stale()
+            return
+        self._generation = generation
+        self._scheduler = BackgroundScheduler(
+            jobstores={"default": SQLAlchemyJobStore(engine=engine, tablename=JOBS_TABLE)},
+            job_defaults={
+                "coalesce": settings.SCHEDULER_COALESCE,
+                "misfire_grace_time": settings.SCHEDULER_MISFIRE_GRACE or None,
+                "max_instances": 1,
+            },
+            timezone=settings.TIMEZONE,
+        )
+        self._scheduler.add_listener(self._on_missed, EVENT_JOB_MISSED)
+        # на паузе, пока задания сверяются с настройками; пропущенные за
+        # время без лидера запуски выполнятся после resume()
+        self._scheduler.start(paused=True)
+        m_hour, m_minute = map(int, settings.MAINTENANCE_TIME.split(":"))
+        # ежедневная чистка старых логов и свертка parse_runs
+        self._ensure_job("maintenance", run_maintenance, m_hour, m_minute)
+        self._apply_jobs()
+        self._scheduler.resume()
+        logger.info(f"Планировщик запущен в процессе {self.lease.holder} (лидер)")
+        record_scheduler_status("started")
+
+    def _apply_jobs(self, force: bool = False):
+        """Приводит задания синхронизации к режиму и PARSING_INTERVALS."""
+        adaptive = self.policy.mode == "adaptive"
+        wanted = {} if adaptive else {
+            f"{SYNC_JOB_PREFIX}{h:02d}_{m:02d}": (h, m) for h, m in self.intervals
+        }
+        for job in self._scheduler.get_jobs():
+            stale_cron = job.id.startswith(SYNC_JOB_PREFIX) and job.id not in wanted
+            if stale_cron or (job.id == ADAPTIVE_JOB and not adaptive):
+                job.remove()
+                logger.info(f"Задача {job.id} снята с расписания")
+        for job_id, (hour, minute) in wanted.items():
+            self._ensure_job(job_id, sync_task, hour, minute)
+        if adaptive:
+            self._adapt(force)
+
+    def _adapt(self, force: bool = False):
+        """
+        Адаптивный режим: после нового прогона (или смены настроек при
+        force) пересчитывает интервал и переносит adaptive_sync. Если
+        задание уже сработало, а прогона еще нет, ставит запасной запуск
+        через текущий интервал — на случай, если прогон не состоится.
+        """
+        limit = settings.SYNC_ADAPTIVE_STABLE_RUNS * 2 + 1
+        last_run_id, last_run_at, history = sync_policy.load_history(limit)
+        state = sync_policy.load_state()
+        job = self._scheduler.get_job(ADAPTIVE_JOB)
+        new_run = state is None or state.get("last_run_id") != last_run_id
+        if not (force or new_run):
+            if job is None:
+                decision = sync_policy.decide(self.policy, state, last_run_id, None, history)
+                decision.reason = f"ожидаем результат прогона, запасной запуск через {decision.interval} мин"
+                self._schedule_adaptive(decision, log=False)
+            return
+        decision = sync_policy.decide(self.policy, state, last_run_id, last_run_at, history)
+        self._schedule_adaptive(decision)
+
+    def _schedule_adaptive(self, decision: sync_policy.Decision, log: bool = True):
+        trigger = DateTrigger(run_date=decision.next_run)
+        if self._scheduler.get_job(ADAPTIVE_JOB) is None:
+            self._scheduler.add_job(sync_task, trigger=trigger, id=ADAPTIVE_JOB)
+        else:
+            self._scheduler.reschedule_job(ADAPTIVE_JOB, trigger=trigger)
+        sync_policy.save_state(decision)
+        message = f"Адаптивный запуск на {decision.next_run:%d.%m %H:%M}: {decision.reason}"
+        if log:
+            logger.info(message)
+        else:
+            logger.debug(message)
+
+    def _ensure_job(self, job_id: str, func, hour: int, minute: int):
+        """
+        Добавляет задание или меняет его триггер. Совпадающее задание не
+        трогается: сохраненное время следующего запуска (в том числе уже
+        пропущенное) должно пережить смену лидера.
+        """
+        trigger = CronTrigger(
+            hour=hour,
+            minute=minute,
+            timezone=settings.TIMEZONE,
+            jitter=settings.SCHEDULER_JITTER or None,
+        )
+        job = self._scheduler.get_job(job_id)
+        if job is None:
+            self._scheduler.add_job(func, trigger=trigger, id=job_id)
+            logger.info(f"Задача {job_id} запланирована на {hour:02d}:{minute:02d}")
+        elif (str(job.trigger), job.trigger.jitter, str(job.trigger.timezone)) != (
+            str(trigger),
+            trigger.jitter,
+            str(trigger.timezone),
+        ):
+            job.reschedule(trigger)
+            logger.info(f"Задача {job_id} перенесена на {hour:02d}:{minute:02d}")
+
+    def _on_missed(self, event):
+        logger.warning(
+            f"Запуск {event.job_id} на {event.scheduled_run_time:%d.%m %H:%M} пропущен: "
+            f"лидера не было дольше SCHEDULER_MISFIRE_GRACE"
+        )
+
+    def _step_down(self, conn, reason: str):
+        if not self.is_leader:
+            return
+        generation, self._generation = self._generation, None
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+        logger.info(f"Планировщик остановлен: {reason}")
+        try:
+            if conn is not None:
+                self.lease.release(conn, generation, reason)
+            record_scheduler_status("stopped")
+        except Exception as e:
+            logger.warning(f"Статус планировщика не записан: {e}")
+
+
+_service: Optional[SchedulerService] = None
+
+
+def get_scheduler_service() -> SchedulerService:
+    global _service
+    if _service is None:
+        _service = SchedulerService()
+    return _service
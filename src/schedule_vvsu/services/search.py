@@ -0,0 +1,192 @@
+"""
+Поиск преподавателей и занятий (/api/search/teachers, /api/search/lessons).
+
+Запрос нормализуется так же, как колонка lessons.teacher_norm
+(text_norm.py), и ищется по триграммным индексам pg_trgm: подстрокой
+(LIKE) или похожими словами (word_similarity — опечатки, фамилия без
+инициалов, инициалы перед фамилией).
+
+Ответы кэшируются в процессе API. Версия снимка расписания —
+max(lessons.id): save_lessons_to_db каждый раз записывает занятия
+заново, и любое сохранение дает новые id. Вместе с текущей датой (от нее
+зависят "ближайшие" занятия) версия — ключ кэша и ETag ответа; ее
+проверка стоит одного индексного запроса.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Hashable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from schedule_vvsu import metrics
+from schedule_vvsu.config import get_settings
+from schedule_vvsu.db.models import Lesson
+from schedule_vvsu.text_norm import FOLD_SQL, fold, norm
+
+settings = get_settings()
+
+MIN_QUERY = 2
+# порог word_similarity для совпадения (в pg_trgm по умолчанию 0.6 —
+# слишком строго для опечатки в короткой фамилии)
+WORD_SIMILARITY = 0.4
+
+Version = Tuple[date, int]
+
+# выражение должно совпадать с индексом ix_lessons_subject_trgm
+_subject_folded = literal_column(FOLD_SQL.format(col="lessons.subject"))
+
+
+class SearchCache:
+    """LRU ответов; сбрасывается целиком, когда меняется версия."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.version: Optional[Version] = None
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, version: Version, key: Hashable) -> Any:
+        if version != self.version:
+            self.version = version
+            self._items.clear()
+            return None
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, version: Version, key: Hashable, value: Any):
+        # версия сменилась, пока шел запрос, — результат уже устарел
+        if version != self.version:
+            return
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+
+_cache = SearchCache(settings.SEARCH_CACHE_SIZE)
+
+
+async def snapshot_version(db: AsyncSession, today: date) -> Version:
+    return today, await db.scalar(select(func.max(Lesson.id))) or 0
+
+
+async def _cached(
+    version: Version, key: Hashable, compute: Callable[[], Awaitable[List[dict]]]
+) -> List[dict]:
+    result = _cache.get(version, key)
+    if result is not None:
+        metrics.SEARCH_CACHE.labels("hit").inc()
+        return result
+    metrics.SEARCH_CACHE.labels("miss").inc()
+    result = await compute()
+    _cache.put(version, key, result)
+    return result
+
+
+def _like(s: str) -> str:
+    return "%" + s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+async def search_teachers(db: AsyncSession, version: Version, q: str, limit: int) -> List[dict]:
+    """
+    Преподаватели, похожие на запрос: сначала те, чье ФИО начинается с
+    него, дальше по убыванию сходства. Написания, совпадающие после
+    нормализации ("Ёлкин И.П." и "Елкин И. П."), — один преподаватель.
+    """
+    qn = norm(q)
+    if len(qn) < MIN_QUERY:
+        return []
+    today = version[0]
+
+    async def compute() -> List[dict]:
+        await db.execute(
+            select(func.set_config("pg_trgm.word_similarity_threshold", str(WORD_SIMILARITY), True))
+        )
+        score = func.word_similarity(qn, Lesson.teacher_norm)
+        rows = await db.execute(
+            select(
+                func.min(func.btrim(Lesson.teacher)),
+                score,
+                func.count().filter(Lesson.date >= today),
+                func.min(Lesson.date).filter(Lesson.date >= today),
+            )
+            # teacher_norm %> q — то же, что q <% teacher_norm (word_similarity)
+            .where(or_(Lesson.teacher_norm.like(_like(qn)), Lesson.teacher_norm.op("%>")(qn)))
+            .group_by(Lesson.teacher_norm)
+            .order_by(
+                Lesson.teacher_norm.like(qn + "%").desc(), score.desc(), Lesson.teacher_norm
+            )
+            .limit(limit)
+        )
+        return [
+            {
+                "teacher": teacher,
+                "score": round(float(similarity), 3),
+                "upcoming": upcoming,
+                "next_date": next_date.isoformat() if next_date else None,
+            }
+            for teacher, similarity, upcoming, next_date in rows
+        ]
+
+    return await _cached(version, ("teachers", qn, limit), compute)
+
+
+async def search_lessons(
+    db: AsyncSession,
+    version: Version,
+    q: str,
+    teacher: str,
+    date_from: date,
+    date_to: Optional[date],
+    limit: int,
+) -> List[dict]:
+    """
+    Занятия с date_from по date_to: q — подстрока дисциплины или ФИО,
+    teacher — точное ФИО (после нормализации, как из search_teachers).
+    """
+    qf, qn, tn = fold(q).strip(), norm(q), norm(teacher)
+
+    async def compute() -> List[dict]:
+        where = [Lesson.date >= date_from]
+        if date_to is not None:
+            where.append(Lesson.date <= date_to)
+        if tn:
+            where.append(Lesson.teacher_norm == tn)
+        if qf:
+            match = [_subject_folded.like(_like(qf), escape="\\")]
+            if len(qn) >= MIN_QUERY:
+                match.append(Lesson.teacher_norm.like(_like(qn)))
+            where.append(or_(*match))
+        rows = await db.execute(
+            select(
+                Lesson.date,
+                Lesson.start_time,
+                Lesson.end_time,
+                Lesson.subject,
+                Lesson.teacher,
+                Lesson.room,
+                Lesson.lesson_type,
+            )
+            .where(and_(*where))
+            .order_by(Lesson.date, Lesson.start_time)
+            .limit(limit)
+        )
+        return [
+            {
+                "date": d.isoformat(),
+                "start": start.strftime("%H:%M"),
+                "end": end.strftime("%H:%M"),
+                "subject": subject,
+                "teacher": lesson_teacher,
+                "room": room,
+                "lesson_type": lesson_type,
+            }
+            for d, start, end, subject, lesson_teacher, room, lesson_type in rows
+        ]
+
+    key = ("lessons", qf, tn, date_from, date_to, limit)
+    return await _cached(version, key, compute)
@@ -0,0 +1,253 @@
+"""
+Очередь синхронизаций в Postgres (таблица sync_jobs).
+
+- enqueue_sync() ставит задачу или сливает запрос в уже активную
+  (queued/running) — за это отвечает частичный уникальный индекс
+  uq_sync_jobs_active и INSERT ... ON CONFLICT.
+- SyncWorker забирает задачи через FOR UPDATE SKIP LOCKED, поэтому
+  воркеров может быть сколько угодно (несколько реплик API) — каждую
+  задачу выполнит ровно один. Воркер живет только в процессах с
+  /metrics: метрики прогона пишутся в реестр того процесса, где он идет.
+- heartbeat_at обновляет ход самого прогона (sync_run.SyncRun): этапы,
+  счетчики, события. Задачу, которая SYNC_JOB_STALE_AFTER сек не
+  продвигается (воркер пропал или прогон завис), следующий воркер
+  возвращает в очередь (или помечает error после SYNC_JOB_MAX_ATTEMPTS
+  попыток); аренда "sync" с тем же порогом отдает ему и прогон.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import select as _select
+import socket
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+
+from schedule_vvsu.config import get_settings
+from schedule_vvsu.database import SessionLocal, engine
+from schedule_vvsu.db.models import SyncJob
+from schedule_vvsu.services.sync_run import SyncRun
+from schedule_vvsu.services.sync_service import run_sync_pipeline
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+NOTIFY_CHANNEL = "sync_jobs"
+ACTIVE_STATUSES = ("queued", "running")
+_ACTIVE_WHERE = text("status IN ('queued', 'running')")
+
+
+def job_to_dict(job: SyncJob) -> dict:
+    def iso(value):
+        return value.isoformat() if value else None
+
+    return {
+        "id": job.id,
+        "status": job.status,
+        "source": job.source,
+        "requests": job.requests,
+        "attempts": job.attempts,
+        "detail": job.detail,
+        "progress": job.progress,
+        "profile": job.profile,
+        "created_at": iso(job.created_at),
+        "started_at": iso(job.started_at),
+        "finished_at": iso(job.finished_at),
+    }
+
+
+def enqueue_sync(source: str, profile: Optional[str] = None) -> tuple[int, bool]:
+    """
+    Ставит синхронизацию в очередь. Возвращает (job_id, merged):
+    merged=True — запрос слит с уже активной задачей. profile — режим
+    профилирования; для уже запущенной задачи он ни на что не влияет.
+    """
+    stmt = insert(SyncJob).values(
+        status="queued", source=source, requests=1, attempts=0, profile=profile
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[text("(true)")],
+        index_where=_ACTIVE_WHERE,
+        set_={
+            "requests": SyncJob.requests + 1,
+            "profile": func.coalesce(stmt.excluded.profile, SyncJob.profile),
+        },
+    ).returning(SyncJob.id, text("xmax <> 0"))
+    with engine.begin() as conn:
+        job_id, merged = conn.execute(stmt).one()
+        # будим воркеры и при слиянии: задача могла быть заблокирована
+        # этим UPDATE в момент, когда воркер пытался ее забрать
+        conn.execute(text(f"NOTIFY {NOTIFY_CHANNEL}"))
+    logger.info(
+        f"Синхронизация ({source}): "
+        + (f"слита с задачей #{job_id}" if merged else f"поставлена задача #{job_id}")
+    )
+    return job_id, merged
+
+
+def get_job(job_id: int) -> Optional[SyncJob]:
+    with SessionLocal() as session:
+        return session.get(SyncJob, job_id)
+
+
+def get_active_job() -> Optional[SyncJob]:
+    with SessionLocal() as session:
+        return session.scalar(select(SyncJob).where(SyncJob.status.in_(ACTIVE_STATUSES)))
+
+
+def wait_for_job(job_id: int, timeout: float = 1800, poll: float = 2.0) -> Optional[SyncJob]:
+    """Ждет завершения задачи (для CLI). None — задача не найдена."""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = get_job(job_id)
+        if job is None or job.status not in ACTIVE_STATUSES or time.monotonic() > deadline:
+            return job
+        time.sleep(poll)
+
+
+class SyncWorker:
+    """Фоновый поток, выполняющий задачи из sync_jobs."""
+
+    def __init__(self, poll_interval: float = 30.0):
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.heartbeat = settings.SYNC_JOB_HEARTBEAT
+        self.stale_after = settings.SYNC_JOB_STALE_AFTER
+        self.max_attempts = settings.SYNC_JOB_MAX_ATTEMPTS
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Очередь
+
+    def requeue_stale(self) -> int:
+        """Возвращает в очередь задачи, которые перестали продвигаться."""
+        stale = SyncJob.heartbeat_at < func.now() - timedelta(seconds=self.stale_after)
+        with engine.begin() as conn:
+            failed = conn.execute(
+                update(SyncJob)
+                .where(SyncJob.status == "running", stale, SyncJob.attempts >= self.max_attempts)
+                .values(status="error", detail="воркер пропал во время прогона", finished_at=func.now())
+            ).rowcount
+            requeued = conn.execute(
+                update(SyncJob)
+                .where(SyncJob.status == "running", stale)
+                .values(status="queued", worker=None)
+            ).rowcount
+        if failed or requeued:
+            logger.warning(f"Зависшие задачи синхронизации: в очередь {requeued}, с ошибкой {failed}")
+        return requeued
+
+    def claim(self) -> Optional[int]:
+        next_job = (
+            select(SyncJob.id)
+            .where(SyncJob.status == "queued")
+            .order_by(SyncJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        with engine.begin() as conn:
+            return conn.execute(
+                update(SyncJob)
+                .where(SyncJob.id == next_job)
+                .values(
+                    status="running",
+                    worker=self.name,
+                    attempts=SyncJob.attempts + 1,
+                    started_at=func.now(),
+                    heartbeat_at=func.now(),
+                )
+                .returning(SyncJob.id)
+            ).scalar()
+
+    def _finish(self, job_id: int, status: str, detail: str):
+        with engine.begin() as conn:
+            # задачу могли вернуть в очередь как зависшую — тогда она уже не наша
+            conn.execute(
+                update(SyncJob)
+                .where(SyncJob.id == job_id, SyncJob.worker == self.name)
+                .values(status=status, detail=detail[:250], finished_at=func.now())
+            )
+
+    def run_job(self, job_id: int):
+        job = get_job(job_id)
+        # heartbeat задачи пишет сам прогон (SyncRun): события и этапы
+        # пайплайна, а не таймер — зависший прогон перестает его обновлять
+        run = SyncRun(
+            job_id,
+            start_seq=(job.progress or {}).get("seq", 0),
+            worker=self.name,
+            heartbeat=self.heartbeat,
+        )
+        with run:
+            try:
+                detail = run_sync_pipeline(job.source, profile=job.profile)
+                self._finish(job_id, "done", detail)
+                run.finish("done", detail)
+            except Exception as e:
+                detail = str(e) or type(e).__name__
+                self._finish(job_id, "error", detail)
+                run.finish("error", detail)
+
+    def run_pending(self) -> int:
+        """Выполняет все задачи из очереди в текущем потоке."""
+        self.requeue_stale()
+        count = 0
+        while not self._stop.is_set():
+            job_id = self.claim()
+            if job_id is None:
+                return count
+            logger.info(f"Воркер {self.name} взял задачу синхронизации #{job_id}")
+            self.run_job(job_id)
+            count += 1
+        return count
+
+    # Фоновый поток
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="sync-worker", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = engine.raw_connection()
+                conn.driver_connection.autocommit = True
+                conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+                while not self._stop.is_set():
+                    self.run_pending()
+                    # ждем NOTIFY о новой задаче или периодической проверки
+                    pg = conn.driver_connection
+                    if _select.select([pg], [], [], self.poll_interval)[0]:
+                        pg.poll()
+                        pg.notifies.clear()
+            except Exception as e:
+                logger.warning(f"Воркер синхронизации: {e}, повтор через 5 с")
+                self._stop.wait(5)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.invalidate()
+                    except Exception:
+                        pass
+
+
+_worker: Optional[SyncWorker] = None
+
+
+def get_sync_worker() -> SyncWorker:
+    global _worker
+    if _worker is None:
+        _worker = SyncWorker()
+    return _worker
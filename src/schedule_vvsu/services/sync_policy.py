@@ -0,0 +1,282 @@
+"""
+Адаптивная частота синхронизаций.
+
+В режиме adaptive (settings.SCHEDULER_MODE) планировщик запускает
+синхронизацию не по PARSING_INTERVALS, а через интервал, который
+подстраивается под то, как часто меняется расписание. После каждого
+завершенного прогона (любого источника — cron, UI, бот) лидер
+планировщика смотрит на его размер разницы — сумму счетчиков
+lessons_added + lessons_removed + lessons_changed из parse_runs.stats:
+
+- изменений не меньше SYNC_ADAPTIVE_CHURN_THRESHOLD — интервал делится на
+  SYNC_ADAPTIVE_FACTOR (но не меньше SYNC_ADAPTIVE_MIN_INTERVAL);
+- каждые SYNC_ADAPTIVE_STABLE_RUNS успешных прогонов подряд без
+  изменений — интервал умножается на SYNC_ADAPTIVE_FACTOR (но не больше
+  SYNC_ADAPTIVE_MAX_INTERVAL);
+- иначе (в том числе после ошибки) интервал не меняется.
+
+Следующий запуск — через интервал после последнего прогона; попавший в
+SYNC_QUIET_HOURS переносится на конец тихих часов. Ручной интервал
+(SYNC_INTERVAL_OVERRIDE, при необходимости до SYNC_INTERVAL_OVERRIDE_UNTIL)
+заменяет расчетный, тихие часы действуют и для него. Каждое решение с
+причиной пишется в лог и в SYNC_POLICY_STATE (видно в /api/scheduler/status).
+"""
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+import pytz
+from sqlalchemy import select
+
+from schedule_vvsu.config import get_settings
+from schedule_vvsu.database import SessionLocal, get_setting, set_setting
+from schedule_vvsu.db.models import ParseRun
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+POLICY_MODES = ("fixed", "adaptive")
+CHURN_COUNTERS = ("lessons_added", "lessons_removed", "lessons_changed")
+STATE_KEY = "SYNC_POLICY_STATE"
+
+
+@dataclass
+class SyncPolicy:
+    """Настройки из settings (меняются без перезапуска)."""
+
+    mode: str = "fixed"
+    override: Optional[int] = None  # минут
+    override_until: Optional[datetime] = None  # локальное время TIMEZONE
+
+    @classmethod
+    def from_values(cls, values: dict) -> "SyncPolicy":
+        mode = (values.get("SCHEDULER_MODE") or "fixed").strip().lower()
+        if mode not in POLICY_MODES:
+            logger.warning(f"Неизвестный SCHEDULER_MODE {mode!r}, используется fixed")
+            mode = "fixed"
+        override = until = None
+        try:
+            override = int(values.get("SYNC_INTERVAL_OVERRIDE") or 0) or None
+        except ValueError:
+            logger.warning(f"Неверный SYNC_INTERVAL_OVERRIDE: {values.get('SYNC_INTERVAL_OVERRIDE')!r}")
+        if values.get("SYNC_INTERVAL_OVERRIDE_UNTIL"):
+            try:
+                until = _localize(datetime.fromisoformat(values["SYNC_INTERVAL_OVERRIDE_UNTIL"]))
+            except ValueError:
+                logger.warning(
+                    f"Неверный SYNC_INTERVAL_OVERRIDE_UNTIL: {values['SYNC_INTERVAL_OVERRIDE_UNTIL']!r}"
+                )
+        return cls(mode, override, until)
+
+    def active_override(self, now: datetime) -> Optional[int]:
+        if self.override and (self.override_until is None or now < self.override_until):
+            return self.override
+        return None
+
+
+@dataclass
+class Decision:
+    interval: int  # минут
+    source: str  # adaptive / override
+    reason: str
+    next_run: datetime
+    calm: int = 0  # прогонов без изменений с последней смены интервала
+    last_run_id: Optional[int] = None
+    decided_at: Optional[datetime] = None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        for key in ("next_run", "decided_at"):
+            data[key] = data[key].isoformat() if data[key] else None
+        return data
+
+
+def _tz():
+    return pytz.timezone(settings.TIMEZONE)
+
+
+def _localize(value: datetime) -> datetime:
+    return _tz().localize(value) if value.tzinfo is None else value.astimezone(_tz())
+
+
+def now_local() -> datetime:
+    return datetime.now(_tz())
+
+
+def parse_quiet_hours(value: Optional[str]) -> Optional[Tuple[time, time]]:
+    """'23:00-07:00' -> (23:00, 07:00); пусто или ошибка — тихих часов нет."""
+    if not value or not value.strip():
+        return None
+    try:
+        start, end = (time.fromisoformat(part.strip()) for part in value.split("-"))
+    except ValueError:
+        logger.warning(f"Неверный SYNC_QUIET_HOURS: {value!r}")
+        return None
+    return (start, end) if start != end else None
+
+
+def after_quiet_hours(when: datetime, quiet: Optional[Tuple[time, time]]) -> datetime:
+    """Переносит момент, попавший в тихие часы, на их конец."""
+    if quiet is None:
+        return when
+    start, end = quiet
+    t = when.time()
+    inside = start <= t < end if start < end else (t >= start or t < end)
+    if not inside:
+        return when
+    day = when.date() if t < end else when.date() + timedelta(days=1)
+    return _localize(datetime.combine(day, end))
+
+
+def run_churn(status: str, stats: Optional[dict]) -> Optional[int]:
+    """Размер разницы прогона; None — прогон с ошибкой или без счетчиков."""
+    if status != "success" or not stats:
+        return None
+    counters = stats.get("counters") or {}
+    if not any(key in counters for key in CHURN_COUNTERS):
+        return None
+    return sum(int(counters.get(key, 0)) for key in CHURN_COUNTERS)
+
+
+def load_history(limit: int) -> Tuple[Optional[int], Optional[datetime], List[Optional[int]]]:
+    """(id и время последнего завершенного прогона, размеры разниц — новые первыми)."""
+    with SessionLocal() as session:
+        rows = session.execute(
+            select(ParseRun.id, ParseRun.timestamp, ParseRun.status, ParseRun.stats)
+            .where(ParseRun.status.in_(("success", "error")))
+            .order_by(ParseRun.id.desc())
+            .limit(limit)
+        ).all()
+    if not rows:
+        return None, None, []
+    last_id, last_at = rows[0].id, _localize(rows[0].timestamp)
+    return last_id, last_at, [run_churn(r.status, r.stats) for r in rows]
+
+
+def load_state() -> Optional[dict]:
+    raw = get_setting(STATE_KEY)
+    try:
+        return json.loads(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def save_state(decision: Decision):
+    set_setting(STATE_KEY, json.dumps(decision.to_dict(), ensure_ascii=False))
+
+
+def _clamp(minutes: int) -> int:
+    low = settings.SYNC_ADAPTIVE_MIN_INTERVAL
+    high = max(low, settings.SYNC_ADAPTIVE_MAX_INTERVAL)
+    return max(low, min(high, minutes))
+
+
+def _step(old: int, new: int) -> str:
+    if old == new:
+        return f"интервал {new} мин уже на границе"
+    return f"интервал {old} → {new} мин"
+
+
+def adapt_interval(
+    interval: int, history: List[Optional[int]], calm: Optional[int] = None
+) -> Tuple[int, int, str]:
+    """
+    Шаг по новому прогону: (интервал, серия прогонов без изменений,
+    причина). history — размеры разниц, новые первыми; calm — серия до
+    этого прогона (None — восстановить по history).
+    """
+    factor = max(settings.SYNC_ADAPTIVE_FACTOR, 1.0)
+    threshold = settings.SYNC_ADAPTIVE_CHURN_THRESHOLD
+    stable_runs = max(settings.SYNC_ADAPTIVE_STABLE_RUNS, 1)
+    if not history:
+        return interval, 0, f"прогонов еще не было, интервал {interval} мин"
+    latest = history[0]
+    if latest is None:
+        return interval, calm or 0, f"последний прогон без результата, интервал {interval} мин не меняется"
+    if latest >= threshold:
+        new = _clamp(round(interval / factor))
+        return new, 0, f"в последнем прогоне изменений: {latest}, {_step(interval, new)}"
+    if calm is None:
+        calm = 0
+        for churn in (c for c in history if c is not None):
+            if churn >= threshold:
+                break
+            calm += 1
+        calm = min(calm, stable_runs)
+    else:
+        calm += 1
+    if calm >= stable_runs:
+        new = _clamp(round(interval * factor))
+        return new, 0, f"{calm} прогонов подряд без изменений, {_step(interval, new)}"
+    return interval, calm, f"без изменений {calm} из {stable_runs} прогонов, интервал {interval} мин"
+
+
+def decide(
+    policy: SyncPolicy,
+    state: Optional[dict],
+    last_run_id: Optional[int],
+    last_run_at: Optional[datetime],
+    history: List[Optional[int]],
+    now: Optional[datetime] = None,
+) -> Decision:
+    """
+    Интервал и время следующего запуска. Шаг интервала делается только
+    по новому прогону (last_run_id не тот, что в state); при смене
+    настроек пересчитывается лишь время запуска.
+    """
+    now = now or now_local()
+    interval = _clamp(int((state or {}).get("interval") or settings.SYNC_ADAPTIVE_MIN_INTERVAL))
+    calm = (state or {}).get("calm")
+    override = policy.active_override(now)
+    if override is not None:
+        until = f" до {policy.override_until:%d.%m %H:%M}" if policy.override_until else ""
+        source, reason = "override", f"ручной интервал {override} мин{until}"
+        effective = override
+    else:
+        source = "adaptive"
+        if state is not None and state.get("last_run_id") == last_run_id:
+            reason = f"пересчет по настройкам, интервал {interval} мин"
+        else:
+            interval, calm, reason = adapt_interval(interval, history, calm)
+        effective = interval
+    base = last_run_at if last_run_at is not None and last_run_at < now else now
+    next_run = max(base + timedelta(minutes=effective), now)
+    quiet = parse_quiet_hours(settings.SYNC_QUIET_HOURS)
+    shifted = after_quiet_hours(next_run, quiet)
+    if shifted != next_run:
+        reason += f"; {next_run:%H:%M} в тихие часы, перенос на {shifted:%H:%M}"
+    return Decision(
+        interval=interval,
+        source=source,
+        reason=reason,
+        next_run=shifted,
+        calm=calm or 0,
+        last_run_id=last_run_id,
+        decided_at=now,
+    )
+
+
+def set_policy(
+    mode: Optional[str] = None,
+    override: Optional[int] = None,
+    override_until: Optional[datetime] = None,
+    clear_override: bool = False,
+):
+    """Меняет режим и ручной интервал; планировщик применит их сразу (NOTIFY)."""
+    if mode is not None:
+        if mode not in POLICY_MODES:
+            raise ValueError(f"mode: одно из {', '.join(POLICY_MODES)}")
+        set_setting("SCHEDULER_MODE", mode)
+    if clear_override:
+        set_setting("SYNC_INTERVAL_OVERRIDE_UNTIL", "")
+        set_setting("SYNC_INTERVAL_OVERRIDE", "")
+    elif override is not None:
+        if override <= 0:
+            raise ValueError("override: интервал в минутах больше нуля")
+        until = _localize(override_until).replace(tzinfo=None).isoformat() if override_until else ""
+        set_setting("SYNC_INTERVAL_OVERRIDE_UNTIL", until)
+        set_setting("SYNC_INTERVAL_OVERRIDE", str(override))
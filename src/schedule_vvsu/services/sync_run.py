@@ -0,0 +1,236 @@
+"""
+Прогресс текущего прогона синхронизации.
+
+SyncWorker открывает SyncRun на время задачи; код пайплайна сообщает о
+ходе работы через stage()/count()/error() — без текущего прогона (CLI-
+команды, тесты) вызовы ничего не делают. Каждое событие сохраняется в
+sync_jobs.progress (снимок) и публикуется через NOTIFY sync_progress,
+откуда его раздает SSE /api/sync/jobs/{id}/events.
+
+Те же события, а также границы этапов и счетчики run_stats — heartbeat
+задачи (sync_jobs.heartbeat_at): задача, которая не продвигается
+SYNC_JOB_STALE_AFTER сек, считается зависшей, даже если процесс жив.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import func, select, update
+
+from schedule_vvsu.database import AsyncSessionLocal, engine
+from schedule_vvsu.db.models import SyncJob
+from schedule_vvsu.services import run_stats
+from schedule_vvsu.services.pg_listener import get_pg_listener
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_CHANNEL = "sync_progress"
+MAX_ERRORS = 20  # сколько последних ошибок хранить в снимке
+HEARTBEAT = 15.0
+
+_current: ContextVar[Optional["SyncRun"]] = ContextVar("sync_run", default=None)
+
+
+class SyncRun:
+    def __init__(
+        self,
+        job_id: int,
+        start_seq: int = 0,
+        min_interval: float = 0.5,
+        worker: Optional[str] = None,
+        heartbeat: float = 10.0,
+    ):
+        self.job_id = job_id
+        self.min_interval = min_interval  # не чаще, чем раз в N сек для счетчиков
+        # пишем в задачу, только пока она наша: зависшую задачу могли
+        # вернуть в очередь и отдать другому воркеру
+        self.worker = worker
+        self.heartbeat = heartbeat
+        self.seq = start_seq  # при перезапуске задачи нумерация продолжается
+        self.stage = "queued"
+        self.counts: Dict[str, int] = {}
+        self.errors: List[str] = []
+        self.status = "running"
+        self.detail = ""
+        self._last_publish = 0.0
+        self._last_beat = 0.0
+        self._token = None
+        self._hook = None
+
+    def __enter__(self) -> "SyncRun":
+        self._token = _current.set(self)
+        self._hook = run_stats.add_progress_hook(self._on_progress)
+        self._publish("start")
+        return self
+
+    def __exit__(self, *exc):
+        run_stats.remove_progress_hook(self._hook)
+        _current.reset(self._token)
+
+    def _job(self):
+        where = [SyncJob.id == self.job_id]
+        if self.worker is not None:
+            where.append(SyncJob.worker == self.worker)
+        return update(SyncJob).where(*where)
+
+    def _on_progress(self, boundary: bool):
+        if time.monotonic() - self._last_beat < self.heartbeat:
+            return
+        self._last_beat = time.monotonic()
+        try:
+            with engine.begin() as conn:
+                conn.execute(self._job().values(heartbeat_at=func.now()))
+        except Exception as e:
+            logger.warning(f"heartbeat задачи #{self.job_id} не записан: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "seq": self.seq,
+            "stage": self.stage,
+            "counts": dict(self.counts),
+            "errors": list(self.errors),
+            "status": self.status,
+            "detail": self.detail,
+        }
+
+    # События
+
+    def set_stage(self, name: str):
+        self.stage = name
+        self._publish("stage")
+
+    def add(self, key: str, n: int = 1):
+        self.counts[key] = self.counts.get(key, 0) + n
+        if time.monotonic() - self._last_publish >= self.min_interval:
+            self._publish("progress")
+
+    def add_error(self, message: str):
+        self.errors = (self.errors + [message[:200]])[-MAX_ERRORS:]
+        self._publish("error", error=message[:200])
+
+    def finish(self, status: str, detail: str = ""):
+        self.status, self.detail = status, detail[:250]
+        self.stage = "finished"
+        self._publish("done")
+
+    def _publish(self, kind: str, **extra):
+        self.seq += 1
+        self._last_publish = self._last_beat = time.monotonic()
+        snapshot = self.snapshot()
+        # в NOTIFY (лимит 8000 байт) — без списка ошибок
+        event = {k: v for k, v in snapshot.items() if k != "errors"}
+        event.update(type=kind, errors_count=len(self.errors), **extra)
+        try:
+            with engine.begin() as conn:
+                conn.execute(self._job().values(progress=snapshot, heartbeat_at=func.now()))
+                conn.execute(
+                    select(func.pg_notify(PROGRESS_CHANNEL, json.dumps(event, ensure_ascii=False)))
+                )
+        except Exception as e:
+            logger.warning(f"Прогресс задачи #{self.job_id} не опубликован: {e}")
+
+
+def current_run() -> Optional[SyncRun]:
+    return _current.get()
+
+
+def stage(name: str):
+    run = _current.get()
+    if run is not None:
+        run.set_stage(name)
+
+
+def count(key: str, n: int = 1):
+    run_stats.incr(key, n)
+    run = _current.get()
+    if run is not None:
+        run.add(key, n)
+
+
+def error(message: str):
+    run = _current.get()
+    if run is not None:
+        run.add_error(message)
+
+
+# Подписка (API)
+
+
+def _sse(event: dict) -> str:
+    return f"id: {event.get('seq', 0)}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+async def job_events(job_id: int) -> AsyncIterator[str]:
+    """
+    SSE-поток событий одной задачи: сначала снимок из sync_jobs,
+    затем живые события до завершения задачи.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+
+    def on_notify(payload: Optional[str]):
+        if payload is None:
+            # переподключение: перечитаем снимок. Метка не должна потеряться
+            # и в полной очереди — освобождаем место, снимок все равно новее
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+            return
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        if event.get("job_id") == job_id:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass
+
+    listener = get_pg_listener()
+    await listener.add_callback(PROGRESS_CHANNEL, on_notify)
+    try:
+        last_seq = -1
+        while True:
+            async with AsyncSessionLocal() as session:
+                job = await session.get(SyncJob, job_id)
+            if job is None:
+                return
+            snap = dict(job.progress or {"job_id": job_id, "seq": 0, "stage": job.status, "counts": {}})
+            if snap.get("seq", 0) > last_seq:
+                last_seq = snap.get("seq", 0)
+                snap.update(type="snapshot", job_status=job.status)
+                yield _sse(snap)
+            if snap.get("stage") == "finished" or job.status not in ("queued", "running"):
+                finished = snap.get("stage") == "finished"
+                yield _sse({
+                    "type": "done",
+                    "job_id": job_id,
+                    "seq": last_seq + 1,
+                    "status": snap.get("status") if finished else job.status,
+                    "detail": (snap.get("detail") if finished else job.detail) or "",
+                    "counts": snap.get("counts", {}),
+                })
+                return
+
+            # живые события, пока не придет done или не понадобится перечитать снимок
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    break  # заодно проверим, не умер ли воркер
+                if event is None:
+                    break
+                if event["seq"] <= last_seq:
+                    continue
+                last_seq = event["seq"]
+                yield _sse(event)
+                if event["type"] == "done":
+                    return
+    finally:
+        await listener.remove_callback(PROGRESS_CHANNEL, on_notify)
@@ -0,0 +1,181 @@
+"""
+Пайплайн синхронизации: парсинг ЛК -> lessons -> Google Calendar.
+
+Единственное место, где выполняется полный прогон. API, планировщик и CLI
+не вызывают его напрямую, а ставят задачу в очередь sync_jobs
+(см. services/sync_jobs.py), которую разбирает SyncWorker. Сам прогон
+идет под арендой "sync" (services/leases.py), поэтому даже при
+перезапуске зависшей задачи два прогона одновременно не выполнятся.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+from dateutil import tz
+from sqlalchemy import func, select
+
+from schedule_vvsu import metrics, tracing
+from schedule_vvsu.config import get_settings
+from schedule_vvsu.database import SessionLocal, engine, init_db, save_lessons_to_db
+from schedule_vvsu.db.models import ParseRun
+from schedule_vvsu.google_calendar.auth import authenticate_google_calendar
+from schedule_vvsu.google_calendar.calendar import get_or_create_calendar
+from schedule_vvsu.google_calendar.sync import load_previous_schedule, sync_schedule_to_calendar
+from schedule_vvsu.parser import parse_schedule
+from schedule_vvsu.services import profiling, run_stats, sync_run
+from schedule_vvsu.services.leases import AdvisoryLease
+from schedule_vvsu.services.settings_service import get_calendar_name
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+VLADIVOSTOK_TZ = tz.gettz("Asia/Vladivostok")
+
+# после успешного прогона: бот пересобирает по нему кэш расписания
+SYNCED_CHANNEL = "schedule_synced"
+
+# общий для всех процессов замок на прогон синхронизации; heartbeat —
+# этапы пайплайна (run_stats), не чаще раза в SYNC_JOB_HEARTBEAT сек.
+# Порог тот же, что у задачи: перезапущенная зависшая задача сразу
+# перехватывает и замок
+sync_lease = AdvisoryLease(
+    "sync",
+    heartbeat=settings.SYNC_JOB_HEARTBEAT,
+    stale_after=settings.SYNC_JOB_STALE_AFTER,
+)
+
+# подписи запусков в parse_runs.detail по источнику задачи
+SOURCE_LABELS = {
+    "api": "ручной запуск синхронизации",
+    "bot": "запуск из Telegram-бота",
+    "cron": "cron запуск",
+    "cli": "запуск из CLI",
+}
+
+
+class SyncError(Exception):
+    """Прогон завершился без результата (расписание не получено и т.п.)."""
+
+
+def record_parse_run(
+    status: str,
+    detail: str = "",
+    time_str: Optional[str] = None,
+    stats: Optional[run_stats.RunStats] = None,
+):
+    """Сохраняет результат очередного прогона парсера в parse_runs."""
+    now_local = datetime.now(tz=VLADIVOSTOK_TZ)
+
+    if time_str is None:
+        time_str = now_local.strftime("%H:%M")
+
+    session = SessionLocal()
+    try:
+        session.add(
+            ParseRun(
+                time_str=time_str,
+                status=status,
+                detail=detail,
+                timestamp=now_local.replace(tzinfo=None),
+                duration_ms=stats.duration_ms if stats else None,
+                stats=stats.to_dict() if stats else None,
+            )
+        )
+        session.commit()
+        logger.info(f"Run записан: {status} @ {time_str} ({detail[:50]})")
+    finally:
+        session.close()
+    if stats is not None:
+        metrics.observe_run(status, stats.duration_ms, stats.stages)
+
+
+def notify_schedule_synced(lessons: int):
+    """Один NOTIFY на прогон: занятия в lessons сохранены окончательно."""
+    run = sync_run.current_run()
+    payload = {"lessons": lessons, "job_id": run.job_id if run is not None else None}
+    try:
+        with engine.begin() as conn:
+            conn.execute(select(func.pg_notify(SYNCED_CHANNEL, json.dumps(payload))))
+    except Exception as e:
+        logger.warning(f"NOTIFY {SYNCED_CHANNEL} не отправлен: {e}")
+
+
+def run_sync_pipeline(
+    source: str = "api", mode: str = "wait", profile: Optional[str] = None
+) -> str:
+    """
+    Прогон под арендой "sync". mode — что делать, если прогон уже идет
+    в другом процессе: wait (дождаться и выполнить), skip (не выполнять),
+    piggyback (вернуть результат текущего прогона). profile — режим
+    профилирования (services/profiling.py), по умолчанию SYNC_PROFILE.
+    """
+    outcome = sync_lease.run(lambda: _run_pipeline(source, profile), mode=mode)
+    if not outcome.ran:
+        logger.info(f"Синхронизация ({source}) не запускалась: {outcome.status}, {outcome.detail}")
+        if outcome.status in ("error", "timeout"):
+            raise SyncError(outcome.detail)
+    return outcome.detail
+
+
+def _run_pipeline(source: str, profile: Optional[str] = None) -> str:
+    """
+    Полный прогон синхронизации. Возвращает итоговое сообщение,
+    при ошибке пишет ParseRun(error) и пробрасывает исключение.
+    """
+    time_str = datetime.now(tz=VLADIVOSTOK_TZ).strftime("%H:%M")
+    logger.info(f"Запуск синхронизации расписания ({source}).")
+    record_parse_run("started", SOURCE_LABELS.get(source, source), time_str=time_str)
+
+    run = sync_run.current_run()
+    label = f"job{run.job_id}" if run is not None else source
+    run_span = tracing.span(
+        "sync.run", source=source, job_id=run.job_id if run is not None else None
+    )
+    with run_stats.collect() as stats, profiling.profile_run(profile, label, stats), run_span:
+        stats.trace_id = tracing.current_trace_id()
+        try:
+            with SessionLocal() as db:
+                init_db()
+                sync_run.stage("parse")
+                schedule = parse_schedule()
+                if not schedule:
+                    raise SyncError("Не удалось получить расписание.")
+                sync_run.count("lessons_parsed", len(schedule))
+
+                # снимок до сохранения: по нему считается разница для календаря
+                with stats.timed("snapshot_load"):
+                    prev = load_previous_schedule()
+                sync_run.stage("save")
+                with stats.timed("db_save"):
+                    save_lessons_to_db(schedule)
+                sync_run.stage("calendar")
+                with stats.timed("calendar_auth"):
+                    service = authenticate_google_calendar()
+                with stats.timed("calendar_lookup"):
+                    calendar_id = get_or_create_calendar(service, get_calendar_name(db), db)
+                sync_schedule_to_calendar(service, schedule, calendar_id, prev=prev)
+
+            ok_msg = f"синхронизировано {len(schedule)} занятий"
+            logger.info(ok_msg)
+            stats.finish()
+            record_parse_run("success", ok_msg, time_str=time_str, stats=stats)
+            notify_schedule_synced(len(schedule))
+            return ok_msg
+
+        except SyncError as e:
+            logger.warning(str(e))
+            sync_run.error(str(e))
+            stats.finish()
+            record_parse_run("error", str(e), time_str=time_str, stats=stats)
+            raise
+        except Exception as e:
+            err_msg = f"Ошибка во время синхронизации: {e}"
+            logger.exception(err_msg)
+            sync_run.error(err_msg)
+            stats.finish()
+            # ограничиваем длину деталей
+            record_parse_run("error", err_msg[:250], time_str=time_str, stats=stats)
+            raise
@@ -0,0 +1,29 @@
+"""
+Нормализация имен и названий для поиска — одна на API, бота и БД.
+
+- fold — нижний регистр и ё → е (названия дисциплин: цифры и знаки
+  сохраняются, "1С", "Web-программирование");
+- norm — fold и все кроме букв как один пробел (ФИО: "Ёлкин И.П." и
+  "елкин и п" совпадают).
+
+FOLD_SQL / NORM_SQL — те же преобразования в Postgres; по NORM_SQL
+считается колонка lessons.teacher_norm, поэтому нормализованный запрос
+сравнивается с ней напрямую. Модуль без зависимостей: его импортирует и
+бот (tg_bot), в образе которого лежит пакет schedule_vvsu.
+"""
+from __future__ import annotations
+
+import re
+
+FOLD_SQL = "translate(lower({col}), 'ё', 'е')"
+NORM_SQL = "btrim(regexp_replace(translate(lower({col}), 'ё', 'е'), '[^a-zа-я]+', ' ', 'g'))"
+
+_non_letters_re = re.compile(r"[^a-zа-я]+")
+
+
+def fold(s: str) -> str:
+    return (s or "").lower().replace("ё", "е")
+
+
+def norm(s: str) -> str:
+    return _non_letters_re.sub(" ", fold(s)).strip()
@@ -0,0 +1,164 @@
+"""
+Трассировка прогонов (OpenTelemetry).
+
+TRACING_EXPORTER:
+- off   — провайдер не настраивается, API OpenTelemetry работает вхолостую;
+- jsonl — спаны пишутся построчно в TRACING_JSONL_PATH (работает офлайн);
+- otlp  — отправка в OTLP/HTTP коллектор (OTEL_EXPORTER_OTLP_ENDPOINT,
+          по умолчанию http://localhost:4318).
+
+Корневой спан — sync.run (services/sync_service.py), дочерние — этапы
+(run_stats.timed), SQL-запросы (instrument_engine) и вызовы Calendar API
+(google_calendar/auth.py). TraceIdFilter добавляет trace_id в каждую
+запись лога.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+
+from schedule_vvsu.config import get_settings
+
+settings = get_settings()
+
+TRACER_NAME = "schedule_vvsu"
+SERVICE_NAME = "vvsu-schedule"
+TRACING_EXPORTERS = ("off", "jsonl", "otlp")
+MAX_STATEMENT_LENGTH = 2000
+
+_setup_lock = threading.Lock()
+_initialized = False
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Пишет спаны в файл по одному JSON на строку, ротируя по размеру."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+                    self.path.replace(self.path.with_name(self.path.name + ".1"))
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(lines)
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+
+def setup_tracing():
+    """Настраивает провайдер и экспортер один раз на процесс."""
+    global _initialized
+    with _setup_lock:
+        if _initialized:
+            return
+        _initialized = True
+        exporter_name = settings.TRACING_EXPORTER.lower()
+        if exporter_name not in TRACING_EXPORTERS:
+            logging.getLogger(__name__).warning(
+                f"Неизвестный TRACING_EXPORTER={exporter_name!r}, трассировка выключена"
+            )
+            return
+        if exporter_name == "off":
+            return
+
+        if exporter_name == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            exporter = OTLPSpanExporter()
+        else:
+            exporter = JsonlSpanExporter(
+                settings.TRACING_JSONL_PATH, settings.TRACING_JSONL_MAX_MB * 1024 * 1024
+            )
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": SERVICE_NAME, "process.pid": os.getpid()})
+        )
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+
+
+def get_tracer():
+    return trace.get_tracer(TRACER_NAME)
+
+
+@contextmanager
+def span(name: str, kind: SpanKind = SpanKind.INTERNAL, **attributes) -> Iterator:
+    """Дочерний спан текущего контекста; исключение помечает его ошибкой."""
+    attrs = {k: v for k, v in attributes.items() if v is not None}
+    with get_tracer().start_as_current_span(name, kind=kind, attributes=attrs) as current:
+        yield current
+
+
+def current_trace_id() -> Optional[str]:
+    context = trace.get_current_span().get_span_context()
+    return format(context.trace_id, "032x") if context.is_valid else None
+
+
+class TraceIdFilter(logging.Filter):
+    """Проставляет record.trace_id (и суффикс для текстовых логов)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "trace_id"):
+            record.trace_id = current_trace_id()
+        record.trace_suffix = f" [trace {record.trace_id}]" if record.trace_id else ""
+        return True
+
+
+def _statement_name(statement: str) -> str:
+    words = statement.split(None, 1)
+    verb = words[0].upper() if words else "SQL"
+    return f"db {verb}"
+
+
+def instrument_engine(engine, name: str):
+    """Спан на каждый SQL-запрос движка — только внутри уже идущей трассы."""
+    target = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(target, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is None or not trace.get_current_span().is_recording():
+            return
+        context._trace_span = get_tracer().start_span(
+            _statement_name(statement),
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": "postgresql",
+                "db.engine": name,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+                "db.executemany": bool(executemany),
+            },
+        )
+
+    @event.listens_for(target, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        current = getattr(context, "_trace_span", None)
+        if current is not None:
+            current.set_attribute("db.rowcount", cursor.rowcount)
+            current.end()
+            context._trace_span = None
+
+    @event.listens_for(target, "handle_error")
+    def _error(exception_context):
+        current = getattr(exception_context.execution_context, "_trace_span", None)
+        if current is not None:
+            current.record_exception(exception_context.original_exception)
+            current.set_status(Status(StatusCode.ERROR))
+            current.end()
+            exception_context.execution_context._trace_span = None
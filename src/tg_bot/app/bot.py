@@ -1,16 +1,19 @@
 import asyncio
 import logging
+import secrets
 from importlib import reload
 from types import ModuleType
 from typing import Optional
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
-
-import aiohttp
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 
 from .settings import settings
-from .client import api_get
+from .client import api_get, close as close_api
+from .db import close_pool
+from .webhook import WebhookServer
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,7 +23,12 @@ log = logging.getLogger("tg_bot")
 
 bot: Optional[Bot] = None
 dp: Optional[Dispatcher] = None
-current_token: Optional[str] = None
+# (токен, режим, URL вебхука), с которыми запущен бот
+current_config: Optional[tuple] = None
+# секрет, переданный в setWebhook; None — вебхук не ждем
+webhook_secret: Optional[str] = None
+
+webhook = WebhookServer(lambda: (bot, dp, webhook_secret))
 
 
 def fresh_router() -> "ModuleType.router":
@@ -29,14 +37,38 @@ def fresh_router() -> "ModuleType.router":
     return handlers.router
 
 
-async def switch_bot(token: Optional[str]) -> None:
-    global bot, dp, current_token
-
-    if token == current_token:
+def make_bot(token: str) -> Bot:
+    session = None
+    if settings.TELEGRAM_API_URL:
+        # свой Bot API сервер или локальная заглушка для тестов
+        session = AiohttpSession(api=TelegramAPIServer.from_base(settings.TELEGRAM_API_URL))
+    return Bot(token=token, session=session, default=DefaultBotProperties(parse_mode="HTML"))
+
+
+async def switch_bot(
+    token: Optional[str], mode: str = "polling", webhook_url: str = ""
+) -> None:
+    """
+    Запускает бота в режиме polling или webhook (вызывается по NOTIFY
+    bot_config); с теми же параметрами, что и сейчас, ничего не делает.
+    """
+    global bot, dp, current_config, webhook_secret
+
+    if mode == "webhook" and not webhook_url:
+        log.error("BOT_MODE = webhook, но BOT_WEBHOOK_URL не задан — работаю через polling")
+        mode = "polling"
+    config = (token, mode, webhook_url if mode == "webhook" else "") if token else None
+    if config == current_config:
         return
 
     if bot:
         log.info("Stopping previous bot session")
+        if webhook_secret is not None:
+            webhook_secret = None
+            try:
+                await bot.delete_webhook()
+            except Exception as e:
+                log.warning(f"deleteWebhook: {e}")
         try:
             await dp.stop_polling()
         except RuntimeError:
@@ -45,32 +77,44 @@ async def switch_bot(token: Optional[str]) -> None:
         bot = dp = None
 
     if token:
-        log.info("Starting bot polling")
+        log.info(f"Starting bot ({mode})")
         try:
-            new_bot = Bot(token=token, default=DefaultBotProperties(parse_mode="HTML"))
+            new_bot = make_bot(token)
             new_dp = Dispatcher()
             new_dp.include_router(fresh_router())
-            bot, dp = new_bot, new_dp
-            asyncio.create_task(new_dp.start_polling(new_bot))
+            if mode == "webhook":
+                await webhook.start()
+                bot, dp, webhook_secret = new_bot, new_dp, secrets.token_urlsafe(32)
+                await new_bot.set_webhook(
+                    webhook_url.rstrip("/") + settings.BOT_WEBHOOK_PATH,
+                    secret_token=webhook_secret,
+                    allowed_updates=new_dp.resolve_used_update_types(),
+                )
+            else:
+                # getUpdates не работает, пока у бота установлен вебхук
+                await new_bot.delete_webhook()
+                bot, dp = new_bot, new_dp
+                asyncio.create_task(new_dp.start_polling(new_bot))
         except Exception as e:
             log.error(f"Cannot start bot: {e}")
-            bot = dp = None
+            if bot is not None:
+                await bot.session.close()
+            bot = dp = webhook_secret = None
+            config = None
     else:
         log.warning("BOT_TOKEN is empty — bot disabled")
 
-    current_token = token or None
+    current_config = config
     settings.BOT_TOKEN = token or ""
 
 
-async def wait_for_api(url: str, retries: int = 10, delay: int = 2):
-    """Ждет, пока API станет доступен"""
+async def wait_for_api(retries: int = 10, delay: int = 2):
+    """Ждет, пока API станет доступен (только при старте)"""
     for i in range(1, retries + 1):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as resp:
-                    if resp.status == 200:
-                        log.info("API доступен — продолжаем")
-                        return
+            await api_get("/healthz")
+            log.info("API доступен — продолжаем")
+            return
         except Exception:
             pass
         log.warning(f"[{i}/{retries}] API недоступен — жду {delay}с...")
@@ -80,30 +124,82 @@ async def wait_for_api(url: str, retries: int = 10, delay: int = 2):
 
 async def reload_config() -> None:
     try:
-        await wait_for_api(f"{settings.API_URL}/healthz")
-
+        # вся конфигурация бота — одним запросом
         cfg = await api_get("/bot/config")
-        st = await api_get("/bot/settings")
         settings.ADMIN_IDS = (cfg.get("admin_ids") or "").strip()
 
-        if not st.get("bot_enabled", False):
+        if not cfg.get("bot_enabled", False):
             log.info("BOT_ENABLED = False — выключаю бота")
             await switch_bot(None)
             return
 
-        await switch_bot(cfg.get("bot_token"))
+        await switch_bot(
+            cfg.get("bot_token"),
+            mode=cfg.get("bot_mode") or "polling",
+            webhook_url=(cfg.get("bot_webhook_url") or "").strip(),
+        )
     except Exception as e:
         log.error(f"Failed to reload config: {e}")
 
 
+_reload_task: Optional[asyncio.Task] = None
+_reload_pending = False
+
+
+def request_reload() -> None:
+    """
+    Перечитать конфигурацию (NOTIFY bot_config). Уведомления, пришедшие за
+    CONFIG_RELOAD_DEBOUNCE сек или во время перечитывания, сливаются:
+    одновременно идет не больше одного reload_config и за ним — не больше
+    одного повторного.
+    """
+    global _reload_task, _reload_pending
+    _reload_pending = True
+    if _reload_task is None or _reload_task.done():
+        _reload_task = asyncio.ensure_future(_reload_loop())
+
+
+async def _reload_loop() -> None:
+    global _reload_pending
+    while _reload_pending:
+        await asyncio.sleep(settings.CONFIG_RELOAD_DEBOUNCE)
+        _reload_pending = False
+        await reload_config()
+
+
 async def main() -> None:
+    try:
+        await wait_for_api()
+    except RuntimeError as e:
+        log.error(str(e))
     await reload_config()
 
+    from . import handlers
+    from .change_digest import ChangeDigest
     from .db_listener import ConfigWatcher
-    watcher = ConfigWatcher(settings.DB_DSN, reload_config)
+    from .schedule_cache import schedule_cache
+    watcher = ConfigWatcher(settings.DB_DSN, request_reload)
     await watcher.start()
+    # синхронизация прошла успешно — пересобираем кэш расписания (и после
+    # переподключения LISTEN: уведомление могло потеряться)
+    await watcher.listen(
+        "schedule_synced",
+        lambda _: schedule_cache.schedule_refresh(),
+        resync=schedule_cache.schedule_refresh,
+    )
+    # изменения расписания — сводкой админам
+    digest = ChangeDigest(lambda: bot, handlers.parse_admin_ids)
+    await watcher.listen("schedule_changes", digest.on_notify)
+    await schedule_cache.refresh()
 
-    await asyncio.Event().wait()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await switch_bot(None)
+        await webhook.stop()
+        await close_pool()
+        await close_api()
+        await watcher.close()
 
 
 if __name__ == "__main__":
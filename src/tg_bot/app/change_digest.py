@@ -0,0 +1,182 @@
+"""
+Сводка изменений расписания для админов.
+
+Пайплайн синхронизации после каждого прогона с изменениями шлет NOTIFY
+schedule_changes (schedule_vvsu/services/schedule_changes.py). Сводка не
+уходит сразу: уведомления копятся, пока CHANGE_DIGEST_DELAY сек не
+придет новых, но не дольше CHANGE_DIGEST_MAX_DELAY сек от первого. За
+это время изменения одного занятия сливаются: важно только, каким оно
+было до первого прогона и каким стало после последнего (добавили и
+снова убрали — в сводку не попадет).
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import html
+import json
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+
+from .settings import settings
+
+log = logging.getLogger(__name__)
+
+TELEGRAM_LIMIT = 4096
+KINDS = ("added", "removed", "changed")
+
+
+def _kind(before: Optional[dict], after: Optional[dict]) -> str:
+    if before is None:
+        return "added"
+    return "removed" if after is None else "changed"
+
+
+def _lesson_line(lesson: dict) -> str:
+    d = dt.date.fromisoformat(lesson["d"]).strftime("%d.%m")
+    room = f" ({lesson['r']})" if lesson.get("r") else ""
+    teacher = f" — {lesson['p']}" if lesson.get("p") else ""
+    return html.escape(f"{d} {lesson['t']} {lesson['s']}{room}{teacher}")
+
+
+def _diff_line(before: dict, after: dict) -> str:
+    was = []
+    for field, title in (("d", "дата"), ("t", "время"), ("r", "ауд."), ("p", "преп.")):
+        if before.get(field) != after.get(field):
+            old = before.get(field) or "—"
+            if field == "d":
+                old = dt.date.fromisoformat(old).strftime("%d.%m")
+            was.append(f"{title} {old}")
+    tail = f"\n    <i>было: {html.escape(', '.join(was))}</i>" if was else ""
+    return f"✏️ {_lesson_line(after)}{tail}"
+
+
+class ChangeDigest:
+    def __init__(
+        self,
+        get_bot: Callable[[], Optional[Bot]],
+        get_admins: Callable[[], set],
+        delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+    ):
+        self._get_bot = get_bot
+        self._get_admins = get_admins
+        self.delay = settings.CHANGE_DIGEST_DELAY if delay is None else delay
+        self.max_delay = settings.CHANGE_DIGEST_MAX_DELAY if max_delay is None else max_delay
+        # ключ занятия -> (каким было до первого прогона, каким стало)
+        self._items: Dict[str, Tuple[Optional[dict], Optional[dict]]] = {}
+        # не поместившиеся в NOTIFY изменения — только счетчики
+        self._omitted = dict.fromkeys(KINDS, 0)
+        self._runs = 0
+        self._first_at: Optional[float] = None
+        self._last_at = 0.0
+        self._flusher: Optional[asyncio.Task] = None
+
+    def on_notify(self, payload: str):
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            log.warning(f"schedule_changes: не JSON: {payload[:100]!r}")
+            return
+        published = dict.fromkeys(KINDS, 0)
+        for item in data.get("items") or []:
+            before, after = item.get("before"), item.get("after")
+            published[_kind(before, after)] += 1
+            if item["k"] in self._items:
+                before = self._items[item["k"]][0]
+            self._items[item["k"]] = (before, after)
+        for kind in KINDS:
+            self._omitted[kind] += max(0, int(data.get(kind) or 0) - published[kind])
+        self._runs += 1
+
+        now = asyncio.get_running_loop().time()
+        self._last_at = now
+        if self._first_at is None:
+            self._first_at = now
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.ensure_future(self._wait_and_flush())
+
+    async def _wait_and_flush(self):
+        loop = asyncio.get_running_loop()
+        # пока идет отправка, этот flusher еще не завершен и on_notify нового
+        # не заводит: пришедшее за это время (take() сбросил _first_at, а
+        # on_notify снова выставил) копим и шлем следующей сводкой
+        while self._first_at is not None:
+            while True:
+                deadline = min(self._last_at + self.delay, self._first_at + self.max_delay)
+                if loop.time() >= deadline:
+                    break
+                await asyncio.sleep(deadline - loop.time())
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error(f"Сводка изменений не отправлена: {e}")
+
+    def take(self) -> Optional[str]:
+        """Забирает накопленное и возвращает текст сводки (None — нечего слать)."""
+        items, omitted, runs = self._items, self._omitted, self._runs
+        self._items, self._omitted, self._runs = {}, dict.fromkeys(KINDS, 0), 0
+        self._first_at = None
+
+        added: List[dict] = []
+        removed: List[dict] = []
+        changed: List[Tuple[dict, dict]] = []
+        for before, after in items.values():
+            if before is None and after is not None:
+                added.append(after)
+            elif before is not None and after is None:
+                removed.append(before)
+            elif before is not None and before != after:
+                changed.append((before, after))
+        if not (added or removed or changed or any(omitted.values())):
+            return None
+
+        def order(lesson: dict):
+            return lesson["d"], lesson["t"]
+
+        head = ["🔔 <b>Изменения в расписании</b>"]
+        if runs > 1:
+            head[0] += f" (синхронизаций: {runs})"
+        counts = [
+            f"{title}: {n}"
+            for title, n in (
+                ("добавлено", len(added) + omitted["added"]),
+                ("удалено", len(removed) + omitted["removed"]),
+                ("изменено", len(changed) + omitted["changed"]),
+            )
+            if n
+        ]
+        if counts:
+            head.append(", ".join(counts).capitalize())
+
+        lines = (
+            [f"➕ {_lesson_line(x)}" for x in sorted(added, key=order)]
+            + [f"➖ <s>{_lesson_line(x)}</s>" for x in sorted(removed, key=order)]
+            + [_diff_line(b, a) for b, a in sorted(changed, key=lambda ba: order(ba[1]))]
+        )
+        shown = lines[: settings.CHANGE_DIGEST_LINES]
+        rest = len(lines) - len(shown) + sum(omitted.values())
+        text = "\n".join(head + [""] + shown)
+        while len(text) > TELEGRAM_LIMIT - 100 and shown:
+            rest += 1
+            shown.pop()
+            text = "\n".join(head + [""] + shown)
+        if rest:
+            text += f"\n…и еще {rest}"
+        return text
+
+    async def flush(self):
+        text = self.take()
+        if text is None:
+            return
+        bot = self._get_bot()
+        if bot is None:
+            log.info("Сводка изменений не отправлена: бот выключен")
+            return
+        for admin_id in self._get_admins():
+            try:
+                await bot.send_message(admin_id, text, parse_mode="HTML")
+            except Exception as e:
+                log.warning(f"Сводка изменений для {admin_id} не доставлена: {e}")
@@ -1,7 +1,11 @@
+import json
 import aiohttp
-from typing import Optional
+from typing import AsyncIterator, Optional
 from .settings import settings
 
+# стрим живет, пока идет синхронизация; сервер шлет ping каждые 15 с
+STREAM_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_read=60)
+
 _session: Optional[aiohttp.ClientSession] = None
 
 
@@ -30,6 +34,21 @@ async def api_post(path: str, data: Optional[dict] = None) -> dict:
         return await response.json()
 
 
+async def api_events(path: str) -> AsyncIterator[dict]:
+    """Читает SSE-поток API и отдает data каждого события как dict."""
+    session = await _get_session()
+    async with session.get(path, timeout=STREAM_TIMEOUT) as response:
+        response.raise_for_status()
+        data = []
+        async for raw in response.content:
+            line = raw.decode("utf-8").rstrip("\r\n")
+            if line.startswith("data:"):
+                data.append(line[5:].lstrip())
+            elif not line and data:
+                yield json.loads("\n".join(data))
+                data = []
+
+
 async def close():
     global _session
     if _session and not _session.closed:
@@ -0,0 +1,43 @@
+"""
+Пул asyncpg для чтения расписания ботом.
+
+Запросы выполняются прямо в цикле событий, без потоков. asyncpg готовит
+каждый запрос один раз на соединение и дальше берет подготовленный
+оператор из кэша (statement_cache_size), поэтому запросы бота — это
+константы SQL с параметрами, а не строки, собираемые под каждый вызов.
+"""
+import asyncio
+from typing import Optional
+
+import asyncpg
+
+from .settings import settings
+
+_pool: Optional["asyncio.Future[asyncpg.Pool]"] = None
+
+
+async def get_pool() -> asyncpg.Pool:
+    """Общий пул; одновременные первые вызовы ждут одно и то же создание."""
+    global _pool
+    if _pool is None or (_pool.done() and (_pool.cancelled() or _pool.exception())):
+        _pool = asyncio.ensure_future(
+            asyncpg.create_pool(
+                settings.DB_DSN,
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+            )
+        )
+    return await asyncio.shield(_pool)
+
+
+async def fetch(query: str, *args) -> list:
+    pool = await get_pool()
+    return await pool.fetch(query, *args)
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None and _pool.done() and not _pool.cancelled() and not _pool.exception():
+        await _pool.result().close()
+    _pool = None
@@ -1,26 +1,116 @@
-from typing import Union
-import asyncio, logging, asyncpg
+"""
+LISTEN на каналы Postgres для бота (bot_config, schedule_synced,
+schedule_changes) на одном отдельном соединении.
+
+Соединение переподключается само: при обрыве (рестарт Postgres, сеть)
+или если проверочный SELECT 1 не прошел за LISTEN_KEEPALIVE сек —
+повторные попытки с экспоненциальной задержкой до
+LISTEN_RECONNECT_MAX_DELAY сек. Уведомления, пришедшие, пока соединения
+не было, потеряны, поэтому после переподключения вызываются resync-
+обработчики каналов (перечитать конфиг, пересобрать кэш).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from typing import Callable, Dict, Optional, Tuple
+
+import asyncpg
+
 from .settings import settings
-from .client import api_get
 
 log = logging.getLogger(__name__)
 
 
 class ConfigWatcher:
-    def __init__(self, dsn: str, on_change):
+    def __init__(self, dsn: str, on_change: Callable[[], None]):
         self._dsn = dsn
-        self._on_change = on_change  # coroutine
-        self._conn: Union[asyncpg.Connection, None] = None
+        # канал -> (on_notify(payload), resync() после переподключения)
+        self._channels: Dict[str, Tuple[Callable[[str], None], Optional[Callable[[], None]]]] = {
+            "bot_config": (lambda _: on_change(), on_change),
+        }
+        self._conn: Optional[asyncpg.Connection] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._lost: Optional[asyncio.Event] = None
 
     async def start(self):
-        self._conn = await asyncpg.connect(self._dsn)
-        await self._conn.add_listener("bot_config", self._callback)
-        log.info("LISTEN bot_config registered")
+        """Первое подключение — сразу; дальше соединение держит фоновая задача."""
+        await self._connect()
+        self._runner = asyncio.ensure_future(self._run())
+
+    async def listen(
+        self,
+        channel: str,
+        on_notify: Callable[[str], None],
+        resync: Optional[Callable[[], None]] = None,
+    ):
+        """Дополнительный канал на том же соединении; on_notify(payload)."""
+        self._channels[channel] = (on_notify, resync)
+        if self._conn is not None and not self._conn.is_closed():
+            await self._add_listener(self._conn, channel)
+
+    async def _add_listener(self, conn: asyncpg.Connection, channel: str):
+        await conn.add_listener(channel, lambda *args: self._dispatch(channel, args[-1]))
+        log.info(f"LISTEN {channel} registered")
+
+    def _dispatch(self, channel: str, payload: str):
+        log.info(f"Got NOTIFY {channel}")
+        try:
+            self._channels[channel][0](payload)
+        except Exception as e:
+            log.error(f"Обработчик NOTIFY {channel}: {e}")
+
+    async def _connect(self):
+        conn = await asyncpg.connect(self._dsn)
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _: lost.set())
+        for channel in list(self._channels):
+            await self._add_listener(conn, channel)
+        self._conn, self._lost = conn, lost
+
+    async def _run(self):
+        while True:
+            await self._watch()
+            log.warning("LISTEN: соединение с Postgres потеряно, переподключаюсь")
+            await self._drop()
+            delay = 1.0
+            while True:
+                try:
+                    await self._connect()
+                    break
+                except Exception as e:
+                    log.warning(f"LISTEN: не удалось подключиться ({e}), повтор через {delay:.0f}с")
+                    await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+                    delay = min(delay * 2, settings.LISTEN_RECONNECT_MAX_DELAY)
+            log.info("LISTEN: соединение восстановлено")
+            for channel, (_, resync) in self._channels.items():
+                if resync is not None:
+                    resync()
+
+    async def _watch(self):
+        """Ждет обрыва; заодно раз в LISTEN_KEEPALIVE сек проверяет соединение."""
+        keepalive = settings.LISTEN_KEEPALIVE
+        while True:
+            try:
+                await asyncio.wait_for(self._lost.wait(), timeout=keepalive)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self._conn.fetchval("SELECT 1", timeout=keepalive)
+            except Exception:
+                return
 
-    async def _callback(self, *args):
-        log.info("Got NOTIFY bot_config")
-        await self._on_change()
+    async def _drop(self):
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            conn.terminate()
 
     async def close(self):
-        if self._conn:
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        if self._conn is not None and not self._conn.is_closed():
             await self._conn.close()
+        self._conn = None
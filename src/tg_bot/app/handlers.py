@@ -2,9 +2,11 @@ import asyncio
 import logging
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 import pytz
 from aiogram import F, Router, types
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command, CommandObject, CommandStart
 from aiogram.types import (
     BotCommand,
@@ -15,9 +17,9 @@ from aiogram.types import (
     Message,
 )
 
-from .client import api_get, api_post
+from .client import api_events, api_get, api_post
 from .settings import settings
-from .teachers_skill import teacher_timetable, teachers_overview
+from .teachers_skill import day_schedule, split_message, teacher_timetable, teachers_overview
 
 router = Router()
 logger = logging.getLogger("handlers")
@@ -90,6 +92,9 @@ async def cmd_start(m: Message):
 
     await m.bot.set_my_commands(
         [
+            types.BotCommand(command="today", description="Занятия сегодня"),
+            types.BotCommand(command="tomorrow", description="Занятия завтра"),
+            types.BotCommand(command="week", description="Занятия на 7 дней"),
             types.BotCommand(
                 command="set_pic", description="Получить аватарку для BotFather"
             ),
@@ -142,29 +147,80 @@ async def cb_sync(cb: CallbackQuery):
     await cb.answer("Синхронизация запущена!")
 
 
+STAGE_TITLES = {
+    "queued": "в очереди",
+    "parse": "получаем расписание из личного кабинета",
+    "save": "сохраняем занятия",
+    "calendar": "обновляем Google Календарь",
+    "finished": "завершено",
+}
+COUNT_TITLES = {
+    "lessons_parsed": "занятий получено",
+    "events_inserted": "событий добавлено",
+    "events_updated": "событий обновлено",
+    "events_deleted": "событий удалено",
+}
+EDIT_INTERVAL = 1.5  # сек между правками сообщения (лимиты Telegram)
+SYNC_WAIT_TIMEOUT = 30 * 60  # дольше прогон не ждем
+
+
+def progress_text(event: dict) -> str:
+    stage = event.get("stage") or "queued"
+    lines = [f"🔄 Синхронизация: {STAGE_TITLES.get(stage, stage)}…"]
+    for key, title in COUNT_TITLES.items():
+        if event.get("counts", {}).get(key):
+            lines.append(f"• {title}: {event['counts'][key]}")
+    errors = event.get("errors_count") or len(event.get("errors") or [])
+    if errors:
+        lines.append(f"⚠️ ошибок: {errors}")
+    return "\n".join(lines)
+
+
+async def _edit(msg: Message, text: str, **kwargs):
+    try:
+        await msg.edit_text(text, **kwargs)
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            logger.warning(f"edit_text: {e}")
+
+
 async def launch_sync(target: Message):
     msg = await target.answer("🔄 Синхронизация запущена…")
     try:
-        await api_post("/api/sync")
+        resp = await api_post("/api/sync?source=bot")
     except Exception as e:
         await msg.edit_text(f"❌ Ошибка запуска: {e}", reply_markup=kb_main())
         return
 
-    await asyncio.sleep(6)
-    data = await api_get("/api/scheduler/overview")
-    runs = (data.get("runs") or [])[:2]
-
-    if runs:
-        lines = status_lines(runs)
-        await msg.edit_text(f"🔄 Синхронизация запущена…\n{lines}", parse_mode="HTML")
-        await asyncio.sleep(3)
+    job_id = resp.get("job_id")
+    if resp.get("merged"):
+        await _edit(msg, "🔄 Синхронизация уже идет, показываю ее ход…")
+
+    async def follow() -> Optional[dict]:
+        last_text, last_edit = "", 0.0
+        async for event in api_events(f"/api/sync/jobs/{job_id}/events"):
+            if event.get("type") == "done":
+                return event
+            text = progress_text(event)
+            now = asyncio.get_running_loop().time()
+            if text != last_text and now - last_edit >= EDIT_INTERVAL:
+                await _edit(msg, text)
+                last_text, last_edit = text, now
+        return None
 
-    last = runs[0] if runs else None
-    if last and last["status"] in {"done", "success"}:
-        await msg.edit_text("✅ Календарь синхронизирован!", reply_markup=kb_main())
+    try:
+        final = await asyncio.wait_for(follow(), timeout=SYNC_WAIT_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Поток прогресса задачи #{job_id} прервался: {e!r}")
+        final = None
+
+    if final is None:
+        await _edit(msg, "⚠️ Не удалось дождаться окончания синхронизации, см. /status", reply_markup=kb_main())
+    elif final.get("status") == "done":
+        summary = progress_text(final).split("\n")[1:]
+        await _edit(msg, "\n".join(["✅ Календарь синхронизирован!"] + summary), reply_markup=kb_main())
     else:
-        detail = last["detail"] if last else "Не удалось получить расписание."
-        await msg.edit_text(f"❌ {detail}", reply_markup=kb_main())
+        await _edit(msg, f"❌ {final.get('detail') or 'Синхронизация завершилась с ошибкой'}", reply_markup=kb_main())
 
 
 @router.message(Command("set_pic"))
@@ -184,10 +240,31 @@ async def cmd_set_pic(m: Message):
     )
 
 
+async def answer_long(msg: Message, text: str):
+    # Telegram не принимает сообщения длиннее 4096 символов
+    for part in split_message(text):
+        await msg.answer(part)
+
+
+@router.message(Command("today"))
+async def cmd_today(msg: Message):
+    await answer_long(msg, await day_schedule())
+
+
+@router.message(Command("tomorrow"))
+async def cmd_tomorrow(msg: Message):
+    await answer_long(msg, await day_schedule(offset=1))
+
+
+@router.message(Command("week"))
+async def cmd_week(msg: Message):
+    await answer_long(msg, await day_schedule(days=7))
+
+
 @router.message(Command("teachers"))
 async def cmd_teachers(msg: Message):
     text = await teachers_overview()
-    await msg.answer(text)
+    await answer_long(msg, text)
 
 
 @router.message(Command("teacher"))
@@ -200,7 +277,7 @@ async def cmd_teacher(message: Message, command: CommandObject):
         )
         return
     text = await teacher_timetable(q)
-    await message.answer(text)
+    await answer_long(message, text)
 
 
 @router.message(F.text & ~F.text.regexp(r"^/"))
@@ -210,4 +287,4 @@ async def free_text_teacher(message: Message):
     if len(q) < 3:
         return
     text = await teacher_timetable(q)
-    await message.answer(text)
+    await answer_long(message, text)
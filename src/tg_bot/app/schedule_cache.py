@@ -0,0 +1,188 @@
+"""
+Кэш расписания бота: все будущие занятия, заранее отрисованные по дням
+и по преподавателям.
+
+Собирается одним запросом к lessons и держится в памяти; ответы на
+/today, /tomorrow, /week, /teacher и /teachers берутся из него готовыми
+строками, без обращения к БД. Пересобирается:
+
+- по NOTIFY schedule_synced — пайплайн синхронизации шлет его один раз
+  после успешного прогона;
+- при смене суток (в фоне, по первому запросу нового дня).
+
+Вместе с кэшем из того же списка занятий пересобирается индекс
+преподавателей (teacher_index.py).
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import html
+import logging
+import re
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from schedule_vvsu.text_norm import norm
+
+from . import db
+from .teacher_index import TeacherIndex
+
+log = logging.getLogger(__name__)
+
+WEEKDAYS = ("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс")
+
+LESSONS_SQL = """
+SELECT date, start_time, end_time, subject, coalesce(room, ''),
+       coalesce(lesson_type, ''), coalesce(trim(teacher), '')
+FROM lessons
+WHERE date >= $1
+ORDER BY date, start_time
+"""
+
+
+def subj_clean(s: str) -> str:
+    return re.sub(r"\s*вебинар\s*:\s*\S+\s*$", "", s or "", flags=re.IGNORECASE).strip()
+
+
+def teacher_key(teacher: str) -> str:
+    # как lessons.teacher_norm и /api/search: без учета регистра, ё/е и знаков
+    return norm(teacher)
+
+
+def day_title(d: dt.date) -> str:
+    return f"{WEEKDAYS[d.weekday()]}, {d.strftime('%d.%m')}"
+
+
+class _Snapshot:
+    """
+    Неизменяемое состояние кэша; пересборка подменяет его целиком.
+
+    Ответы уходят с parse_mode=HTML, поэтому данные из lessons
+    экранируются здесь же, при отрисовке.
+    """
+
+    __slots__ = ("days", "timetables", "overview", "teachers", "lessons", "built_on")
+
+    def __init__(self, rows: Sequence[tuple], built_on: Optional[dt.date]):
+        day_lines: Dict[dt.date, List[str]] = defaultdict(list)
+        teacher_lines: Dict[str, List[str]] = defaultdict(list)
+        subjects: Dict[str, set] = defaultdict(set)
+        for d, start, end, subject, room, kind, teacher in rows:
+            subject = subj_clean(subject or "")
+            shown = html.escape(subject)
+            span = f"{start.strftime('%H:%M')}–{end.strftime('%H:%M')}"
+            room_tail = f" ({html.escape(room)})" if room.strip() else ""
+            kind_tail = f" [{html.escape(kind)}]" if kind.strip() else ""
+            teacher_tail = f" — {html.escape(teacher)}" if teacher else ""
+            day_lines[d].append(f"{span} {shown}{kind_tail}{room_tail}{teacher_tail}")
+            if teacher:
+                teacher_lines[teacher_key(teacher)].append(
+                    f"{d.strftime('%d.%m')} ({WEEKDAYS[d.weekday()]}) {span} — {shown}{room_tail}"
+                )
+                if subject:
+                    subjects[teacher].add(subject)
+
+        self.days = {d: "\n".join([f"📅 {day_title(d)}"] + lines) for d, lines in day_lines.items()}
+        self.timetables = {key: "\n".join(lines) for key, lines in teacher_lines.items()}
+        self.teachers = sorted({t for *_, t in rows if t})
+        self.overview = "\n".join(
+            ["Преподаватели (из будущих занятий):"]
+            + [
+                html.escape(f"{t} — {', '.join(sorted(subjects[t]))}")
+                for t in self.teachers
+            ]
+        )
+        self.lessons = len(rows)
+        self.built_on = built_on
+
+
+class ScheduleCache:
+    def __init__(
+        self,
+        loader: Callable[[dt.date], Awaitable[Sequence[tuple]]],
+        index: TeacherIndex,
+    ):
+        self._loader = loader
+        self._index = index
+        self._snap = _Snapshot([], None)
+        self._refreshing: Optional[asyncio.Task] = None
+        self._dirty = False
+
+    @property
+    def ready(self) -> bool:
+        return self._snap.built_on is not None
+
+    @property
+    def teachers(self) -> List[str]:
+        return self._snap.teachers
+
+    def build(self, rows: Sequence[tuple], built_on: dt.date):
+        started = time.perf_counter()
+        snap = _Snapshot(rows, built_on)
+        self._index.build(snap.teachers, built_on)
+        self._snap = snap
+        log.info(
+            "Кэш расписания: %d занятий, %d дней, %d преподавателей за %.1f мс",
+            snap.lessons,
+            len(snap.days),
+            len(snap.teachers),
+            (time.perf_counter() - started) * 1000,
+        )
+
+    # Обновление
+
+    async def ensure_fresh(self):
+        """Первый запрос ждет сборки; со сменой суток кэш обновляется в фоне."""
+        if not self.ready:
+            await self.refresh()
+        elif self._snap.built_on != dt.date.today():
+            self.schedule_refresh()
+
+    def schedule_refresh(self):
+        """Пересборка в фоне; запросы во время нее сливаются в одну повторную."""
+        if self._refreshing is not None and not self._refreshing.done():
+            self._dirty = True
+            return
+        self._refreshing = asyncio.ensure_future(self._refresh_loop())
+
+    async def refresh(self):
+        self.schedule_refresh()
+        await asyncio.shield(self._refreshing)
+
+    async def _refresh_loop(self):
+        while True:
+            self._dirty = False
+            try:
+                today = dt.date.today()
+                rows = await self._loader(today)
+                # отрисовка и индекс — десятки миллисекунд, не в цикле событий
+                await asyncio.to_thread(self.build, rows, today)
+            except Exception as e:
+                log.error(f"Кэш расписания не обновлен: {e}")
+            if not self._dirty:
+                return
+
+    # Ответы (только из памяти)
+
+    def day(self, d: dt.date) -> str:
+        return self._snap.days.get(d) or f"📅 {day_title(d)}\nЗанятий нет."
+
+    def days(self, start: dt.date, count: int) -> str:
+        return "\n\n".join(self.day(start + dt.timedelta(days=i)) for i in range(count))
+
+    def timetable(self, teacher: str) -> Optional[str]:
+        return self._snap.timetables.get(teacher_key(teacher))
+
+    def overview(self) -> Optional[str]:
+        return self._snap.overview if self._snap.teachers else None
+
+
+async def _fetch_lessons(today: dt.date) -> List[tuple]:
+    return [tuple(r) for r in await db.fetch(LESSONS_SQL, today)]
+
+
+# Общие для бота кэш и индекс преподавателей
+teacher_index = TeacherIndex()
+schedule_cache = ScheduleCache(_fetch_lessons, teacher_index)
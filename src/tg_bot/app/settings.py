@@ -19,17 +19,55 @@ class Settings(BaseSettings):
     BOT_TOKEN: Optional[str] = None
     ADMIN_IDS: str = ""  # Строка, например: "12345,67890"
 
+    # Режим webhook (BOT_MODE и BOT_WEBHOOK_URL приходят из API): где
+    # слушать обновления от Telegram; путь должен совпадать с Caddyfile
+    BOT_WEBHOOK_HOST: str = "0.0.0.0"
+    BOT_WEBHOOK_PORT: int = 8081
+    BOT_WEBHOOK_PATH: str = "/telegram/webhook"
+
+    # Всплеск NOTIFY bot_config за столько сек — одно перечитывание конфига
+    CONFIG_RELOAD_DEBOUNCE: float = 0.5
+    # LISTEN-соединение: проверка раз в N сек и предельная пауза между
+    # попытками переподключения
+    LISTEN_KEEPALIVE: float = 30.0
+    LISTEN_RECONNECT_MAX_DELAY: float = 60.0
+
+    # Адрес Bot API (пусто — api.telegram.org), например локальный
+    # telegram-bot-api или заглушка для тестов
+    TELEGRAM_API_URL: Optional[str] = None
+
     # Параметры подключения к Postgres
     POSTGRES_DB: str
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
+    POSTGRES_HOST: str = "postgres"
+    POSTGRES_PORT: int = 5432
+
+    # Пул asyncpg для чтения расписания (app/db.py): размер и сколько
+    # подготовленных запросов кэшировать на соединение
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    # Сводка изменений расписания админам (app/change_digest.py): ждать
+    # тишины столько сек, но не дольше MAX_DELAY от первого изменения;
+    # строк с занятиями в одной сводке
+    CHANGE_DIGEST_DELAY: float = 30.0
+    CHANGE_DIGEST_MAX_DELAY: float = 300.0
+    CHANGE_DIGEST_LINES: int = 15
 
     @property
     def DB_DSN(self) -> str:
         """DSN-строка подключения к Postgres"""
+        if self.POSTGRES_HOST.startswith("/"):
+            # каталог unix-сокета
+            return (
+                f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@/{self.POSTGRES_DB}"
+                f"?host={self.POSTGRES_HOST}&port={self.POSTGRES_PORT}"
+            )
         return (
             f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
-            f"@postgres:5432/{self.POSTGRES_DB}"
+            f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
     class Config:
@@ -0,0 +1,158 @@
+"""
+Индекс преподавателей для поиска по свободному тексту.
+
+Строится по списку преподавателей будущих занятий и держится в памяти;
+пересобирается вместе с кэшем расписания (schedule_cache.py). Поиск не
+ходит в БД:
+
+1. точное совпадение нормализованного запроса с одним из вариантов
+   имени (ФИО, фамилия, фамилия с инициалами, инициалы с фамилией);
+2. иначе — отбор кандидатов по общим триграммам (инвертированный
+   индекс, ранжирование по коэффициенту Жаккара), до PREFILTER_LIMIT
+   вариантов;
+3. WRatio только по отобранным кандидатам.
+
+Нормализация — общая с API и колонкой lessons.teacher_norm
+(schedule_vvsu/text_norm.py): нижний регистр, ё → е, все кроме букв —
+пробел.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import heapq
+import logging
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from thefuzz import fuzz, process
+
+from schedule_vvsu.text_norm import norm
+
+log = logging.getLogger(__name__)
+
+MATCH_SCORE = 70  # ниже — не совпадение, а подсказки
+HINT_SCORE = 55
+HINTS_LIMIT = 3
+PREFILTER_LIMIT = 64
+# триграммы, встречающиеся больше чем в этой доле вариантов ("ов ",
+# "ая "), почти ничего не отсеивают и только замедляют подсчет
+COMMON_GRAM_SHARE = 0.2
+
+def teacher_variants(raw: str) -> List[str]:
+    """Варианты написания: 'иванов иван петрович', 'иванов', 'иванов и п', 'и п иванов'."""
+    n = norm(raw)
+    parts = n.split()
+    variants = {n}
+    if parts:
+        surname, rest = parts[0], parts[1:]
+        variants.add(surname)
+        if rest:
+            initials = " ".join(p[0] for p in rest)
+            variants.add(f"{surname} {initials}")
+            variants.add(f"{initials} {surname}")
+            if len(rest[0]) > 1:
+                variants.add(f"{rest[0]} {surname}")
+    return [v for v in variants if v]
+
+
+def trigrams(s: str) -> set:
+    padded = f"  {s} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _Snapshot:
+    """Неизменяемое состояние индекса; пересборка подменяет его целиком."""
+
+    __slots__ = ("teachers", "variants", "owners", "sizes", "exact", "grams", "common", "built_on")
+
+    def __init__(self, teachers: Sequence[str], built_on: Optional[dt.date]):
+        # написания с одной нормой ("Ёлкин"/"Елкин") — один преподаватель,
+        # как в lessons.teacher_norm и расписаниях кэша; показываем первое
+        by_norm: Dict[str, str] = {}
+        for teacher in sorted(set(teachers)):
+            by_norm.setdefault(norm(teacher), teacher)
+        self.teachers = sorted(by_norm.values())
+        # каждый вариант хранится один раз, owners — чей он (однофамильцы)
+        self.variants: List[str] = []
+        self.owners: List[List[str]] = []
+        self.sizes: List[int] = []
+        self.exact: Dict[str, int] = {}
+        postings: Dict[str, List[int]] = {}
+        for teacher in self.teachers:
+            for variant in teacher_variants(teacher):
+                idx = self.exact.get(variant)
+                if idx is None:
+                    idx = self.exact[variant] = len(self.variants)
+                    grams = trigrams(variant)
+                    self.variants.append(variant)
+                    self.owners.append([])
+                    self.sizes.append(len(grams))
+                    for gram in grams:
+                        postings.setdefault(gram, []).append(idx)
+                self.owners[idx].append(teacher)
+        limit = max(PREFILTER_LIMIT, int(len(self.variants) * COMMON_GRAM_SHARE))
+        self.grams = postings
+        self.common = {gram for gram, ids in postings.items() if len(ids) > limit}
+        self.built_on = built_on
+
+
+class TeacherIndex:
+    def __init__(self):
+        self._snap = _Snapshot([], None)
+
+    @property
+    def ready(self) -> bool:
+        return self._snap.built_on is not None
+
+    @property
+    def teachers(self) -> List[str]:
+        return self._snap.teachers
+
+    def build(self, teachers: Sequence[str], built_on: Optional[dt.date] = None):
+        started = time.perf_counter()
+        snap = _Snapshot(teachers, built_on or dt.date.today())
+        self._snap = snap
+        log.info(
+            "Индекс преподавателей: %d преподавателей, %d вариантов за %.1f мс",
+            len(snap.teachers),
+            len(snap.variants),
+            (time.perf_counter() - started) * 1000,
+        )
+
+    # Поиск
+
+    def _candidates(self, snap: _Snapshot, qn: str) -> Dict[int, str]:
+        grams = trigrams(qn)
+        useful = [g for g in grams if g in snap.grams and g not in snap.common]
+        hits: Counter = Counter()
+        for gram in useful or [g for g in grams if g in snap.grams]:
+            hits.update(snap.grams[gram])
+        size, sizes = len(grams), snap.sizes
+        best = heapq.nlargest(
+            PREFILTER_LIMIT, hits.items(), key=lambda kv: kv[1] / (size + sizes[kv[0]] - kv[1])
+        )
+        return {idx: snap.variants[idx] for idx, _ in best}
+
+    def search(self, query: str) -> Tuple[Optional[str], List[str]]:
+        """(найденный преподаватель или None, подсказки при неточном запросе)."""
+        snap = self._snap
+        qn = norm(query)
+        if not qn or not snap.variants:
+            return None, []
+        idx = snap.exact.get(qn)
+        if idx is not None:
+            return self._pick(snap.owners[idx])
+        choices = self._candidates(snap, qn)
+        if not choices:
+            return None, []
+        ranked = process.extract(qn, choices, scorer=fuzz.WRatio, limit=HINTS_LIMIT * 3)
+        if ranked and ranked[0][1] >= MATCH_SCORE:
+            return self._pick(snap.owners[ranked[0][2]])
+        hints = [t for _, score, idx in ranked if score >= HINT_SCORE for t in snap.owners[idx]]
+        return None, list(dict.fromkeys(hints))[:HINTS_LIMIT]
+
+    @staticmethod
+    def _pick(owners: List[str]) -> Tuple[Optional[str], List[str]]:
+        # однофамильцы: не угадываем, а предлагаем выбрать
+        return (owners[0], []) if len(owners) == 1 else (None, owners[:HINTS_LIMIT])
@@ -0,0 +1,83 @@
+"""
+Прием обновлений Telegram через вебхук (BOT_MODE=webhook).
+
+Caddy проксирует BOT_WEBHOOK_PATH на этот сервер; Telegram присылает
+каждое обновление POST-запросом с заголовком
+X-Telegram-Bot-Api-Secret-Token — он сверяется с секретом, который бот
+передал в setWebhook. Бот и диспетчер берутся на момент запроса
+(get_target), поэтому сервер переживает смену токена и режима без
+перезапуска. Обновление передается диспетчеру в фоне, Telegram сразу
+получает 200.
+"""
+from __future__ import annotations
+
+import asyncio
+import hmac
+import logging
+from typing import Callable, Optional, Set, Tuple
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+
+from .settings import settings
+
+log = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+Target = Tuple[Optional[Bot], Optional[Dispatcher], Optional[str]]
+
+
+class WebhookServer:
+    def __init__(self, get_target: Callable[[], Target]):
+        self._get_target = get_target
+        self._runner: Optional[web.AppRunner] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._runner is not None
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_post(settings.BOT_WEBHOOK_PATH, self._handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, settings.BOT_WEBHOOK_HOST, settings.BOT_WEBHOOK_PORT).start()
+        self._runner = runner
+        log.info(
+            f"Вебхук слушает {settings.BOT_WEBHOOK_HOST}:{settings.BOT_WEBHOOK_PORT}"
+            f"{settings.BOT_WEBHOOK_PATH}"
+        )
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        bot, dp, secret = self._get_target()
+        if bot is None or dp is None or not secret:
+            # бот выключен или в режиме polling: Telegram повторит позже
+            return web.Response(status=503)
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), secret):
+            log.warning(f"Вебхук: неверный секрет от {request.remote}")
+            return web.Response(status=401)
+        try:
+            update = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+
+        task = asyncio.ensure_future(self._process(bot, dp, update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    @staticmethod
+    async def _process(bot: Bot, dp: Dispatcher, update: dict):
+        try:
+            await dp.feed_raw_update(bot, update)
+        except Exception:
+            log.exception(f"Ошибка обработки обновления {update.get('update_id')}")